@@ -1 +1,3 @@
-# Backend application package
\ No newline at end of file
+# Backend application package
+# Imported before any other app module, which starts the cold-start clock
+from .core.startup import startup_profile  # noqa: F401
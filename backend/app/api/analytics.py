@@ -0,0 +1,91 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+from ..core.config import settings
+from ..core.database import get_db
+from ..api.auth import get_current_user
+from ..models.user import User
+from ..models.analytics import DAILY_STAT_COUNTERS, DailyDoctorStats
+from ..schemas import DailyStatsOut, DoctorStatsOut, clinic_stats
+
+router = APIRouter()
+
+
+def _date_range(start_date: str, end_date: str) -> Tuple[date, date]:
+    try:
+        first_day = datetime.strptime(start_date, "%Y-%m-%d").date()
+        last_day = datetime.strptime(end_date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    days = (last_day - first_day).days + 1
+    if days < 1:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if days > settings.ANALYTICS_MAX_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Date range cannot exceed {settings.ANALYTICS_MAX_DAYS} days"
+        )
+    return first_day, last_day
+
+
+def daily_stats_query(db: Session, first_day: date, last_day: date, doctor_id: Optional[int] = None):
+    query = db.query(DailyDoctorStats).filter(
+        DailyDoctorStats.day >= first_day,
+        DailyDoctorStats.day <= last_day
+    )
+    if doctor_id is not None:
+        query = query.filter(DailyDoctorStats.doctor_id == doctor_id)
+    return query.order_by(DailyDoctorStats.day, DailyDoctorStats.doctor_id)
+
+
+def doctor_stats_query(db: Session, first_day: date, last_day: date, doctor_id: Optional[int] = None):
+    totals = [func.sum(getattr(DailyDoctorStats, name)).label(name) for name in DAILY_STAT_COUNTERS]
+    query = db.query(
+        DailyDoctorStats.doctor_id,
+        func.sum(case((DailyDoctorStats.booked > 0, 1), else_=0)).label("days"),
+        *totals
+    ).filter(
+        DailyDoctorStats.day >= first_day,
+        DailyDoctorStats.day <= last_day
+    )
+    if doctor_id is not None:
+        query = query.filter(DailyDoctorStats.doctor_id == doctor_id)
+    return query.group_by(DailyDoctorStats.doctor_id).order_by(DailyDoctorStats.doctor_id)
+
+
+@router.get("/daily", response_model=List[DailyStatsOut])
+def get_daily_stats(
+    start_date: str,  # Format: YYYY-MM-DD
+    end_date: str,  # Format: YYYY-MM-DD, inclusive
+    doctor_id: int = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Per-doctor, per-day utilization, no-show rate, average wait and throughput.
+    
+    Reads only the daily rollup table; days without activity are omitted.
+    """
+    first_day, last_day = _date_range(start_date, end_date)
+    rows = daily_stats_query(db, first_day, last_day, doctor_id).all()
+    return [DailyStatsOut(day=row.day, **clinic_stats(row)) for row in rows]
+
+
+@router.get("/doctors", response_model=List[DoctorStatsOut])
+def get_doctor_stats(
+    start_date: str,  # Format: YYYY-MM-DD
+    end_date: str,  # Format: YYYY-MM-DD, inclusive
+    doctor_id: int = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Per-doctor metrics summed over a date range.
+    
+    Utilization is measured against the days the doctor had bookings.
+    """
+    first_day, last_day = _date_range(start_date, end_date)
+    rows = doctor_stats_query(db, first_day, last_day, doctor_id).all()
+    return [DoctorStatsOut(days=row.days, **clinic_stats(row, row.days)) for row in rows]
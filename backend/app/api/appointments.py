@@ -1,15 +1,146 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import codecs
+import csv
+import json
+from collections import Counter, deque
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
 from datetime import datetime, timedelta
-from typing import List
-from ..core.database import get_db
+from typing import Dict, List, Optional, Set, Tuple, Union
+from ..core.config import settings
+from ..core.database import SessionLocal, get_db
+from ..core.http_cache import (
+    CachedResponse,
+    compute_etag,
+    conditional_response,
+    is_not_modified,
+    json_body,
+    not_modified_response,
+)
+from ..core.pagination import InvalidCursor, paginate_keyset
+from ..core.slots import slot_starts
 from ..api.auth import get_current_user
 from ..models.user import User
-from ..models.appointment import Appointment, AppointmentStatus, AppointmentType
+from ..models.appointment import (
+    ACTIVE_APPOINTMENT_STATUSES,
+    Appointment,
+    AppointmentSlot,
+    AppointmentStatus,
+    AppointmentType,
+)
 from ..models.doctor import Doctor
+from ..models.patient import Patient
+from ..notifications import dispatcher, enqueue_appointment_event, reminder_scheduler
+from ..schemas import AppointmentOut, AppointmentPage, parse_expand, serialize_appointment
 
 router = APIRouter()
 
+# Relations that can be embedded via ?expand=
+APPOINTMENT_EXPANSIONS = frozenset({"patient", "doctor", "queue_entry"})
+
+# Schedules change often and are per user; always revalidate
+SCHEDULE_CACHE_CONTROL = "private, no-cache"
+
+# Keyset order of cursor-paginated appointment lists (last column unique)
+APPOINTMENT_PAGE_ORDER = (Appointment.appointment_date, Appointment.appointment_id)
+
+
+def appointment_load_options(expand: Set[str]) -> list:
+    """Eager-load options for the requested relations (one query per relation)."""
+    loaders = {
+        "patient": selectinload(Appointment.patient),
+        "doctor": selectinload(Appointment.doctor),
+        "queue_entry": selectinload(Appointment.queue_entry),
+    }
+    return [loaders[name] for name in sorted(expand)]
+
+
+def schedule_validators(db: Session, day_filter: tuple, relations: Set[str]) -> tuple:
+    """
+    (count, max updated_at, ...) over a day's appointments and any expanded
+    relations. Cancelling or rescheduling bumps updated_at; a hard delete
+    changes the count.
+    """
+    return tuple(schedule_validators_query(db, day_filter, relations).one())
+
+
+def schedule_validators_query(db: Session, day_filter: tuple, relations: Set[str]):
+    """The aggregate query behind schedule_validators."""
+    columns = [func.count(Appointment.appointment_id), func.max(Appointment.updated_at)]
+    query = db.query(Appointment)
+    if "patient" in relations:
+        query = query.join(Patient, Appointment.patient_id == Patient.patient_id)
+        columns.append(func.max(Patient.updated_at))
+    if "doctor" in relations:
+        query = query.join(Doctor, Appointment.doctor_id == Doctor.doctor_id)
+        columns.append(func.max(Doctor.updated_at))
+    return query.with_entities(*columns).filter(*day_filter)
+
+
+def schedule_day_filter(doctor_id: int, start_of_day: datetime) -> tuple:
+    """A doctor's non-cancelled appointments starting on the given day."""
+    return (
+        Appointment.doctor_id == doctor_id,
+        Appointment.appointment_date >= start_of_day,
+        Appointment.appointment_date < start_of_day + timedelta(days=1),
+        Appointment.status != AppointmentStatus.CANCELLED
+    )
+
+
+def schedule_query(db: Session, day_filter: tuple, relations: Set[str]):
+    """A day's appointments in start order, with the expanded relations."""
+    return db.query(Appointment).options(
+        *appointment_load_options(relations)
+    ).filter(*day_filter).order_by(Appointment.appointment_date)
+
+
+def slot_interval_error(start_time: datetime, end_time: datetime) -> Optional[str]:
+    """
+    Why [start_time, end_time) cannot be booked, or None if it can.
+    
+    Bookings must start and end on the SLOT_GRANULARITY_MINUTES grid: a
+    misaligned one would reserve the partial slots at both ends, and so
+    reject a back-to-back booking that does not actually overlap it.
+    """
+    if end_time <= start_time:
+        return "End time must be after start time"
+    for value in (start_time, end_time):
+        if value.minute % settings.SLOT_GRANULARITY_MINUTES or value.second or value.microsecond:
+            return f"Appointment times must be on a {settings.SLOT_GRANULARITY_MINUTES}-minute boundary"
+    return None
+
+
+def slot_ceiling(value: datetime) -> datetime:
+    """The first slot boundary at or after value."""
+    floor = value.replace(second=0, microsecond=0) - timedelta(
+        minutes=value.minute % settings.SLOT_GRANULARITY_MINUTES
+    )
+    return floor if floor == value else floor + timedelta(minutes=settings.SLOT_GRANULARITY_MINUTES)
+
+
+def reserve_slots(db: Session, appointment: Appointment) -> None:
+    """
+    Claim the appointment's slots. The caller's commit raises IntegrityError
+    if any slot is already taken.
+    """
+    db.add_all([
+        AppointmentSlot(
+            doctor_id=appointment.doctor_id,
+            slot_start=slot_start,
+            appointment_id=appointment.appointment_id
+        )
+        for slot_start in slot_starts(appointment.appointment_date, appointment.end_time)
+    ])
+
+
+def release_slots(db: Session, appointment_id: int) -> None:
+    """Free every slot held by an appointment."""
+    db.query(AppointmentSlot).filter(
+        AppointmentSlot.appointment_id == appointment_id
+    ).delete(synchronize_session=False)
+
 
 def check_slot_availability(
     db: Session,
@@ -18,22 +149,38 @@ def check_slot_availability(
     end_time: datetime,
     exclude_appointment_id: int = None
 ) -> bool:
-    """Check if a time slot is available for a doctor."""
-    query = db.query(Appointment).filter(
-        Appointment.doctor_id == doctor_id,
-        Appointment.status.in_([
-            AppointmentStatus.SCHEDULED,
-            AppointmentStatus.CHECKED_IN,
-            AppointmentStatus.IN_PROGRESS
-        ]),
-        Appointment.appointment_date < end_time,
-        Appointment.end_time > start_time
+    """
+    Check if a time slot is available for a doctor.
+    
+    Probes the appointment_slots primary key, so the cost does not grow with
+    the doctor's appointment history. Booking is still guarded atomically by
+    the slot uniqueness constraint at commit time. Callers validate the
+    interval with slot_interval_error first.
+    """
+    return slot_conflict_query(db, doctor_id, start_time, end_time, exclude_appointment_id).first() is None
+
+
+def slot_conflict_query(
+    db: Session,
+    doctor_id: int,
+    start_time: datetime,
+    end_time: datetime,
+    exclude_appointment_id: int = None
+):
+    """Slots of [start_time, end_time) already held by another of the doctor's appointments."""
+    starts = slot_starts(start_time, end_time)
+    if not starts:
+        raise ValueError("end_time must be after start_time")
+    query = db.query(AppointmentSlot.appointment_id).filter(
+        AppointmentSlot.doctor_id == doctor_id,
+        AppointmentSlot.slot_start >= starts[0],
+        AppointmentSlot.slot_start < end_time
     )
     
     if exclude_appointment_id:
-        query = query.filter(Appointment.appointment_id != exclude_appointment_id)
+        query = query.filter(AppointmentSlot.appointment_id != exclude_appointment_id)
     
-    return query.count() == 0
+    return query
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
@@ -55,6 +202,9 @@ def create_appointment(
     
     # Calculate end time (30 minutes)
     end_time = start_time + timedelta(minutes=30)
+    interval_error = slot_interval_error(start_time, end_time)
+    if interval_error:
+        raise HTTPException(status_code=400, detail=interval_error)
     
     # Check slot availability
     if not check_slot_availability(db, doctor_id, start_time, end_time):
@@ -65,7 +215,7 @@ def create_appointment(
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
     
-    # Create appointment
+    # Create appointment and claim its slots in one transaction
     new_appointment = Appointment(
         patient_id=patient_id,
         doctor_id=doctor_id,
@@ -77,51 +227,522 @@ def create_appointment(
     )
     
     db.add(new_appointment)
-    db.commit()
+    db.flush()
+    reserve_slots(db, new_appointment)
+    enqueue_appointment_event(db, new_appointment, "appointment_created")
+    try:
+        db.commit()
+    except IntegrityError:
+        # Lost a race with a concurrent booking for the same slot
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Selected time slot is not available")
+    dispatcher.notify()
+    reminder_scheduler.schedule(new_appointment.appointment_id, start_time, AppointmentStatus.SCHEDULED)
     db.refresh(new_appointment)
     
     return new_appointment
 
 
-@router.get("/")
+# Content types accepted by the bulk import
+IMPORT_FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+IMPORT_REQUIRED_FIELDS = ("patient_id", "doctor_id", "appointment_date", "appointment_type")
+
+
+class ImportLineFeed:
+    """
+    Iterator over the body lines received so far.
+    
+    A single csv reader pulls from it as the body arrives: iteration stops
+    when the buffered lines run out and resumes once more are fed in, so
+    only complete records must be fed between reads.
+    """
+    
+    def __init__(self):
+        self.lines = deque()
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+def ndjson_import_row(line: str) -> dict:
+    try:
+        row = json.loads(line)
+    except ValueError:
+        return {"_error": "Invalid JSON"}
+    return row if isinstance(row, dict) else {"_error": "Row must be a JSON object"}
+
+
+async def read_import_rows(request: Request) -> List[dict]:
+    """
+    Read a CSV (with header) or NDJSON body as it arrives.
+    
+    Rows are parsed incrementally, so an oversized upload is rejected as
+    soon as it passes IMPORT_MAX_ROWS instead of after buffering the whole
+    body. CSV lines go to one csv reader, a record at a time, so quoted
+    fields may span lines. NDJSON lines that do not decode to an object
+    become {"_error": ...} rows so they are reported at their row number.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    source_format = IMPORT_FORMATS.get(content_type)
+    if source_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send the batch as text/csv or application/x-ndjson"
+        )
+    
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    feed = ImportLineFeed()
+    reader = csv.DictReader(feed) if source_format == "csv" else None
+    rows: List[dict] = []
+    # CSV lines of a record whose quoted field is still open, and their quote count
+    record, quotes = "", 0
+    
+    def take(lines: List[str]) -> None:
+        nonlocal record, quotes
+        if reader is None:
+            rows.extend(ndjson_import_row(line) for line in lines if line.strip())
+        else:
+            for line in lines:
+                record += line
+                quotes += line.count('"')
+                if quotes % 2 == 0:
+                    feed.lines.append(record)
+                    record, quotes = "", 0
+            rows.extend(reader)
+        if len(rows) > settings.IMPORT_MAX_ROWS:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Batch exceeds {settings.IMPORT_MAX_ROWS} rows"
+            )
+    
+    pending = ""
+    try:
+        async for chunk in request.stream():
+            pending += decoder.decode(chunk)
+            *complete, pending = pending.split("\n")
+            take([line + "\n" for line in complete])
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Batch must be UTF-8 encoded")
+    take([pending] if pending else [])
+    if record:
+        # Unterminated quoted field; the reader keeps what it has
+        feed.lines.append(record)
+        take([])
+    return rows
+
+
+def parse_import_row(raw: dict) -> Union[dict, str]:
+    """Validate one import row; returns appointment values or an error message."""
+    if "_error" in raw:
+        return raw["_error"]
+    missing = [name for name in IMPORT_REQUIRED_FIELDS if raw.get(name) in (None, "")]
+    if missing:
+        return f"Missing {', '.join(missing)}"
+    try:
+        patient_id = int(raw["patient_id"])
+        doctor_id = int(raw["doctor_id"])
+    except (TypeError, ValueError):
+        return "patient_id and doctor_id must be integers"
+    try:
+        start_time = datetime.fromisoformat(str(raw["appointment_date"]))
+    except ValueError:
+        return "Invalid datetime format"
+    end_time = start_time + timedelta(minutes=30)
+    interval_error = slot_interval_error(start_time, end_time)
+    if interval_error:
+        return interval_error
+    try:
+        appointment_type = AppointmentType(raw["appointment_type"])
+    except ValueError:
+        return "Invalid appointment_type"
+    return {
+        "patient_id": patient_id,
+        "doctor_id": doctor_id,
+        "appointment_date": start_time,
+        "end_time": end_time,
+        "appointment_type": appointment_type,
+        "reason": raw.get("reason") or None,
+    }
+
+
+def _existing_ids(db: Session, column, ids: Set[int]) -> Set[int]:
+    found = set()
+    ordered = sorted(ids)
+    for offset in range(0, len(ordered), settings.IMPORT_CHUNK_SIZE):
+        batch = ordered[offset:offset + settings.IMPORT_CHUNK_SIZE]
+        found.update(value for (value,) in db.query(column).filter(column.in_(batch)))
+    return found
+
+
+def plan_import(db: Session, raw_rows: List[dict]) -> Tuple[list, Dict[int, dict]]:
+    """
+    Validate a whole batch before anything is written.
+    
+    Returns (results, planned): one result dict per row, with failures
+    already filled in, and the appointment values to insert keyed by row
+    index. Slot conflicts are resolved in memory against a single range
+    query per doctor covering the batch's time span, so rows also conflict
+    with earlier rows of the same batch.
+    """
+    results = [{"row": index + 1} for index in range(len(raw_rows))]
+    parsed: Dict[int, dict] = {}
+    for index, raw in enumerate(raw_rows):
+        values = parse_import_row(raw)
+        if isinstance(values, str):
+            results[index].update(status="invalid", detail=values)
+        else:
+            parsed[index] = values
+    
+    doctor_ids = _existing_ids(db, Doctor.doctor_id, {values["doctor_id"] for values in parsed.values()})
+    patient_ids = _existing_ids(db, Patient.patient_id, {values["patient_id"] for values in parsed.values()})
+    
+    by_doctor: Dict[int, List[int]] = {}
+    for index, values in parsed.items():
+        if values["doctor_id"] not in doctor_ids:
+            results[index].update(status="invalid", detail="Doctor not found")
+        elif values["patient_id"] not in patient_ids:
+            results[index].update(status="invalid", detail="Patient not found")
+        else:
+            by_doctor.setdefault(values["doctor_id"], []).append(index)
+    
+    planned: Dict[int, dict] = {}
+    for doctor_id, indexes in by_doctor.items():
+        window_start = min(slot_starts(parsed[i]["appointment_date"], parsed[i]["end_time"])[0] for i in indexes)
+        window_end = max(parsed[i]["end_time"] for i in indexes)
+        taken = {
+            slot_start for (slot_start,) in db.query(AppointmentSlot.slot_start).filter(
+                AppointmentSlot.doctor_id == doctor_id,
+                AppointmentSlot.slot_start >= window_start,
+                AppointmentSlot.slot_start < window_end
+            )
+        }
+        for index in indexes:
+            values = parsed[index]
+            starts = slot_starts(values["appointment_date"], values["end_time"])
+            if taken.intersection(starts):
+                results[index].update(status="conflict", detail="Selected time slot is not available")
+                continue
+            taken.update(starts)
+            planned[index] = values
+    db.rollback()
+    return results, planned
+
+
+def _insert_appointments(db: Session, rows: List[dict], created_by: int) -> List[Tuple[int, datetime]]:
+    """
+    Insert appointments and their slots in the session's transaction.
+    Returns (appointment_id, appointment_date) per row, read before commit
+    expires the instances.
+    """
+    appointments = [Appointment(created_by=created_by, **values) for values in rows]
+    db.add_all(appointments)
+    db.flush()
+    db.execute(AppointmentSlot.__table__.insert(), [
+        {"doctor_id": appointment.doctor_id, "slot_start": slot_start, "appointment_id": appointment.appointment_id}
+        for appointment in appointments
+        for slot_start in slot_starts(appointment.appointment_date, appointment.end_time)
+    ])
+    return [(appointment.appointment_id, appointment.appointment_date) for appointment in appointments]
+
+
+def import_chunk(db: Session, indexes: List[int], planned: Dict[int, dict], results: list, created_by: int) -> None:
+    """
+    Insert one chunk of planned rows in a single transaction.
+    
+    If a booking made since planning claims one of the chunk's slots, the
+    chunk is retried row by row so only the rows that lost the race fail.
+    """
+    try:
+        inserted = _insert_appointments(db, [planned[index] for index in indexes], created_by)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        inserted = []
+        for index in indexes:
+            try:
+                row = _insert_appointments(db, [planned[index]], created_by)
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                row = [None]
+            inserted.extend(row)
+    db.expunge_all()
+    
+    for index, appointment in zip(indexes, inserted):
+        if appointment is None:
+            results[index].update(status="conflict", detail="Selected time slot is not available")
+            continue
+        appointment_id, start_time = appointment
+        results[index].update(status="created", appointment_id=appointment_id)
+        reminder_scheduler.schedule(appointment_id, start_time, AppointmentStatus.SCHEDULED)
+
+
+@router.post("/import")
+async def import_appointments(
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Book a batch of appointments from a CSV or NDJSON body.
+    
+    Columns/keys: patient_id, doctor_id, appointment_date (ISO),
+    appointment_type and optional reason. Rows are validated together,
+    valid ones are inserted in transactions of IMPORT_CHUNK_SIZE rows, and
+    the response streams one NDJSON result per row followed by a summary.
+    Imported appointments do not send creation notifications.
+    """
+    raw_rows = await read_import_rows(request)
+    created_by = current_user.user_id
+    
+    def report():
+        db = SessionLocal()
+        try:
+            results, planned = plan_import(db, raw_rows)
+            chunk_size = settings.IMPORT_CHUNK_SIZE
+            for offset in range(0, len(results), chunk_size):
+                indexes = [index for index in range(offset, offset + chunk_size) if index in planned]
+                if indexes:
+                    import_chunk(db, indexes, planned, results, created_by)
+                yield "".join(json.dumps(result) + "\n" for result in results[offset:offset + chunk_size])
+        finally:
+            db.close()
+        counts = Counter(result["status"] for result in results)
+        yield json.dumps({"summary": {"rows": len(results), **counts}}) + "\n"
+    
+    return StreamingResponse(report(), media_type="application/x-ndjson")
+
+
+@router.get(
+    "/",
+    response_model=Union[List[AppointmentOut], AppointmentPage],
+    response_model_exclude_unset=True
+)
 def list_appointments(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=settings.PAGE_MAX_LIMIT),
     patient_id: int = None,
     doctor_id: int = None,
     status_filter: str = None,
+    cursor: str = None,
+    expand: str = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """List appointments with optional filters."""
-    query = db.query(Appointment)
+    """
+    List appointments with optional filters.
+    
+    Pass cursor (empty for the first page) for keyset pagination ordered by
+    appointment date; the response is then {"items": [...], "next_cursor": ...}.
+    Without cursor, skip/limit offset pagination returns a plain list.
+    Use expand=patient,doctor,queue_entry to embed related records.
+    """
+    relations = parse_expand(expand, APPOINTMENT_EXPANSIONS)
+    query = appointment_list_query(
+        db, relations, patient_id, doctor_id, AppointmentStatus(status_filter) if status_filter else None
+    )
     
+    if cursor is not None:
+        try:
+            items, next_cursor = paginate_keyset(query, APPOINTMENT_PAGE_ORDER, cursor, limit)
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        return AppointmentPage(
+            items=[serialize_appointment(item, relations) for item in items],
+            next_cursor=next_cursor
+        )
+    
+    appointments = query.offset(skip).limit(limit).all()
+    return [serialize_appointment(appointment, relations) for appointment in appointments]
+
+
+def appointment_list_query(
+    db: Session,
+    relations: Set[str],
+    patient_id: int = None,
+    doctor_id: int = None,
+    status: AppointmentStatus = None
+):
+    """Appointments matching the list endpoint's filters, unordered and unpaginated."""
+    query = db.query(Appointment).options(*appointment_load_options(relations))
     if patient_id:
         query = query.filter(Appointment.patient_id == patient_id)
     if doctor_id:
         query = query.filter(Appointment.doctor_id == doctor_id)
-    if status_filter:
-        query = query.filter(Appointment.status == AppointmentStatus(status_filter))
+    if status:
+        query = query.filter(Appointment.status == status)
+    return query
+
+
+def merge_intervals(intervals: List[Tuple[datetime, datetime]]) -> List[Tuple[datetime, datetime]]:
+    """Merge overlapping or touching intervals in one sorted sweep."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def free_slots(
+    busy: List[Tuple[datetime, datetime]],
+    windows: List[Tuple[datetime, datetime]],
+    slot_length: timedelta,
+    not_before: datetime = None
+) -> List[Tuple[datetime, datetime]]:
+    """
+    Cut free slots of slot_length out of the opening windows.
     
-    appointments = query.offset(skip).limit(limit).all()
-    return appointments
+    Both busy (merged) and windows must be sorted; they are walked together
+    so the sweep is linear in their combined length.
+    """
+    slots = []
+    busy_index = 0
+    for window_start, window_end in windows:
+        cursor = window_start
+        while busy_index < len(busy) and busy[busy_index][1] <= window_start:
+            busy_index += 1
+        index = busy_index
+        while cursor + slot_length <= window_end:
+            # Skip past any busy interval overlapping the candidate slot
+            while index < len(busy) and busy[index][1] <= cursor:
+                index += 1
+            if index < len(busy) and busy[index][0] < cursor + slot_length:
+                # A misaligned legacy booking may end off the slot grid
+                cursor = slot_ceiling(busy[index][1])
+                continue
+            if not_before is None or cursor >= not_before:
+                slots.append((cursor, cursor + slot_length))
+            cursor += slot_length
+    return slots
 
 
-@router.get("/{appointment_id}")
+def busy_intervals_query(db: Session, doctor_ids: List[int], range_start: datetime, range_end: datetime):
+    """Active bookings of the doctors that overlap [range_start, range_end)."""
+    return db.query(
+        Appointment.doctor_id,
+        Appointment.appointment_date,
+        Appointment.end_time
+    ).filter(
+        Appointment.doctor_id.in_(doctor_ids),
+        Appointment.status.in_(ACTIVE_APPOINTMENT_STATUSES),
+        Appointment.appointment_date >= range_start - timedelta(days=1),
+        Appointment.appointment_date < range_end,
+        Appointment.end_time > range_start
+    )
+
+
+@router.get("/availability")
+def get_availability(
+    start_date: str,  # Format: YYYY-MM-DD
+    end_date: str,  # Format: YYYY-MM-DD, inclusive
+    specialization: str = None,
+    slot_minutes: int = 30,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get free appointment slots for all matching doctors over a date range."""
+    try:
+        first_day = datetime.strptime(start_date, "%Y-%m-%d")
+        last_day = datetime.strptime(end_date, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    
+    days = (last_day - first_day).days + 1
+    if days < 1:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if days > settings.AVAILABILITY_MAX_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Date range cannot exceed {settings.AVAILABILITY_MAX_DAYS} days"
+        )
+    if slot_minutes < 5 or slot_minutes > 240:
+        raise HTTPException(status_code=400, detail="slot_minutes must be between 5 and 240")
+    if slot_minutes % settings.SLOT_GRANULARITY_MINUTES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"slot_minutes must be a multiple of {settings.SLOT_GRANULARITY_MINUTES}"
+        )
+    
+    range_start = first_day
+    range_end = first_day + timedelta(days=days)
+    
+    doctor_query = db.query(Doctor)
+    if specialization:
+        doctor_query = doctor_query.filter(Doctor.specialization == specialization)
+    doctors = doctor_query.order_by(Doctor.doctor_id).all()
+    if not doctors:
+        return []
+    
+    # One range query for every matching doctor's bookings
+    busy_rows = busy_intervals_query(
+        db, [doctor.doctor_id for doctor in doctors], range_start, range_end
+    ).all()
+    
+    busy_by_doctor: Dict[int, List[Tuple[datetime, datetime]]] = {}
+    for row in busy_rows:
+        busy_by_doctor.setdefault(row.doctor_id, []).append((row.appointment_date, row.end_time))
+    
+    windows = [
+        (
+            first_day + timedelta(days=offset, hours=settings.CLINIC_OPEN_HOUR),
+            first_day + timedelta(days=offset, hours=settings.CLINIC_CLOSE_HOUR)
+        )
+        for offset in range(days)
+    ]
+    slot_length = timedelta(minutes=slot_minutes)
+    now = datetime.utcnow()
+    
+    return [
+        {
+            "doctor_id": doctor.doctor_id,
+            "full_name": doctor.full_name,
+            "specialization": doctor.specialization,
+            "slots": [
+                {"start": start.isoformat(), "end": end.isoformat()}
+                for start, end in free_slots(
+                    merge_intervals(busy_by_doctor.get(doctor.doctor_id, [])),
+                    windows,
+                    slot_length,
+                    not_before=now
+                )
+            ]
+        }
+        for doctor in doctors
+    ]
+
+
+@router.get("/{appointment_id}", response_model=AppointmentOut, response_model_exclude_unset=True)
 def get_appointment(
     appointment_id: int,
+    expand: str = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get appointment by ID."""
-    appointment = db.query(Appointment).filter(
+    relations = parse_expand(expand, APPOINTMENT_EXPANSIONS)
+    appointment = db.query(Appointment).options(
+        *appointment_load_options(relations)
+    ).filter(
         Appointment.appointment_id == appointment_id
     ).first()
     
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
     
-    return appointment
+    return serialize_appointment(appointment, relations)
 
 
 @router.put("/{appointment_id}")
@@ -150,6 +771,9 @@ def update_appointment(
             raise HTTPException(status_code=400, detail="Invalid datetime format")
         
         new_end = new_start + timedelta(minutes=30)
+        interval_error = slot_interval_error(new_start, new_end)
+        if interval_error:
+            raise HTTPException(status_code=400, detail=interval_error)
         
         if not check_slot_availability(db, appointment.doctor_id, new_start, new_end, appointment_id):
             raise HTTPException(status_code=400, detail="New time slot is not available")
@@ -157,6 +781,7 @@ def update_appointment(
         appointment.appointment_date = new_start
         appointment.end_time = new_end
     
+    was_active = appointment.status in ACTIVE_APPOINTMENT_STATUSES
     if status_update:
         appointment.status = AppointmentStatus(status_update)
     if reason:
@@ -164,8 +789,28 @@ def update_appointment(
     if notes:
         appointment.notes = notes
     
-    db.commit()
+    # Re-claim slots when the time moves or the appointment (re)activates
+    is_active = appointment.status in ACTIVE_APPOINTMENT_STATUSES
+    if was_active and (appointment_date or not is_active):
+        release_slots(db, appointment_id)
+    if is_active and (appointment_date or not was_active):
+        db.flush()
+        reserve_slots(db, appointment)
+    
+    if was_active and appointment.status == AppointmentStatus.CANCELLED:
+        enqueue_appointment_event(db, appointment, "appointment_cancelled")
+    elif appointment_date and is_active:
+        enqueue_appointment_event(db, appointment, "appointment_rescheduled")
+    
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="New time slot is not available")
+    dispatcher.notify()
     db.refresh(appointment)
+    if appointment_date or status_update:
+        reminder_scheduler.schedule(appointment.appointment_id, appointment.appointment_date, appointment.status)
     
     return appointment
 
@@ -184,33 +829,62 @@ def cancel_appointment(
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
     
+    was_cancelled = appointment.status == AppointmentStatus.CANCELLED
     appointment.status = AppointmentStatus.CANCELLED
+    release_slots(db, appointment_id)
+    if not was_cancelled:
+        enqueue_appointment_event(db, appointment, "appointment_cancelled")
     db.commit()
+    dispatcher.notify()
+    reminder_scheduler.cancel(appointment_id)
     
     return None
 
 
-@router.get("/doctor/{doctor_id}/schedule")
+@router.get(
+    "/doctor/{doctor_id}/schedule",
+    response_model=List[AppointmentOut],
+    response_model_exclude_unset=True
+)
 def get_doctor_schedule(
     doctor_id: int,
     date: str,  # Format: YYYY-MM-DD
+    request: Request,
+    response: Response,
+    expand: str = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get doctor's schedule for a specific date."""
+    """
+    Get doctor's schedule for a specific date.
+    
+    Responses carry ETag/Last-Modified derived from the appointments'
+    updated_at; a matching conditional request gets 304 after a single
+    aggregate query, without loading or serializing appointments.
+    """
+    relations = parse_expand(expand, APPOINTMENT_EXPANSIONS)
     try:
         schedule_date = datetime.strptime(date, "%Y-%m-%d")
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
     
-    start_of_day = schedule_date.replace(hour=0, minute=0, second=0, microsecond=0)
-    end_of_day = start_of_day + timedelta(days=1)
+    day_filter = schedule_day_filter(doctor_id, schedule_date)
     
-    appointments = db.query(Appointment).filter(
-        Appointment.doctor_id == doctor_id,
-        Appointment.appointment_date >= start_of_day,
-        Appointment.appointment_date < end_of_day,
-        Appointment.status != AppointmentStatus.CANCELLED
-    ).order_by(Appointment.appointment_date).all()
+    etag = last_modified = None
+    # Queue entries have no modification time, so expand=queue_entry is never conditional
+    if "queue_entry" not in relations:
+        validators = schedule_validators(db, day_filter, relations)
+        last_modified = max((value for value in validators[1:] if value is not None), default=None)
+        etag = compute_etag(doctor_id, date, sorted(relations), *validators)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified, SCHEDULE_CACHE_CONTROL)
     
-    return appointments
\ No newline at end of file
+    appointments = schedule_query(db, day_filter, relations).all()
+    
+    schedule = [serialize_appointment(appointment, relations) for appointment in appointments]
+    if etag is None:
+        response.headers["Cache-Control"] = SCHEDULE_CACHE_CONTROL
+        return schedule
+    body = json_body([item.model_dump(mode="json", exclude_unset=True) for item in schedule])
+    return conditional_response(request, CachedResponse(body, etag, last_modified), SCHEDULE_CACHE_CONTROL)
+
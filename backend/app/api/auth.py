@@ -1,14 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import event, inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
 from datetime import timedelta
 from pydantic import BaseModel
+from ..core.cache import SharedTTLCache
 from ..core.database import get_db
-from ..core.security import verify_password, get_password_hash, create_access_token, decode_access_token
+from ..core.security import (
+    HashingPoolSaturated,
+    create_access_token,
+    create_refresh_token,
+    decode_access_token,
+    decode_refresh_token,
+    get_password_hash_async,
+    verify_and_update_password_async,
+)
+from ..core.tokens import revocations
 from ..core.config import settings
 from ..models.user import User
 from ..models.doctor import Doctor
-from ..models.patient import Patient
+from ..models.patient import PLACEHOLDER_CONTACT_PREFIX, Patient
 
 
 class RegisterRequest(BaseModel):
@@ -18,9 +31,126 @@ class RegisterRequest(BaseModel):
     password: str
     role: str = "Patient"
 
+
+class RefreshRequest(BaseModel):
+    """Request model for exchanging or revoking a refresh token."""
+    refresh_token: str
+
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+# Active principals keyed on token subject (username); evictions reach every worker
+principal_cache = SharedTTLCache(
+    "principals",
+    maxsize=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+
+def _detached_copy(user: User) -> User:
+    """Build a session-independent snapshot of a user's column values."""
+    snapshot = User(**{
+        column.key: getattr(user, column.key)
+        for column in User.__table__.columns
+    })
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+def invalidate_principal(username: str) -> None:
+    """Drop a cached principal so the next request reloads it from the database."""
+    principal_cache.invalidate(username)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target):
+    """Evict cached principals whenever a user row is changed or removed."""
+    # Also evict the old subject if the username itself was changed
+    usernames = {target.username, *inspect(target).attrs.username.history.deleted}
+    # Evict now, and again once the change is committed so a read that
+    # raced the open transaction cannot leave the old principal cached
+    for username in usernames:
+        invalidate_principal(username)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("changed_principals", set()).update(usernames)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_principals_after_commit(session):
+    for username in session.info.pop("changed_principals", ()):
+        invalidate_principal(username)
+
+
+@event.listens_for(User, "after_update")
+def _revoke_deactivated_user(mapper, connection, target):
+    """Revoke outstanding tokens when a user is deactivated."""
+    if target.is_active is False and inspect(target).attrs.is_active.history.deleted:
+        revocations.revoke_user(object_session(target), target.user_id, connection)
+
+
+def _find_user_and_release(db: Session, criterion) -> User:
+    """
+    Look up a user, then return the session's connection to the pool.
+    
+    Callers go on to await bcrypt; holding a pooled connection across that
+    wait lets a login burst exhaust the pool while the hashing pool is busy.
+    The returned user is detached with its columns loaded.
+    """
+    user = user_query(db, criterion).first()
+    db.close()
+    return user
+
+
+def user_query(db: Session, criterion):
+    """Users matching criterion; shared by login, registration and get_current_user."""
+    return db.query(User).filter(criterion)
+
+
+def _store_password_hash(db: Session, user_id: int, password_hash: str) -> None:
+    db.query(User).filter(User.user_id == user_id).update(
+        {User.password_hash: password_hash}, synchronize_session=False
+    )
+    db.commit()
+
+
+def _revoke_once(db: Session, claims: dict) -> bool:
+    """Revoke a token and commit. Returns False if it was already revoked."""
+    revocations.revoke_token(db, claims)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return False
+    return True
+
+
+def _token_claims(user: User) -> dict:
+    return {"sub": user.username, "uid": user.user_id, "role": user.role.value}
+
+
+def _issue_token_pair(user: User) -> dict:
+    """Access and refresh tokens for a freshly authenticated user."""
+    claims = _token_claims(user)
+    return {
+        "access_token": create_access_token(
+            data=claims,
+            expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        ),
+        "refresh_token": create_refresh_token(data=claims),
+        "token_type": "bearer",
+    }
+
+
+def _hashing_unavailable() -> HTTPException:
+    """Build the 503 returned when the password hashing pool is saturated."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication service is busy, please retry shortly",
+        headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+    )
+
 
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
     """Get current authenticated user from token."""
@@ -30,30 +160,51 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
+    # Signature, expiry and revocation are checked without touching the database
     payload = decode_access_token(token)
     if payload is None:
         raise credentials_exception
     
+    revocations.maybe_sync(db)
+    if revocations.is_revoked(payload):
+        raise credentials_exception
+    
     username: str = payload.get("sub")
     if username is None:
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == username).first()
+    cached = principal_cache.get(username)
+    if cached is not None:
+        # Attach the snapshot to this session without a round-trip
+        return db.merge(cached, load=False)
+    
+    user = user_query(db, User.username == username).first()
     if user is None:
         raise credentials_exception
     
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     
+    principal_cache.set(username, _detached_copy(user))
     return user
 
 
 @router.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """User login endpoint."""
-    user = db.query(User).filter(User.username == form_data.username).first()
+    user = await run_in_threadpool(_find_user_and_release, db, User.username == form_data.username)
+    
+    password_valid = False
+    new_hash = None
+    if user:
+        try:
+            password_valid, new_hash = await verify_and_update_password_async(
+                form_data.password, user.password_hash
+            )
+        except HashingPoolSaturated:
+            raise _hashing_unavailable()
     
-    if not user or not verify_password(form_data.password, user.password_hash):
+    if not password_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -63,15 +214,12 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username, "role": user.role.value},
-        expires_delta=access_token_expires
-    )
+    # Transparently upgrade hashes created with an older cost factor
+    if new_hash:
+        await run_in_threadpool(_store_password_hash, db, user.user_id, new_hash)
     
     return {
-        "access_token": access_token,
-        "token_type": "bearer",
+        **_issue_token_pair(user),
         "user": {
             "user_id": user.user_id,
             "username": user.username,
@@ -81,6 +229,74 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     }
 
 
+@router.post("/refresh")
+def refresh_access_token(request: RefreshRequest, db: Session = Depends(get_db)):
+    """
+    Exchange a refresh token for a new access/refresh pair.
+    
+    Refresh tokens are single use: the presented token is revoked and a new
+    one issued. Presenting an already-used refresh token revokes every
+    token of that user, since it indicates the token was stolen.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    
+    payload = decode_refresh_token(request.refresh_token)
+    if payload is None:
+        raise credentials_exception
+    
+    revocations.maybe_sync(db)
+    if revocations.is_revoked(payload):
+        if payload.get("jti") in revocations and payload.get("uid") is not None:
+            revocations.revoke_user(db, payload["uid"])
+            db.commit()
+        raise credentials_exception
+    
+    user = db.query(User).filter(User.user_id == payload.get("uid")).first()
+    if user is None or user.username != payload.get("sub"):
+        raise credentials_exception
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    
+    # Another refresh with this token committed first, here or on another
+    # worker, after the check above: the same reuse, caught by jti's
+    # unique constraint
+    if not _revoke_once(db, payload):
+        revocations.revoke_user(db, user.user_id)
+        db.commit()
+        raise credentials_exception
+    
+    return _issue_token_pair(user)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(
+    request: RefreshRequest = None,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+):
+    """Revoke the current access token and, if given, its refresh token."""
+    payload = decode_access_token(token)
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    # Either token may already be revoked, e.g. a refresh token that was used
+    _revoke_once(db, payload)
+    if request is not None:
+        refresh_payload = decode_refresh_token(request.refresh_token)
+        if refresh_payload is not None and refresh_payload.get("uid") == payload.get("uid"):
+            _revoke_once(db, refresh_payload)
+    
+    return None
+
+
 @router.get("/me")
 def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current user information."""
@@ -93,28 +309,24 @@ def get_current_user_info(current_user: User = Depends(get_current_user)):
     }
 
 
-@router.post("/register")
-def register(
-    request: RegisterRequest,
-    db: Session = Depends(get_db)
-):
-    """Register new user and create associated profile."""
-    # Check if user exists
-    existing_user = db.query(User).filter(
-        (User.username == request.username) | (User.email == request.email)
-    ).first()
-    
-    if existing_user:
-        raise HTTPException(
-            status_code=400,
-            detail="Username or email already registered"
-        )
+@router.get("/cache-stats")
+def get_principal_cache_stats(current_user: User = Depends(get_current_user)):
+    """Get hit/miss counters for the principal cache."""
+    return principal_cache.stats()
+
+
+def _create_user(db: Session, request: RegisterRequest, password_hash: str) -> dict:
+    """
+    Create a user and its doctor or patient profile in one transaction.
     
+    Runs in the threadpool: the flushes and commit block on the database,
+    and must not hold up the event loop while they wait for a connection.
+    """
     # Create new user
     new_user = User(
         username=request.username,
         email=request.email,
-        password_hash=get_password_hash(request.password),
+        password_hash=password_hash,
         role=request.role,
         is_active=True
     )
@@ -143,7 +355,7 @@ def register(
         from datetime import date
         import random
         # Generate unique placeholder contact number to avoid UNIQUE constraint
-        unique_contact = f"000-{random.randint(100,999)}-{random.randint(1000,9999)}"
+        unique_contact = f"{PLACEHOLDER_CONTACT_PREFIX}{random.randint(100,999)}-{random.randint(1000,9999)}"
         new_patient = Patient(
             full_name=request.username,
             gender="Not Specified",  # Required field - can be updated later
@@ -168,4 +380,29 @@ def register(
         "user_id": new_user.user_id,
         "username": new_user.username,
         "role": new_user.role.value
-    }
\ No newline at end of file
+    }
+
+
+@router.post("/register")
+async def register(
+    request: RegisterRequest,
+    db: Session = Depends(get_db)
+):
+    """Register new user and create associated profile."""
+    # Check if user exists
+    existing_user = await run_in_threadpool(
+        _find_user_and_release, db, (User.username == request.username) | (User.email == request.email)
+    )
+    
+    if existing_user:
+        raise HTTPException(
+            status_code=400,
+            detail="Username or email already registered"
+        )
+    
+    try:
+        password_hash = await get_password_hash_async(request.password)
+    except HashingPoolSaturated:
+        raise _hashing_unavailable()
+    
+    return await run_in_threadpool(_create_user, db, request, password_hash)
\ No newline at end of file
@@ -1,23 +1,149 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from datetime import datetime
+from typing import Hashable, List, Optional
+from ..core.cache import SharedTTLCache
+from ..core.config import settings
 from ..core.database import get_db
+from ..core.http_cache import (
+    CachedResponse,
+    compute_etag,
+    conditional_response,
+    is_not_modified,
+    json_body,
+    not_modified_response,
+)
+from ..core.pagination import InvalidCursor, paginate_keyset
 from ..api.auth import get_current_user
 from ..models.user import User
 from ..models.doctor import Doctor
 
 router = APIRouter()
 
+# Serialized public doctor responses keyed on endpoint and query parameters;
+# invalidations reach every worker
+doctor_response_cache = SharedTTLCache(
+    "doctors",
+    maxsize=settings.RESPONSE_CACHE_MAX_SIZE,
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS
+)
+# Last time a doctor was removed; deletions do not show up in any updated_at
+_last_doctor_delete: Optional[datetime] = None
+# Bumped on every invalidation so responses built from older reads are not cached
+_cache_generation = 0
+
+
+def invalidate_doctor_cache(deleted_at: Optional[datetime] = None) -> None:
+    """Drop every cached doctor response, in every worker."""
+    doctor_response_cache.clear(deleted_at=deleted_at.isoformat() if deleted_at else None)
+
+
+@doctor_response_cache.on_invalidate
+def _doctors_invalidated(message: dict) -> None:
+    global _cache_generation, _last_doctor_delete
+    _cache_generation += 1
+    if message.get("deleted_at"):
+        deleted_at = datetime.fromisoformat(message["deleted_at"])
+        if _last_doctor_delete is None or deleted_at > _last_doctor_delete:
+            _last_doctor_delete = deleted_at
+
+
+def _mark_doctors_changed(target, deleted_at: Optional[datetime] = None) -> None:
+    # Evict now, and again once the change is committed so a read that
+    # raced the open transaction cannot leave the old data cached
+    invalidate_doctor_cache(deleted_at)
+    session = object_session(target)
+    if session is not None:
+        session.info["doctors_changed"] = True
+
+
+@event.listens_for(Doctor, "after_insert")
+@event.listens_for(Doctor, "after_update")
+def _invalidate_changed_doctor(mapper, connection, target):
+    """Evict cached responses whenever a doctor row is added or changed."""
+    _mark_doctors_changed(target)
+
+
+@event.listens_for(Doctor, "after_delete")
+def _invalidate_deleted_doctor(mapper, connection, target):
+    """Evict cached responses and move Last-Modified forward when a doctor is removed."""
+    _mark_doctors_changed(target, deleted_at=datetime.utcnow())
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    if session.info.pop("doctors_changed", False):
+        invalidate_doctor_cache()
+
+
+def _public_cache_control() -> str:
+    return f"public, max-age={settings.DOCTOR_CACHE_MAX_AGE_SECONDS}"
+
+
+def _doctor_response(
+    request: Request,
+    key: Hashable,
+    generation: int,
+    doctors: List[Doctor],
+    content,
+    extra: tuple = (),
+    listing: bool = True
+) -> Response:
+    """
+    Build, cache and return a doctor response.
+    
+    Validators come from the doctors' ids and updated_at (plus extra, such
+    as the next cursor), so a matching conditional request is answered with
+    304 before anything is serialized.
+    """
+    etag = compute_etag(key, [(doctor.doctor_id, doctor.updated_at) for doctor in doctors], *extra)
+    timestamps = [doctor.updated_at for doctor in doctors if doctor.updated_at is not None]
+    if listing and _last_doctor_delete is not None:
+        timestamps.append(_last_doctor_delete)
+    last_modified = max(timestamps, default=None)
+    
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified, _public_cache_control())
+    cached = CachedResponse(json_body(content), etag, last_modified)
+    if generation == _cache_generation:
+        doctor_response_cache.set(key, cached)
+    return conditional_response(request, cached, _public_cache_control())
+
 
 @router.get("/")
 def list_doctors(
-    skip: int = 0,
-    limit: int = 100,
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=settings.PAGE_MAX_LIMIT),
+    cursor: str = None,
     db: Session = Depends(get_db)
 ):
-    """List all doctors (public endpoint)."""
+    """
+    List all doctors (public endpoint).
+    
+    Pass cursor (empty for the first page) for keyset pagination; the
+    response is then {"items": [...], "next_cursor": ...}.
+    
+    Responses carry ETag/Last-Modified and are cached server-side until a
+    doctor is created, updated or deleted.
+    """
+    key = ("list", skip, limit, cursor)
+    cached = doctor_response_cache.get(key)
+    if cached is not None:
+        return conditional_response(request, cached, _public_cache_control())
+    generation = _cache_generation
+    
+    if cursor is not None:
+        try:
+            items, next_cursor = paginate_keyset(db.query(Doctor), [Doctor.doctor_id], cursor, limit)
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        content = {"items": items, "next_cursor": next_cursor}
+        return _doctor_response(request, key, generation, items, content, extra=(next_cursor,))
+    
     doctors = db.query(Doctor).offset(skip).limit(limit).all()
-    return doctors
+    return _doctor_response(request, key, generation, doctors, doctors)
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
@@ -54,13 +180,20 @@ def create_doctor(
 @router.get("/{doctor_id}")
 def get_doctor(
     doctor_id: int,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """Get doctor by ID."""
+    key = ("doctor", doctor_id)
+    cached = doctor_response_cache.get(key)
+    if cached is not None:
+        return conditional_response(request, cached, _public_cache_control())
+    generation = _cache_generation
+    
     doctor = db.query(Doctor).filter(Doctor.doctor_id == doctor_id).first()
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor not found")
-    return doctor
+    return _doctor_response(request, key, generation, [doctor], doctor, listing=False)
 
 
 @router.put("/{doctor_id}")
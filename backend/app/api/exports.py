@@ -0,0 +1,183 @@
+import csv
+import enum
+import io
+import json
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..api.auth import get_current_user
+from ..models.user import User
+from ..models.appointment import Appointment
+from ..models.queue import QueueEntry
+
+router = APIRouter()
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+APPOINTMENT_EXPORT_COLUMNS = (
+    Appointment.appointment_id,
+    Appointment.patient_id,
+    Appointment.doctor_id,
+    Appointment.appointment_date,
+    Appointment.end_time,
+    Appointment.appointment_type,
+    Appointment.status,
+    Appointment.reason,
+    Appointment.notes,
+    Appointment.created_by,
+    Appointment.created_at,
+    Appointment.updated_at,
+)
+
+QUEUE_EXPORT_COLUMNS = (
+    QueueEntry.queue_id,
+    QueueEntry.appointment_id,
+    Appointment.doctor_id,
+    Appointment.patient_id,
+    QueueEntry.check_in_time,
+    QueueEntry.priority,
+    QueueEntry.status,
+    QueueEntry.position,
+    QueueEntry.called_time,
+    QueueEntry.completed_time,
+    QueueEntry.estimated_wait_minutes,
+)
+
+
+def _export_value(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _parse_day(value: Optional[str], name: str) -> Optional[datetime]:
+    if value is None:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}. Use YYYY-MM-DD")
+
+
+def _date_filters(column, start_date: Optional[str], end_date: Optional[str]) -> list:
+    """Filters for an inclusive [start_date, end_date] range of days."""
+    filters = []
+    start = _parse_day(start_date, "start_date")
+    end = _parse_day(end_date, "end_date")
+    if start is not None:
+        filters.append(column >= start)
+    if end is not None:
+        filters.append(column < end + timedelta(days=1))
+    return filters
+
+
+def stream_rows(statement, export_format: str) -> Iterator[str]:
+    """
+    Execute a statement and yield its rows serialized as CSV or NDJSON.
+    
+    Rows are fetched EXPORT_BATCH_SIZE at a time through a server-side
+    cursor where the driver supports one, and each batch is serialized into
+    a single chunk, so memory stays flat regardless of table size. The
+    session is opened here rather than injected because the generator
+    outlives the request handler.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            statement.execution_options(stream_results=True, yield_per=settings.EXPORT_BATCH_SIZE)
+        )
+        columns = list(result.keys())
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export_format == "csv":
+            writer.writerow(columns)
+        for batch in result.partitions():
+            if export_format == "csv":
+                writer.writerows([_export_value(value) for value in row] for row in batch)
+            else:
+                for row in batch:
+                    buffer.write(json.dumps(dict(zip(columns, map(_export_value, row)))))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        # Header-only CSV for an empty export
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        db.close()
+
+
+def appointment_export_statement(start_date: Optional[str], end_date: Optional[str], doctor_id: Optional[int]):
+    """Appointment export rows for the inclusive day range, by appointment_id."""
+    filters = _date_filters(Appointment.appointment_date, start_date, end_date)
+    if doctor_id is not None:
+        filters.append(Appointment.doctor_id == doctor_id)
+    return select(*APPOINTMENT_EXPORT_COLUMNS).where(*filters).order_by(Appointment.appointment_id)
+
+
+def queue_export_statement(start_date: Optional[str], end_date: Optional[str], doctor_id: Optional[int]):
+    """Queue export rows for the inclusive check-in day range, by queue_id."""
+    filters = _date_filters(QueueEntry.check_in_time, start_date, end_date)
+    if doctor_id is not None:
+        filters.append(Appointment.doctor_id == doctor_id)
+    return (
+        select(*QUEUE_EXPORT_COLUMNS)
+        .join(Appointment, QueueEntry.appointment_id == Appointment.appointment_id)
+        .where(*filters)
+        .order_by(QueueEntry.queue_id)
+    )
+
+
+def export_response(statement, export_format: str, name: str) -> StreamingResponse:
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    filename = f"{name}-{datetime.utcnow():%Y%m%d%H%M%S}.{export_format}"
+    return StreamingResponse(
+        stream_rows(statement, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/appointments")
+def export_appointments(
+    format: str = "csv",
+    start_date: str = None,
+    end_date: str = None,
+    doctor_id: int = None,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream appointments as CSV or NDJSON.
+    
+    start_date/end_date (YYYY-MM-DD, inclusive) filter on appointment_date.
+    Rows are ordered by appointment_id.
+    """
+    return export_response(appointment_export_statement(start_date, end_date, doctor_id), format, "appointments")
+
+
+@router.get("/queue")
+def export_queue_history(
+    format: str = "csv",
+    start_date: str = None,
+    end_date: str = None,
+    doctor_id: int = None,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream queue entries, with their doctor and patient, as CSV or NDJSON.
+    
+    start_date/end_date (YYYY-MM-DD, inclusive) filter on check_in_time.
+    Rows are ordered by queue_id.
+    """
+    return export_response(queue_export_statement(start_date, end_date, doctor_id), format, "queue")
@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 from typing import List
 from datetime import date
+from ..core.config import settings
 from ..core.database import get_db
+from ..core.pagination import InvalidCursor, paginate_keyset
+from ..core.patient_search import patient_search
 from ..api.auth import get_current_user
 from ..models.user import User
 from ..models.patient import Patient
@@ -12,16 +16,68 @@ router = APIRouter()
 
 @router.get("/")
 def list_patients(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=settings.PAGE_MAX_LIMIT),
+    cursor: str = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """List all patients."""
+    """
+    List all patients.
+    
+    Pass cursor (empty for the first page) for keyset pagination; the
+    response is then {"items": [...], "next_cursor": ...}.
+    """
+    if cursor is not None:
+        try:
+            items, next_cursor = paginate_keyset(db.query(Patient), [Patient.patient_id], cursor, limit)
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        return {"items": items, "next_cursor": next_cursor}
+    
     patients = db.query(Patient).offset(skip).limit(limit).all()
     return patients
 
 
+@router.get("/search")
+def search_patients(
+    q: str,
+    limit: int = 20,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Search patients by partial name or phone number, best matches first.
+    
+    Names match by word prefix ("jo sm" finds "John Smith") or, for
+    misspellings, by trigram similarity. Phone numbers match any run of
+    digits regardless of spaces, dashes or a leading + / 00. Each result
+    carries a match_score between 0 and 1.
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Search query must not be empty")
+    limit = max(1, min(limit, settings.PATIENT_SEARCH_MAX_RESULTS))
+    
+    patient_search.maybe_sync(db)
+    matches = patient_search.search(q, limit)
+    if not matches:
+        return []
+    
+    patients = {
+        patient.patient_id: patient
+        for patient in db.query(Patient).filter(Patient.patient_id.in_([patient_id for patient_id, _ in matches]))
+    }
+    results = []
+    for patient_id, score in matches:
+        patient = patients.get(patient_id)
+        if patient is None:
+            # Deleted by another worker since the index last saw it
+            patient_search.remove(patient_id)
+            continue
+        results.append({**jsonable_encoder(patient), "match_score": score})
+    return results
+
+
 @router.post("/", status_code=status.HTTP_201_CREATED)
 def create_patient(
     full_name: str,
@@ -1,31 +1,93 @@
+import asyncio
+import json
+from contextlib import contextmanager
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, contains_eager, selectinload
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime
-from typing import List
-from ..core.database import get_db
+from typing import List, Set
+from ..core.database import SessionLocal, get_db
+from ..core.pubsub import queue_events
+from ..core.queue_engine import queue_engine, refresh_estimates, service_times, write_positions
+from ..core.shared_state import SharedLockTimeout
 from ..api.auth import get_current_user
 from ..models.user import User
 from ..models.queue import QueueEntry, QueueStatus, QueuePriority
 from ..models.appointment import Appointment
+from ..notifications import dispatcher, enqueue_appointment_event
+from ..schemas import QueueEntryOut, parse_expand, serialize_queue_entry
 
 router = APIRouter()
 
+# Seconds between keep-alive comments on idle event streams
+STREAM_KEEPALIVE_SECONDS = 15
 
-def update_queue_positions(db: Session, doctor_id: int):
-    """Update queue positions for a specific doctor."""
-    queue_entries = db.query(QueueEntry).join(Appointment).filter(
+
+# Relations that can be embedded via ?expand=
+QUEUE_EXPANSIONS = frozenset({"appointment", "patient", "doctor"})
+
+
+def load_queue(db: Session, doctor_id: int, expand: Set[str] = frozenset()) -> List[QueueEntry]:
+    """Load the active (waiting or called) queue for a doctor."""
+    return active_queue_query(db, doctor_id, expand).all()
+
+
+def active_queue_query(db: Session, doctor_id: int, expand: Set[str] = frozenset()):
+    """The query behind load_queue, in position order."""
+    options = []
+    if expand:
+        # Reuse the join for the appointment; fetch patients/doctors in one query each
+        options.append(contains_eager(QueueEntry.appointment))
+        if "patient" in expand:
+            options.append(contains_eager(QueueEntry.appointment).selectinload(Appointment.patient))
+        if "doctor" in expand:
+            options.append(contains_eager(QueueEntry.appointment).selectinload(Appointment.doctor))
+    return db.query(QueueEntry).join(Appointment).options(*options).filter(
         Appointment.doctor_id == doctor_id,
-        QueueEntry.status == QueueStatus.WAITING
-    ).order_by(
-        QueueEntry.priority.desc(),
-        QueueEntry.check_in_time
-    ).all()
-    
-    for index, entry in enumerate(queue_entries, start=1):
-        entry.position = index
-        entry.estimated_wait_minutes = (index - 1) * 15  # 15 min average
-    
-    db.commit()
+        QueueEntry.status.in_([QueueStatus.WAITING, QueueStatus.CALLED])
+    ).order_by(QueueEntry.position)
+
+
+def publish_queue_update(db: Session, doctor_id: int, event: str, queue_id: int):
+    """Push one queue snapshot to every subscriber of a doctor's board."""
+    queue_events.publish(doctor_id, {
+        "event": event,
+        "doctor_id": doctor_id,
+        "queue_id": queue_id,
+        "queue": jsonable_encoder(load_queue(db, doctor_id)),
+    })
+
+
+def _snapshot_queue(doctor_id: int) -> list:
+    """Serialize a doctor's queue using a short-lived session."""
+    db = SessionLocal()
+    try:
+        return jsonable_encoder(load_queue(db, doctor_id))
+    finally:
+        db.close()
+
+
+@contextmanager
+def locked_queue(db: Session, doctor_id: int):
+    """Hold a doctor's queue in every worker; 503 if another worker holds it too long."""
+    try:
+        with queue_engine.locked(db, doctor_id) as queue:
+            yield queue
+    except SharedLockTimeout:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Queue is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
+
+def update_queue_positions(db: Session, doctor_id: int):
+    """Rewrite queue positions for a doctor from the queue engine."""
+    with locked_queue(db, doctor_id) as queue:
+        write_positions(db, queue, queue.positions())
+        db.commit()
 
 
 @router.post("/check-in", status_code=status.HTTP_201_CREATED)
@@ -52,35 +114,74 @@ def check_in_patient(
     if existing_entry:
         raise HTTPException(status_code=400, detail="Patient already checked in")
     
-    # Create queue entry
-    queue_entry = QueueEntry(
-        appointment_id=appointment_id,
-        priority=QueuePriority(priority),
-        check_in_time=datetime.utcnow()
-    )
-    
-    db.add(queue_entry)
-    db.commit()
-    
-    # Update queue positions
-    update_queue_positions(db, appointment.doctor_id)
+    # Create the entry, insert it into the doctor's queue and write through
+    # shifted positions in one transaction
+    with locked_queue(db, appointment.doctor_id) as queue:
+        queue_entry = QueueEntry(
+            appointment_id=appointment_id,
+            priority=QueuePriority(priority),
+            check_in_time=datetime.utcnow()
+        )
+        db.add(queue_entry)
+        db.flush()
+        changed = queue.push(
+            queue_entry.queue_id, queue_entry.priority, queue_entry.check_in_time, appointment.appointment_type
+        )
+        write_positions(db, queue, changed)
+        db.commit()
     
+    publish_queue_update(db, appointment.doctor_id, "check_in", queue_entry.queue_id)
     db.refresh(queue_entry)
     return queue_entry
 
 
-@router.get("/status/{doctor_id}")
+@router.get("/status/{doctor_id}", response_model=List[QueueEntryOut], response_model_exclude_unset=True)
 def get_queue_status(
     doctor_id: int,
+    expand: str = None,
     db: Session = Depends(get_db)
 ):
-    """Get current queue status for a doctor."""
-    queue = db.query(QueueEntry).join(Appointment).filter(
-        Appointment.doctor_id == doctor_id,
-        QueueEntry.status.in_([QueueStatus.WAITING, QueueStatus.CALLED])
-    ).order_by(QueueEntry.position).all()
+    """
+    Get current queue status for a doctor.
     
-    return queue
+    Use expand=appointment,patient,doctor to embed related records.
+    """
+    relations = parse_expand(expand, QUEUE_EXPANSIONS)
+    return [serialize_queue_entry(entry, relations) for entry in load_queue(db, doctor_id, relations)]
+
+
+@router.get("/stream/{doctor_id}")
+async def stream_queue_status(doctor_id: int):
+    """
+    Stream queue updates for a doctor as Server-Sent Events.
+    
+    Sends the current queue on connect, then one snapshot per change, so
+    connected boards share a single query per queue event.
+    """
+    async def event_stream():
+        # Subscribed only once the body is iterated, so a client that
+        # disconnects before then leaves no subscription behind; still
+        # before the snapshot, so no change after it is missed
+        subscription = queue_events.subscribe(doctor_id)
+        try:
+            initial = await run_in_threadpool(_snapshot_queue, doctor_id)
+            snapshot = {"event": "snapshot", "doctor_id": doctor_id, "queue_id": None, "queue": initial}
+            yield f"event: queue\ndata: {json.dumps(snapshot)}\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.get(), STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: queue\ndata: {json.dumps(message)}\n\n"
+        finally:
+            subscription.close()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.post("/call-next/{doctor_id}")
@@ -90,25 +191,38 @@ def call_next_patient(
     current_user: User = Depends(get_current_user)
 ):
     """Call the next patient in the queue."""
-    next_entry = db.query(QueueEntry).join(Appointment).filter(
-        Appointment.doctor_id == doctor_id,
-        QueueEntry.status == QueueStatus.WAITING
-    ).order_by(
-        QueueEntry.priority.desc(),
-        QueueEntry.check_in_time
-    ).first()
-    
-    if not next_entry:
-        raise HTTPException(status_code=404, detail="No patients in queue")
-    
-    next_entry.status = QueueStatus.CALLED
-    next_entry.called_time = datetime.utcnow()
-    
-    db.commit()
-    
-    # Update remaining queue positions
-    update_queue_positions(db, doctor_id)
+    with locked_queue(db, doctor_id) as queue:
+        while True:
+            next_id = queue.peek()
+            if next_id is None:
+                db.commit()
+                raise HTTPException(status_code=404, detail="No patients in queue")
+            next_entry = db.query(QueueEntry).filter(QueueEntry.queue_id == next_id).first()
+            if next_entry is not None and next_entry.status == QueueStatus.WAITING:
+                break
+            # The row was deleted or left the waiting list behind the queue's
+            # back; drop it and close the gap before trying the next one
+            write_positions(db, queue, queue.remove(next_id))
+        
+        next_entry.status = QueueStatus.CALLED
+        next_entry.called_time = datetime.utcnow()
+        enqueue_appointment_event(db, next_entry.appointment, "queue_called")
+        
+        # Remaining entries each move up one place
+        changed = queue.remove(next_id)
+        try:
+            write_positions(db, queue, changed)
+            db.commit()
+        except Exception:
+            db.rollback()
+            queue.push(
+                next_entry.queue_id, next_entry.priority, next_entry.check_in_time,
+                next_entry.appointment.appointment_type
+            )
+            raise
     
+    dispatcher.notify()
+    publish_queue_update(db, doctor_id, "call_next", next_entry.queue_id)
     db.refresh(next_entry)
     return next_entry
 
@@ -119,16 +233,44 @@ def complete_queue_entry(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Mark queue entry as completed."""
+    """Mark a waiting or called queue entry as completed."""
     queue_entry = db.query(QueueEntry).filter(QueueEntry.queue_id == queue_id).first()
     
     if not queue_entry:
         raise HTTPException(status_code=404, detail="Queue entry not found")
     
-    queue_entry.status = QueueStatus.COMPLETED
-    queue_entry.completed_time = datetime.utcnow()
-    
+    doctor_id = queue_entry.appointment.doctor_id
+    # End the read transaction so the status below is read under the lock,
+    # where a second completion of the same entry cannot also pass the check
     db.commit()
+    
+    with locked_queue(db, doctor_id) as queue:
+        if queue_entry.status not in (QueueStatus.WAITING, QueueStatus.CALLED):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Queue entry is already {queue_entry.status.value}"
+            )
+        was_waiting = queue_entry.status == QueueStatus.WAITING
+        queue_entry.status = QueueStatus.COMPLETED
+        queue_entry.completed_time = datetime.utcnow()
+        if was_waiting:
+            # Completed straight from the waiting list; close the gap it leaves
+            write_positions(db, queue, queue.remove(queue_id))
+        db.commit()
+        
+        # Only a called patient's consultation is a service-time sample
+        if not was_waiting and queue_entry.called_time is not None:
+            appointment = queue_entry.appointment
+            service_times.record(
+                doctor_id,
+                appointment.appointment_type,
+                (queue_entry.completed_time - queue_entry.called_time).total_seconds() / 60
+            )
+            # The new average moves the estimates of everyone still waiting
+            refresh_estimates(db, queue)
+            db.commit()
+    
+    publish_queue_update(db, doctor_id, "complete", queue_id)
     db.refresh(queue_entry)
     
     return queue_entry
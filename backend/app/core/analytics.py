@@ -0,0 +1,382 @@
+import argparse
+import logging
+import sys
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Tuple
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.orm import Session, object_session
+from .config import settings
+from ..models.analytics import DAILY_STAT_COUNTERS, DailyDoctorStats
+from ..models.appointment import Appointment, AppointmentStatus
+from ..models.queue import QueueEntry
+
+logger = logging.getLogger(__name__)
+
+StatsKey = Tuple[int, date]
+
+_DELTAS_KEY = "daily_stats_deltas"
+
+
+def _minutes(start: Optional[datetime], end: Optional[datetime]) -> Optional[float]:
+    if start is None or end is None:
+        return None
+    return (end - start).total_seconds() / 60
+
+
+def appointment_counts(status, start_time: datetime, end_time: datetime) -> Counter:
+    """Counters one appointment contributes to its day's rollup."""
+    counts = Counter()
+    if status is None:
+        return counts
+    status = AppointmentStatus(status)
+    if status == AppointmentStatus.CANCELLED:
+        counts["cancelled"] += 1
+        return counts
+    counts["booked"] += 1
+    counts["booked_minutes"] += int(_minutes(start_time, end_time) or 0)
+    if status == AppointmentStatus.COMPLETED:
+        counts["completed"] += 1
+    elif status == AppointmentStatus.NO_SHOW:
+        counts["no_show"] += 1
+    return counts
+
+
+def queue_counts(check_in_time, called_time, completed_time) -> Counter:
+    """Counters one queue entry contributes to its appointment's day."""
+    counts = Counter(checked_in=1)
+    wait = _minutes(check_in_time, called_time)
+    if wait is not None:
+        counts["called"] += 1
+        counts["wait_minutes_total"] += max(wait, 0.0)
+    if completed_time is not None:
+        counts["served"] += 1
+        service = _minutes(called_time, completed_time)
+        if service is not None:
+            counts["timed_services"] += 1
+            counts["service_minutes_total"] += max(service, 0.0)
+    return counts
+
+
+# Incremental maintenance ----------------------------------------------------
+#
+# Mapper events diff each flushed Appointment/QueueEntry against its
+# previous state and accumulate the change per (doctor, day) on the
+# session; after_flush writes the accumulated deltas as one upsert per
+# rollup row, inside the same transaction as the transition itself.
+
+def _previous(target, attribute: str):
+    """Value of an attribute before the pending change."""
+    history = inspect(target).attrs[attribute].history
+    if history.deleted:
+        return history.deleted[0]
+    # A change with nothing deleted replaced an unset (None) value
+    return None if history.added else getattr(target, attribute)
+
+
+def _record(target, key: Optional[StatsKey], counts: Counter, sign: int) -> None:
+    session = object_session(target)
+    if session is None or key is None or not counts:
+        return
+    deltas = session.info.setdefault(_DELTAS_KEY, defaultdict(Counter))
+    for name, value in counts.items():
+        deltas[key][name] += sign * value
+
+
+def _appointment_state(target, previous: bool) -> Tuple[StatsKey, Counter]:
+    read = _previous if previous else getattr
+    doctor_id = read(target, "doctor_id")
+    start_time = read(target, "appointment_date")
+    return (doctor_id, start_time.date()), appointment_counts(
+        read(target, "status") or AppointmentStatus.SCHEDULED, start_time, read(target, "end_time")
+    )
+
+
+def _queue_key(connection, target) -> Optional[StatsKey]:
+    appointment = target.__dict__.get("appointment")
+    if appointment is not None:
+        return appointment.doctor_id, appointment.appointment_date.date()
+    row = connection.execute(
+        select(Appointment.doctor_id, Appointment.appointment_date).where(
+            Appointment.appointment_id == target.appointment_id
+        )
+    ).first()
+    return (row.doctor_id, row.appointment_date.date()) if row is not None else None
+
+
+def _persisted_queue_counts(connection, appointment_id: int) -> Counter:
+    """Counters of an appointment's queue entry as already written to its day."""
+    row = connection.execute(
+        select(QueueEntry.check_in_time, QueueEntry.called_time, QueueEntry.completed_time).where(
+            QueueEntry.appointment_id == appointment_id
+        )
+    ).first()
+    return queue_counts(*row) if row is not None else Counter()
+
+
+def _queue_state(target, previous: bool) -> Counter:
+    read = _previous if previous else getattr
+    return queue_counts(read(target, "check_in_time"), read(target, "called_time"), read(target, "completed_time"))
+
+
+@event.listens_for(Appointment, "after_insert")
+def _count_new_appointment(mapper, connection, target):
+    _record(target, *_appointment_state(target, previous=False), 1)
+
+
+@event.listens_for(Appointment, "after_update")
+def _count_appointment_change(mapper, connection, target):
+    old_key, old_counts = _appointment_state(target, previous=True)
+    new_key, new_counts = _appointment_state(target, previous=False)
+    _record(target, old_key, old_counts, -1)
+    _record(target, new_key, new_counts, 1)
+    if old_key != new_key:
+        # Queue counters follow the appointment to its new doctor or day.
+        # Appointments flush before their queue entries, so the stored row
+        # is what was counted under the old key; a change to the entry in
+        # this flush is then diffed under the new key.
+        moved = _persisted_queue_counts(connection, target.appointment_id)
+        _record(target, old_key, moved, -1)
+        _record(target, new_key, moved, 1)
+
+
+@event.listens_for(Appointment, "after_delete")
+def _count_deleted_appointment(mapper, connection, target):
+    _record(target, *_appointment_state(target, previous=True), -1)
+
+
+@event.listens_for(QueueEntry, "after_insert")
+def _count_new_queue_entry(mapper, connection, target):
+    _record(target, _queue_key(connection, target), _queue_state(target, previous=False), 1)
+
+
+@event.listens_for(QueueEntry, "after_update")
+def _count_queue_change(mapper, connection, target):
+    key = _queue_key(connection, target)
+    _record(target, key, _queue_state(target, previous=True), -1)
+    _record(target, key, _queue_state(target, previous=False), 1)
+
+
+@event.listens_for(QueueEntry, "after_delete")
+def _count_deleted_queue_entry(mapper, connection, target):
+    _record(target, _queue_key(connection, target), _queue_state(target, previous=True), -1)
+
+
+def _upsert_statement(dialect_name: str, values: dict, increments: list):
+    table = DailyDoctorStats.__table__
+    if dialect_name in ("sqlite", "postgresql"):
+        if dialect_name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        statement = insert(table).values(**values)
+        return statement.on_conflict_do_update(
+            index_elements=[table.c.doctor_id, table.c.day],
+            set_={name: table.c[name] + statement.excluded[name] for name in increments}
+        )
+    if dialect_name == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+
+        statement = insert(table).values(**values)
+        return statement.on_duplicate_key_update(
+            {name: table.c[name] + statement.inserted[name] for name in increments}
+        )
+    return None
+
+
+def apply_deltas(connection, deltas: Dict[StatsKey, Counter]) -> None:
+    """Add counter deltas to rollup rows, creating rows as needed."""
+    table = DailyDoctorStats.__table__
+    for (doctor_id, day), counts in deltas.items():
+        increments = [name for name in DAILY_STAT_COUNTERS if counts.get(name)]
+        if not increments:
+            continue
+        values = {name: counts.get(name, 0) for name in DAILY_STAT_COUNTERS}
+        statement = _upsert_statement(connection.dialect.name, {"doctor_id": doctor_id, "day": day, **values}, increments)
+        if statement is not None:
+            connection.execute(statement)
+            continue
+        # Generic fallback for dialects without an upsert
+        result = connection.execute(
+            update(table)
+            .where(table.c.doctor_id == doctor_id, table.c.day == day)
+            .values({name: table.c[name] + counts[name] for name in increments})
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(doctor_id=doctor_id, day=day, **values))
+
+
+@event.listens_for(Session, "after_flush")
+def _write_daily_stats(session, flush_context):
+    deltas = session.info.pop(_DELTAS_KEY, None)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_daily_stats(session, previous_transaction):
+    session.info.pop(_DELTAS_KEY, None)
+
+
+# Backfill -------------------------------------------------------------------
+
+def rebuild_daily_stats(
+    db: Session,
+    start_day: Optional[date] = None,
+    end_day: Optional[date] = None,
+    chunk_days: Optional[int] = None
+) -> int:
+    """
+    Recompute rollups from appointments and queue entries, chunk_days at a
+    time, each chunk replaced in its own transaction. Defaults to the whole
+    appointment history. Returns the number of rollup rows written.
+
+    Transitions committed while a chunk is being recomputed may be counted
+    twice or not at all for that chunk, so run this while the clinic is
+    quiet.
+    """
+    chunk_days = chunk_days or settings.ANALYTICS_BACKFILL_CHUNK_DAYS
+    if start_day is None or end_day is None:
+        first, last = db.query(func.min(Appointment.appointment_date), func.max(Appointment.appointment_date)).one()
+        db.rollback()
+        if first is None:
+            return 0
+        start_day = start_day or first.date()
+        end_day = end_day or last.date()
+
+    written = 0
+    chunk_start = start_day
+    while chunk_start <= end_day:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end_day)
+        written += _rebuild_chunk(db, chunk_start, chunk_end)
+        logger.info("rebuilt daily stats for %s..%s", chunk_start, chunk_end)
+        chunk_start = chunk_end + timedelta(days=1)
+    return written
+
+
+def _recompute(db: Session, first_day: date, last_day: date) -> Dict[StatsKey, Counter]:
+    """Rollup counters for first_day..last_day computed from appointments and queue entries."""
+    range_start = datetime.combine(first_day, datetime.min.time())
+    range_end = datetime.combine(last_day + timedelta(days=1), datetime.min.time())
+    rows = db.execute(
+        select(
+            Appointment.doctor_id,
+            Appointment.appointment_date,
+            Appointment.end_time,
+            Appointment.status,
+            QueueEntry.queue_id,
+            QueueEntry.check_in_time,
+            QueueEntry.called_time,
+            QueueEntry.completed_time,
+        )
+        .outerjoin(QueueEntry, QueueEntry.appointment_id == Appointment.appointment_id)
+        .where(Appointment.appointment_date >= range_start, Appointment.appointment_date < range_end)
+        .execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+    )
+    totals: Dict[StatsKey, Counter] = defaultdict(Counter)
+    for row in rows:
+        key = (row.doctor_id, row.appointment_date.date())
+        totals[key].update(appointment_counts(row.status or AppointmentStatus.SCHEDULED, row.appointment_date, row.end_time))
+        if row.queue_id is not None:
+            totals[key].update(queue_counts(row.check_in_time, row.called_time, row.completed_time))
+    return totals
+
+
+def _rebuild_chunk(db: Session, first_day: date, last_day: date) -> int:
+    totals = _recompute(db, first_day, last_day)
+    db.query(DailyDoctorStats).filter(
+        DailyDoctorStats.day >= first_day, DailyDoctorStats.day <= last_day
+    ).delete(synchronize_session=False)
+    if totals:
+        db.execute(DailyDoctorStats.__table__.insert(), [
+            {"doctor_id": doctor_id, "day": day, **{name: counts.get(name, 0) for name in DAILY_STAT_COUNTERS}}
+            for (doctor_id, day), counts in totals.items()
+        ])
+    db.commit()
+    return len(totals)
+
+
+def verify_daily_stats(
+    db: Session,
+    start_day: Optional[date] = None,
+    end_day: Optional[date] = None
+) -> Dict[StatsKey, Dict[str, Tuple[float, float]]]:
+    """
+    Compare the incrementally maintained rollups with a rebuild, without
+    writing. Returns {(doctor_id, day): {counter: (stored, rebuilt)}} for
+    every counter that differs; empty when they agree. Defaults to the
+    whole appointment history.
+    """
+    if start_day is None or end_day is None:
+        first, last = db.query(func.min(Appointment.appointment_date), func.max(Appointment.appointment_date)).one()
+        if first is None:
+            first = last = datetime.utcnow()
+        start_day = start_day or first.date()
+        end_day = end_day or last.date()
+    expected = _recompute(db, start_day, end_day)
+    stored = {
+        (row.doctor_id, row.day): row
+        for row in db.query(DailyDoctorStats).filter(
+            DailyDoctorStats.day >= start_day, DailyDoctorStats.day <= end_day
+        )
+    }
+    mismatches = {}
+    for key in set(expected) | set(stored):
+        row = stored.get(key)
+        differences = {}
+        for name in DAILY_STAT_COUNTERS:
+            actual = getattr(row, name) if row is not None else 0
+            wanted = expected.get(key, Counter()).get(name, 0)
+            # Float totals summed in another order can differ in the last bits
+            if abs(actual - wanted) > 1e-6:
+                differences[name] = (actual, wanted)
+        if differences:
+            mismatches[key] = differences
+    return mismatches
+
+
+def backfill_daily_stats(db: Session) -> None:
+    """Build rollups once for databases created before the rollup table."""
+    has_stats = db.query(DailyDoctorStats.doctor_id).first() is not None
+    has_appointments = db.query(Appointment.appointment_id).first() is not None
+    if has_appointments and not has_stats:
+        rebuild_daily_stats(db)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuild daily analytics rollups from appointment history.")
+    parser.add_argument("--start", type=date.fromisoformat, help="first day to rebuild (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="last day to rebuild (YYYY-MM-DD)")
+    parser.add_argument("--chunk-days", type=int, default=settings.ANALYTICS_BACKFILL_CHUNK_DAYS)
+    parser.add_argument(
+        "--verify", action="store_true",
+        help="compare the stored rollups with a rebuild instead of writing; exit 1 on any difference"
+    )
+    args = parser.parse_args(argv)
+
+    from .database import SessionLocal, engine
+    from .migrations import check_schema
+
+    logging.basicConfig(level=logging.INFO)
+    check_schema(engine)
+    db = SessionLocal()
+    try:
+        if args.verify:
+            mismatches = verify_daily_stats(db, args.start, args.end)
+        else:
+            written = rebuild_daily_stats(db, args.start, args.end, args.chunk_days)
+    finally:
+        db.close()
+    if not args.verify:
+        print(f"wrote {written} daily rollup rows")
+        return
+    for (doctor_id, day), differences in sorted(mismatches.items()):
+        details = ", ".join(f"{name} stored {stored} rebuilt {rebuilt}" for name, (stored, rebuilt) in differences.items())
+        print(f"doctor {doctor_id} {day}: {details}")
+    if mismatches:
+        sys.exit(f"{len(mismatches)} daily rollup rows differ from a rebuild")
+    print("daily rollups match a rebuild")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional
+
+
+class TTLCache:
+    """
+    Bounded, thread-safe LRU cache whose entries expire after a fixed TTL.
+
+    Tracks hit, miss and eviction counters so cache effectiveness can be
+    inspected at runtime via stats().
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired."""
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            value, expires_at = item
+            if expires_at <= now:
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store value under key, evicting the least recently used entry if full."""
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """Return counters describing cache effectiveness."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class SharedTTLCache(TTLCache):
+    """
+    TTLCache whose invalidations reach every worker.
+
+    Entries stay local to each process, but invalidate() and clear() are
+    also published on the shared state's cache:<name> channel, and every
+    worker holding entries applies them and runs the on_invalidate
+    listeners. Keys passed to invalidate() must be JSON-serializable.
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 60.0):
+        super().__init__(maxsize, ttl)
+        self.name = name
+        self._listeners: List[Callable[[dict], None]] = []
+        self._subscribed = False
+
+    @property
+    def channel(self) -> str:
+        return f"cache:{self.name}"
+
+    def on_invalidate(self, listener: Callable[[dict], None]) -> Callable[[dict], None]:
+        """Call listener with each invalidation message, local or remote. Usable as a decorator."""
+        self._listeners.append(listener)
+        return listener
+
+    def _subscribe(self) -> None:
+        # Deferred to first use so importing a module never connects to the shared state
+        if self._subscribed:
+            return
+        from .shared_state import shared_state
+
+        with self._lock:
+            if self._subscribed:
+                return
+            self._subscribed = True
+        shared_state.subscribe(self.channel, self._apply)
+        shared_state.on_reset(lambda: self._apply({}))
+
+    def _apply(self, message: dict) -> None:
+        if "key" in message:
+            super().invalidate(message["key"])
+        else:
+            super().clear()
+        for listener in self._listeners:
+            listener(message)
+
+    def _publish(self, message: dict) -> None:
+        from .shared_state import shared_state
+
+        self._subscribe()
+        # Applied here first so this worker never serves the old entry,
+        # then again on receipt of its own message, which is harmless
+        self._apply(message)
+        shared_state.publish(self.channel, message)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._subscribe()
+        super().set(key, value)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry in every worker."""
+        self._publish({"key": key})
+
+    def clear(self, **details) -> None:
+        """Drop all entries in every worker; details are passed to the on_invalidate listeners."""
+        self._publish(details)
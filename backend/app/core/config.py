@@ -8,17 +8,120 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite:///./clinic.db"
+    # Optional asyncio URL; derived from DATABASE_URL when empty
+    ASYNC_DATABASE_URL: str = ""
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    
+    # SQLite production profile (WAL, pragmas, single writer)
+    SQLITE_PRODUCTION_MODE: bool = True
+    # Queue writers on an in-process lock as well as SQLite's WAL write lock
+    SQLITE_SERIALIZE_WRITES: bool = False
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    
+    # Schema migrations (python -m app.migrate)
+    # How migrations add indexes: auto, concurrent, batched or blocking
+    MIGRATION_INDEX_MODE: str = "auto"
+    # Pause after each index in batched mode so queued writers get the lock
+    MIGRATION_BATCH_PAUSE_SECONDS: float = 1.0
     
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+    TOKEN_REVOCATION_SYNC_SECONDS: int = 5
+    
+    # Principal cache (authenticated users resolved from tokens)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 1024
+    
+    # Password hashing (bcrypt cost factor and dedicated worker pool)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 2
+    
+    # Scheduling
+    SLOT_GRANULARITY_MINUTES: int = 5
+    CLINIC_OPEN_HOUR: int = 9
+    CLINIC_CLOSE_HOUR: int = 17
+    AVAILABILITY_MAX_DAYS: int = 31
+    
+    # List endpoints (offset and cursor pagination)
+    PAGE_MAX_LIMIT: int = 1000
+    
+    # Queue wait estimates
+    SERVICE_TIME_EWMA_ALPHA: float = 0.2
+    SERVICE_TIME_MIN_SAMPLES: int = 5
+    SERVICE_TIME_MAX_MINUTES: int = 240
+    SERVICE_TIME_HISTORY_LIMIT: int = 5000
+    
+    # Notifications (outbox dispatcher)
+    NOTIFICATIONS_ENABLED: bool = True
+    NOTIFICATION_ADAPTER: str = "log"
+    NOTIFICATION_DEFAULT_CHANNEL: str = "sms"
+    NOTIFICATION_BATCH_SIZE: int = 50
+    NOTIFICATION_CONCURRENCY: int = 10
+    NOTIFICATION_MAX_ATTEMPTS: int = 5
+    NOTIFICATION_RETRY_BASE_SECONDS: float = 2.0
+    NOTIFICATION_POLL_SECONDS: float = 5.0
+    # Sends per second per channel, e.g. "sms:5,email:20"
+    NOTIFICATION_RATE_LIMITS: str = "sms:5,email:20,whatsapp:5"
+    # How long a worker's claim on a row it is sending keeps other workers off it
+    NOTIFICATION_CLAIM_SECONDS: int = 300
+    
+    # Appointment reminders
+    REMINDERS_ENABLED: bool = True
+    REMINDER_HORIZON_HOURS: int = 24
+    REMINDER_RESCAN_MINUTES: int = 60
+    
+    # HTTP caching of public reads
+    DOCTOR_CACHE_MAX_AGE_SECONDS: int = 60
+    RESPONSE_CACHE_TTL_SECONDS: int = 300
+    RESPONSE_CACHE_MAX_SIZE: int = 256
+    
+    # Instrumentation
+    SLOW_REQUEST_THRESHOLD_MS: int = 500
+    
+    # Bulk appointment import
+    IMPORT_MAX_ROWS: int = 50000
+    IMPORT_CHUNK_SIZE: int = 500
+    
+    # Streaming exports
+    EXPORT_BATCH_SIZE: int = 1000
+    
+    # Daily analytics rollups
+    ANALYTICS_MAX_DAYS: int = 366
+    ANALYTICS_BACKFILL_CHUNK_DAYS: int = 31
+    
+    # Patient search
+    PATIENT_SEARCH_MAX_RESULTS: int = 50
+    PATIENT_SEARCH_MIN_SIMILARITY: float = 0.3
+    PATIENT_SEARCH_SYNC_SECONDS: int = 5
     
     # Application
     APP_NAME: str = "Doctor Appointment System"
     APP_VERSION: str = "1.0.0"
     DEBUG: bool = False
     
+    # State shared by workers: queue locks and events, cache invalidation, rate limits
+    # memory:// keeps it in-process (one worker); redis://host:6379/0 for several
+    SHARED_STATE_URL: str = "memory://"
+    SHARED_STATE_PREFIX: str = "clinic:"
+    SHARED_LOCK_TIMEOUT_SECONDS: float = 10.0
+    
+    # Cold start
+    STARTUP_PROFILE: bool = False
+    LAZY_ROUTERS: bool = True
+    # Written by `python -m app.core.openapi` at build time; generated on first use if empty
+    OPENAPI_SCHEMA_PATH: str = ""
+    
     # CORS - Default includes GitHub Pages and localhost
     CORS_ORIGINS: str = "https://luciansans.github.io,http://localhost:3000,http://localhost:8080"
     
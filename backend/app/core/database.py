@@ -1,21 +1,204 @@
-from sqlalchemy import create_engine
+import sqlite3
+import threading
+import time
+from sqlalchemy import create_engine, event, exc
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from .config import settings
+from .instrumentation import instrument_engine
+from .metrics import registry
+
+pool_checkout_wait = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting to check a connection out of the pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+)
+pool_checkout_timeouts = registry.counter(
+    "db_pool_checkout_timeouts_total",
+    "Pool checkouts that gave up after DB_POOL_TIMEOUT"
+)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            pool_checkout_timeouts.inc()
+            raise
+        finally:
+            pool_checkout_wait.observe(time.perf_counter() - start, engine="sync")
+
+
+def _is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return _is_sqlite(url) and (":memory:" in url or "mode=memory" in url or url.rstrip("/") in ("sqlite:", "sqlite+pysqlite:"))
+
+
+def pool_options(url: str) -> dict:
+    """Pool configuration from settings; in-memory SQLite keeps its default pool."""
+    if _is_memory_sqlite(url):
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def _is_write(statement: str, context) -> bool:
+    if context is not None and (context.isinsert or context.isupdate or context.isdelete or context.isddl):
+        return True
+    verb = statement.lstrip()[:7].upper()
+    return verb.startswith(("INSERT", "UPDATE", "DELETE", "REPLACE", "CREATE", "DROP", "ALTER"))
+
+
+def serialized_writer_connection_class():
+    """
+    Build a sqlite3.Connection subclass whose connections share one writer lock.
+    
+    The lock is taken by the engine before the first write of a transaction
+    and released only after the DBAPI commit or rollback has completed, so
+    the next writer never races the previous commit into SQLite's busy
+    handler.
+    
+    Ownership belongs to the connection, not the thread: a connection may
+    commit on a different pool thread than the one that first wrote through
+    it, and a pool thread reused by another request does not inherit the
+    lock. Keep to one writing session per thread and commit its writes
+    before writing through another; a second writer in the same thread
+    waits out the busy timeout and fails with "database is locked", just as
+    SQLite itself would.
+    """
+    writer_lock = threading.Lock()
+    
+    class SerializedWriterConnection(sqlite3.Connection):
+        holds_writer = False
+        
+        def acquire_writer(self):
+            if not self.holds_writer:
+                if not writer_lock.acquire(timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000):
+                    raise sqlite3.OperationalError("database is locked")
+                self.holds_writer = True
+        
+        def release_writer(self):
+            if self.holds_writer:
+                self.holds_writer = False
+                writer_lock.release()
+        
+        def commit(self):
+            try:
+                super().commit()
+            finally:
+                self.release_writer()
+        
+        def rollback(self):
+            try:
+                super().rollback()
+            finally:
+                self.release_writer()
+        
+        def close(self):
+            self.release_writer()
+            super().close()
+    
+    return SerializedWriterConnection
+
+
+def sqlite_connect_args(serialize_writes: bool = True) -> dict:
+    """connect_args for a file-backed SQLite engine."""
+    connect_args = {"check_same_thread": False}
+    if serialize_writes:
+        connect_args["factory"] = serialized_writer_connection_class()
+    return connect_args
+
+
+def configure_sqlite(target_engine) -> None:
+    """
+    Apply the SQLite production profile to an engine.
+    
+    Every new connection gets WAL journaling, synchronous=NORMAL, a busy
+    timeout and larger mmap/page caches. In WAL mode readers never block and
+    are never blocked by the single writer; concurrent writers queue on
+    SQLite's write lock for up to the busy timeout instead of failing with
+    "database is locked".
+    
+    If the engine was created with sqlite_connect_args(serialize_writes=True),
+    writers additionally queue on an in-process lock before touching SQLite.
+    """
+    @event.listens_for(target_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        # Negative cache_size is in KiB rather than pages
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+    
+    @event.listens_for(target_engine, "before_cursor_execute")
+    def _acquire_writer(conn, cursor, statement, parameters, context, executemany):
+        dbapi_connection = conn.connection.dbapi_connection
+        if hasattr(dbapi_connection, "acquire_writer") and _is_write(statement, context):
+            dbapi_connection.acquire_writer()
+
 
 # Create database engine
+_engine_options = pool_options(settings.DATABASE_URL)
+if _engine_options:
+    _engine_options["poolclass"] = TimedQueuePool
+
+_sqlite_production = (
+    settings.SQLITE_PRODUCTION_MODE
+    and _is_sqlite(settings.DATABASE_URL)
+    and not _is_memory_sqlite(settings.DATABASE_URL)
+)
+if _sqlite_production:
+    _connect_args = sqlite_connect_args(serialize_writes=settings.SQLITE_SERIALIZE_WRITES)
+elif "sqlite" in settings.DATABASE_URL:
+    _connect_args = {"check_same_thread": False}
+else:
+    _connect_args = {}
+
 engine = create_engine(
     settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
-    echo=settings.DEBUG
+    connect_args=_connect_args,
+    echo=settings.DEBUG,
+    **_engine_options
 )
 
+if _sqlite_production:
+    configure_sqlite(engine)
+instrument_engine(engine)
+
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Base class for models
 Base = declarative_base()
 
+registry.gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    callback=lambda: engine.pool.checkedout() if hasattr(engine.pool, "checkedout") else 0
+)
+registry.gauge(
+    "db_pool_overflow",
+    "Connections open beyond pool_size",
+    callback=lambda: max(engine.pool.overflow(), 0) if hasattr(engine.pool, "overflow") else 0
+)
+
 
 def get_db():
     """
@@ -29,6 +212,63 @@ def get_db():
         db.close()
 
 
-def init_db():
-    """Initialize database tables."""
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+def async_database_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto its asyncio driver."""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    if url.startswith(("postgresql:", "postgres:", "postgresql+psycopg2:")):
+        return "postgresql+asyncpg:" + url.split(":", 1)[1]
+    if url.startswith(("mysql:", "mysql+pymysql:")):
+        return "mysql+aiomysql:" + url.split(":", 1)[1]
+    return url
+
+
+_async_engine = None
+_AsyncSessionLocal = None
+
+
+def get_async_engine():
+    """
+    Create the asyncio engine on first use.
+
+    Requires the async driver for the configured database (aiosqlite,
+    asyncpg or aiomysql) to be installed.
+    """
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+        url = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+        options = pool_options(url)
+        if options:
+            # Some async dialects default to NullPool; pool explicitly
+            options["poolclass"] = AsyncAdaptedQueuePool
+        _async_engine = create_async_engine(url, echo=settings.DEBUG, **options)
+        instrument_engine(_async_engine.sync_engine)
+        _AsyncSessionLocal = async_sessionmaker(
+            _async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+    return _async_engine
+
+
+async def get_async_db():
+    """
+    Dependency function to get an async database session for `async def`
+    handlers. Ensures proper cleanup after request.
+    """
+    get_async_engine()
+    start = time.perf_counter()
+    async with _AsyncSessionLocal() as db:
+        # Force the connection checkout up front so its wait is measured
+        await db.connection()
+        pool_checkout_wait.observe(time.perf_counter() - start, engine="async")
+        yield db
+
+
+async def dispose_async_engine():
+    """Close pooled async connections, if the async engine was ever created."""
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _AsyncSessionLocal = None
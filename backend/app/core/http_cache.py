@@ -0,0 +1,81 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import NamedTuple, Optional
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+
+class CachedResponse(NamedTuple):
+    """A serialized JSON body together with its validators."""
+    body: bytes
+    etag: str
+    last_modified: Optional[datetime]
+
+
+def compute_etag(*parts) -> str:
+    """Strong ETag over the values that determine a response body."""
+    digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+
+def http_date(value: datetime) -> str:
+    """Format a naive UTC datetime as an HTTP-date."""
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """
+    Evaluate If-None-Match / If-Modified-Since against the current validators.
+
+    If-None-Match takes precedence when both are sent (RFC 9110 13.2.2).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        # Weak comparison: W/"x" matches "x"
+        return "*" in candidates or any(
+            (tag[2:] if tag.startswith("W/") else tag) == etag for tag in candidates
+        )
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # HTTP dates have one-second resolution
+        return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+    return False
+
+
+def json_body(content) -> bytes:
+    """Serialize content exactly as FastAPI's default JSONResponse would."""
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _validator_headers(etag: str, last_modified: Optional[datetime], cache_control: str) -> dict:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def not_modified_response(etag: str, last_modified: Optional[datetime], cache_control: str) -> Response:
+    return Response(status_code=304, headers=_validator_headers(etag, last_modified, cache_control))
+
+
+def conditional_response(request: Request, cached: CachedResponse, cache_control: str) -> Response:
+    """Return 304 if the client's copy is current, otherwise the cached body."""
+    if is_not_modified(request, cached.etag, cached.last_modified):
+        return not_modified_response(cached.etag, cached.last_modified, cache_control)
+    return Response(
+        content=cached.body,
+        media_type="application/json",
+        headers=_validator_headers(cached.etag, cached.last_modified, cache_control)
+    )
@@ -0,0 +1,183 @@
+import logging
+import time
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+from sqlalchemy import event
+from .config import settings
+from .metrics import registry
+from .startup import startup_profile
+
+logger = logging.getLogger(__name__)
+
+http_requests = registry.counter(
+    "http_requests_total",
+    "HTTP requests by method, route template and status code"
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method and route template"
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being handled"
+)
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds",
+    "Duration of individual SQL statements",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+)
+db_queries_per_request = registry.histogram(
+    "db_queries_per_request",
+    "SQL statements executed per HTTP request",
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+)
+db_time_per_request = registry.histogram(
+    "db_time_per_request_seconds",
+    "Total SQL time per HTTP request"
+)
+
+# Slowest statements kept per request for the slow-request log
+SLOW_LOG_TOP_QUERIES = 5
+SLOW_LOG_STATEMENT_CHARS = 200
+
+
+class RequestStats:
+    """SQL activity attributed to one HTTP request."""
+
+    __slots__ = ("query_count", "query_seconds", "slowest")
+
+    def __init__(self):
+        self.query_count = 0
+        self.query_seconds = 0.0
+        self.slowest: List[Tuple[float, str]] = []
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.query_count += 1
+        self.query_seconds += seconds
+        if len(self.slowest) < SLOW_LOG_TOP_QUERIES or seconds > self.slowest[-1][0]:
+            self.slowest.append((seconds, statement))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[SLOW_LOG_TOP_QUERIES:]
+
+
+# The object is shared with threadpool workers, which run in a copy of the
+# request's context, so their queries are attributed to the request too
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+def instrument_engine(target_engine) -> None:
+    """Time every statement on an engine and attribute it to the current request."""
+    @event.listens_for(target_engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_times", []).append(time.perf_counter())
+
+    @event.listens_for(target_engine, "after_cursor_execute")
+    def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_times"].pop()
+        db_query_duration.observe(elapsed)
+        stats = current_request_stats.get()
+        if stats is not None:
+            stats.record(statement, elapsed)
+
+    @event.listens_for(target_engine, "handle_error")
+    def _discard_timer(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_start_times"):
+            connection.info["query_start_times"].pop()
+
+
+_thread_limiter = None
+
+
+def bind_threadpool_limiter() -> None:
+    """
+    Capture the threadpool capacity limiter used for sync endpoints and
+    dependencies. Must be called from the event loop (an async startup hook).
+    """
+    global _thread_limiter
+    from anyio.to_thread import current_default_thread_limiter
+
+    _thread_limiter = current_default_thread_limiter()
+
+
+registry.gauge(
+    "threadpool_threads_busy",
+    "Threadpool workers running sync endpoints or dependencies",
+    callback=lambda: _thread_limiter.borrowed_tokens if _thread_limiter is not None else 0
+)
+registry.gauge(
+    "threadpool_threads_total",
+    "Threadpool capacity for sync endpoints and dependencies",
+    callback=lambda: _thread_limiter.total_tokens if _thread_limiter is not None else 0
+)
+registry.gauge(
+    "threadpool_tasks_waiting",
+    "Sync calls queued because every threadpool worker is busy",
+    callback=lambda: _thread_limiter.statistics().tasks_waiting if _thread_limiter is not None else 0
+)
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency, status codes, in-flight
+    requests and per-request SQL counts/time.
+
+    Routes are labelled by their path template (e.g. /api/doctors/{doctor_id})
+    so label cardinality stays bounded. Requests slower than
+    SLOW_REQUEST_THRESHOLD_MS are logged with their slowest statements.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            current_request_stats.reset(token)
+            self._record(scope, status_code, elapsed, stats)
+            startup_profile.request_finished(elapsed)
+
+    @staticmethod
+    def _record(scope, status_code: int, elapsed: float, stats: RequestStats) -> None:
+        route = scope.get("route")
+        template = getattr(route, "path", None) or "unmatched"
+        method = scope["method"]
+
+        http_requests.inc(method=method, route=template, status=status_code)
+        http_request_duration.observe(elapsed, method=method, route=template)
+        db_queries_per_request.observe(stats.query_count, route=template)
+        db_time_per_request.observe(stats.query_seconds, route=template)
+
+        if elapsed * 1000 >= settings.SLOW_REQUEST_THRESHOLD_MS:
+            logger.warning(
+                "slow request %s %s -> %s in %.1fms (%d queries, %.1fms in SQL)%s",
+                method,
+                template,
+                status_code,
+                elapsed * 1000,
+                stats.query_count,
+                stats.query_seconds * 1000,
+                "".join(
+                    "\n  %.1fms %s" % (seconds * 1000, " ".join(statement.split())[:SLOW_LOG_STATEMENT_CHARS])
+                    for seconds, statement in stats.slowest
+                )
+            )
@@ -0,0 +1,107 @@
+import time
+from typing import List, Optional
+import sqlalchemy as sa
+from alembic import op
+from .config import settings
+from .migrations import INDEX_MODES
+
+
+def index_mode() -> str:
+    """How the running migration adds indexes, with "auto" resolved for the dialect."""
+    context = op.get_context()
+    mode = context.config.attributes.get("index_mode") if context.config else None
+    mode = mode or settings.MIGRATION_INDEX_MODE
+    if mode not in INDEX_MODES:
+        raise ValueError(f"Unknown index mode {mode!r}; expected one of {', '.join(INDEX_MODES)}")
+    if mode == "auto":
+        return "concurrent" if context.dialect.name in ("postgresql", "mysql") else "batched"
+    return mode
+
+
+def _index_valid(name: str, table: str) -> Optional[bool]:
+    """None if the index does not exist, otherwise whether it is usable."""
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        return bind.execute(
+            sa.text(
+                "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE c.relname = :name"
+            ),
+            {"name": name}
+        ).scalar()
+    names = {index["name"] for index in sa.inspect(bind).get_indexes(table)}
+    return True if name in names else None
+
+
+def _has_rows(table: str) -> bool:
+    return op.get_bind().execute(sa.select(sa.literal(1)).select_from(sa.table(table)).limit(1)).first() is not None
+
+
+def create_index(name: str, table: str, columns: List[str], where: Optional[str] = None, unique: bool = False) -> None:
+    """
+    Add an index from a migration without holding bookings up for the build.
+
+    Modes (MIGRATION_INDEX_MODE, or `migrate upgrade --index-mode`):
+
+        concurrent  Postgres CREATE INDEX CONCURRENTLY, MySQL online DDL
+                    (LOCK=NONE); writes continue while the index builds
+        batched     each index committed on its own, followed by a pause,
+                    so queued writers get in between builds; SQLite holds
+                    its write lock for one index at a time, not the whole
+                    migration
+        blocking    plain CREATE INDEX in the migration's transaction
+
+    "auto" is concurrent on Postgres and MySQL and batched elsewhere. `where`
+    makes a partial index on Postgres and SQLite; MySQL gets a plain one.
+    Existing indexes are skipped, and an invalid index left behind by a
+    failed concurrent build is dropped and rebuilt.
+    """
+    context = op.get_context()
+    dialect = context.dialect.name
+    mode = index_mode()
+    options = {}
+    if where is not None:
+        options = {"sqlite_where": sa.text(where), "postgresql_where": sa.text(where)}
+
+    if context.as_sql:
+        # Offline SQL cannot look at the database; let it skip existing indexes
+        options["if_not_exists"] = dialect != "mysql"
+    else:
+        valid = _index_valid(name, table)
+        if valid:
+            return
+        if valid is False:
+            with context.autocommit_block():
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+    if mode == "blocking":
+        op.create_index(name, table, columns, unique=unique, **options)
+        return
+    with context.autocommit_block():
+        if dialect == "mysql" and mode == "concurrent":
+            op.execute(
+                f"CREATE {'UNIQUE ' if unique else ''}INDEX {name} ON {table} "
+                f"({', '.join(columns)}) ALGORITHM=INPLACE LOCK=NONE"
+            )
+        else:
+            op.create_index(
+                name, table, columns, unique=unique,
+                postgresql_concurrently=mode == "concurrent", **options
+            )
+    # Nobody is waiting on an empty table, e.g. while building a fresh database
+    if mode == "batched" and not context.as_sql and _has_rows(table):
+        time.sleep(settings.MIGRATION_BATCH_PAUSE_SECONDS)
+
+
+def drop_index(name: str, table: str) -> None:
+    """Drop an index from a migration, concurrently where the mode allows it."""
+    context = op.get_context()
+    mode = index_mode()
+    options = {"if_exists": True} if context.as_sql else {}
+    if not context.as_sql and _index_valid(name, table) is None:
+        return
+    if mode == "blocking":
+        op.drop_index(name, table_name=table, **options)
+        return
+    with context.autocommit_block():
+        op.drop_index(name, table_name=table, postgresql_concurrently=mode == "concurrent", **options)
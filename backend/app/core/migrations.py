@@ -0,0 +1,163 @@
+import argparse
+import ast
+import logging
+import sys
+from pathlib import Path
+from typing import Optional
+import sqlalchemy as sa
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+# Schema that create_all built before migrations; see the revision's docstring
+BASELINE_REVISION = "5a1d0c3e8f27"
+BASELINE_TABLES = ("doctors", "patients", "users", "appointments", "notifications", "queue_entries")
+INDEX_MODES = ("auto", "concurrent", "batched", "blocking")
+
+
+class SchemaVersionError(RuntimeError):
+    """The database is not at the revision this build expects."""
+
+
+def alembic_config(index_mode: Optional[str] = None):
+    """Alembic config for backend/migrations, independent of the working directory."""
+    from alembic.config import Config
+
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    # Callers configure logging themselves; env.py must not replace it
+    config.attributes["configure_logging"] = False
+    if index_mode:
+        config.attributes["index_mode"] = index_mode
+    return config
+
+
+def _revision_ids(path: Path) -> dict:
+    values = {}
+    for node in ast.parse(path.read_text()).body:
+        if (
+            isinstance(node, ast.Assign)
+            and len(node.targets) == 1
+            and isinstance(node.targets[0], ast.Name)
+            and node.targets[0].id in ("revision", "down_revision")
+        ):
+            values[node.targets[0].id] = ast.literal_eval(node.value)
+    return values
+
+
+def head_revision() -> str:
+    """
+    The newest revision in migrations/versions.
+
+    Read from the revision files' `revision`/`down_revision` assignments, so
+    the startup check does not import Alembic; Alembic only resolves the
+    head itself when the history has branches.
+    """
+    revisions, parents = set(), set()
+    for path in (BACKEND_DIR / "migrations" / "versions").glob("*.py"):
+        ids = _revision_ids(path)
+        if "revision" not in ids:
+            continue
+        revisions.add(ids["revision"])
+        down = ids.get("down_revision")
+        parents.update(down if isinstance(down, (tuple, list)) else [down] if down else [])
+    heads = revisions - parents
+    if len(heads) == 1:
+        return heads.pop()
+    from alembic.script import ScriptDirectory
+
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def current_revision(engine) -> Optional[str]:
+    with engine.connect() as connection:
+        if not sa.inspect(connection).has_table("alembic_version"):
+            return None
+        return connection.execute(sa.text("SELECT version_num FROM alembic_version")).scalar()
+
+
+def check_schema(engine) -> str:
+    """
+    Raise SchemaVersionError unless the database is at the head revision.
+
+    Only reads alembic_version, so it is cheap enough for every worker boot;
+    schema changes are applied by `python -m app.migrate upgrade`.
+    """
+    head = head_revision()
+    current = current_revision(engine)
+    if current != head:
+        raise SchemaVersionError(
+            f"Database schema is at {current or 'no revision'} but this build expects {head}; "
+            "run `python -m app.migrate upgrade`"
+        )
+    return current
+
+
+def upgrade(engine, revision: str = "head", index_mode: Optional[str] = None) -> None:
+    """
+    Migrate the database to `revision`, adopting a pre-migrations schema first.
+
+    A database without alembic_version that has every baseline table is
+    stamped at the baseline; tables added since then are created by the
+    later revisions. One with only some of them is refused rather than
+    guessed at.
+    """
+    from alembic import command
+
+    config = alembic_config(index_mode)
+    if current_revision(engine) is None:
+        inspector = sa.inspect(engine)
+        existing = [table for table in BASELINE_TABLES if inspector.has_table(table)]
+        if len(existing) == len(BASELINE_TABLES):
+            logger.info("existing schema without a revision; stamping baseline %s", BASELINE_REVISION)
+            command.stamp(config, BASELINE_REVISION)
+        elif existing:
+            missing = ", ".join(sorted(set(BASELINE_TABLES) - set(existing)))
+            raise SchemaVersionError(
+                f"Database has no revision and only part of the baseline schema (missing: {missing}); "
+                "restore the missing tables or migrate an empty database"
+            )
+    command.upgrade(config, revision)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.migrate", description="Manage the database schema.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = commands.add_parser("upgrade", help="migrate to a revision (default: head)")
+    upgrade_parser.add_argument("revision", nargs="?", default="head")
+    upgrade_parser.add_argument("--index-mode", choices=INDEX_MODES, help="override MIGRATION_INDEX_MODE")
+    upgrade_parser.add_argument("--sql", action="store_true", help="print the SQL instead of running it")
+    downgrade_parser = commands.add_parser("downgrade", help="migrate back to a revision")
+    downgrade_parser.add_argument("revision")
+    downgrade_parser.add_argument("--index-mode", choices=INDEX_MODES, help="override MIGRATION_INDEX_MODE")
+    commands.add_parser("current", help="print the database's revision")
+    commands.add_parser("check", help="exit non-zero unless the database is at head")
+    commands.add_parser("history", help="list revisions")
+    args = parser.parse_args(argv)
+
+    from alembic import command
+    from .database import engine
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    if args.command == "upgrade" and args.sql:
+        command.upgrade(alembic_config(args.index_mode), args.revision, sql=True)
+    elif args.command == "upgrade":
+        try:
+            upgrade(engine, args.revision, args.index_mode)
+        except SchemaVersionError as error:
+            sys.exit(str(error))
+    elif args.command == "downgrade":
+        command.downgrade(alembic_config(args.index_mode), args.revision)
+    elif args.command == "current":
+        print(current_revision(engine) or "none")
+    elif args.command == "check":
+        try:
+            print(check_schema(engine))
+        except SchemaVersionError as error:
+            sys.exit(str(error))
+    else:
+        command.history(alembic_config())
+
+
+if __name__ == "__main__":
+    main()
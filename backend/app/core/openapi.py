@@ -0,0 +1,57 @@
+import argparse
+import json
+import logging
+import os
+from fastapi import FastAPI
+from .config import settings
+from .routing import load_lazy_routers
+
+logger = logging.getLogger(__name__)
+
+
+def install_openapi(app: FastAPI) -> None:
+    """
+    Serve the OpenAPI document precompiled at build time when
+    OPENAPI_SCHEMA_PATH points at one; otherwise generate it on first use,
+    after importing any routers that are still lazy.
+    """
+    generate = app.openapi
+
+    def openapi() -> dict:
+        if app.openapi_schema is None:
+            path = settings.OPENAPI_SCHEMA_PATH
+            if path and os.path.exists(path):
+                with open(path, encoding="utf-8") as schema_file:
+                    app.openapi_schema = json.load(schema_file)
+            else:
+                if path:
+                    logger.warning("OpenAPI document %s not found; generating it", path)
+                load_lazy_routers(app)
+                generate()
+        return app.openapi_schema
+
+    app.openapi = openapi
+
+
+def build(output: str) -> None:
+    """Generate the OpenAPI document from the app and write it to `output`."""
+    from ..main import app
+
+    load_lazy_routers(app)
+    # FastAPI's generator rather than install_openapi's wrapper, which would
+    # read back the previous build's file
+    schema = FastAPI.openapi(app)
+    with open(output, "w", encoding="utf-8") as schema_file:
+        json.dump(schema, schema_file, separators=(",", ":"))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Precompile the OpenAPI document at build time.")
+    parser.add_argument("--output", default=settings.OPENAPI_SCHEMA_PATH or "openapi.json")
+    args = parser.parse_args(argv)
+    build(args.output)
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+# Integer keys beyond a signed 64-bit column cannot be bound as parameters
+_MAX_INTEGER = 2 ** 63
+
+
+def _decode_value(value: Any, column: Any) -> Any:
+    """Convert one cursor value for its order column, rejecting any other shape."""
+    python_type = column.type.python_type
+    if python_type is datetime:
+        if not isinstance(value, dict) or list(value) != ["dt"] or not isinstance(value["dt"], str):
+            raise InvalidCursor("Malformed cursor")
+        decoded = datetime.fromisoformat(value["dt"])
+        # Keys are naive UTC, as encode_cursor writes them
+        if decoded.tzinfo is not None:
+            raise InvalidCursor("Malformed cursor")
+        return decoded
+    if python_type is int and type(value) is int and -_MAX_INTEGER <= value < _MAX_INTEGER:
+        return value
+    if python_type is str and isinstance(value, str):
+        return value
+    raise InvalidCursor("Malformed cursor")
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort-key values of the last returned row as an opaque token."""
+    raw = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, order_columns: Sequence[Any]) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor for the given sort key.
+
+    Each value must match its column: an int, a str, or a naive ISO
+    datetime; anything else raises InvalidCursor rather than reaching the
+    database as a bind parameter.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise InvalidCursor("Malformed cursor")
+    if not isinstance(values, list) or len(values) != len(order_columns):
+        raise InvalidCursor("Malformed cursor")
+    try:
+        return [_decode_value(value, column) for value, column in zip(values, order_columns)]
+    except (TypeError, ValueError, NotImplementedError):
+        raise InvalidCursor("Malformed cursor")
+
+
+def keyset_page_query(
+    query: Query,
+    order_columns: Sequence[Any],
+    cursor: Optional[str],
+    limit: int
+) -> Query:
+    """
+    The query for one keyset page: rows after the cursor's key in
+    order_columns order, plus one extra row to tell whether a next page exists.
+    """
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    if cursor:
+        values = decode_cursor(cursor, order_columns)
+        # (a, b) > (x, y)  ==>  a > x OR (a = x AND b > y)
+        clauses = []
+        for index, column in enumerate(order_columns):
+            equal_prefix = [order_columns[i] == values[i] for i in range(index)]
+            clauses.append(and_(*equal_prefix, column > values[index]))
+        query = query.filter(or_(*clauses))
+    return query.order_by(*order_columns).limit(limit + 1)
+
+
+def paginate_keyset(
+    query: Query,
+    order_columns: Sequence[Any],
+    cursor: Optional[str],
+    limit: int
+) -> Tuple[list, Optional[str]]:
+    """
+    Fetch one page ordered by order_columns (ascending, last column unique).
+
+    Pages seek past the previous page's last key instead of using OFFSET, so
+    deep pages cost the same as the first.
+
+    Returns:
+        Tuple of (rows, next_cursor). next_cursor is None on the last page.
+    """
+    rows = keyset_page_query(query, order_columns, cursor, limit).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    next_cursor = encode_cursor([getattr(last, column.key) for column in order_columns])
+    return rows, next_cursor
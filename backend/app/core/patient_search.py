@@ -0,0 +1,422 @@
+import heapq
+import math
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from .config import settings
+from ..models.patient import PLACEHOLDER_CONTACT_PREFIX, Patient
+
+_NON_WORD = re.compile(r"[\W_]+")
+_NON_DIGIT = re.compile(r"\D+")
+_EMPTY = array("i")
+
+# Ranking: exact name or phone, then prefix of the whole value, then every
+# query word prefixing a name word, then fuzzy matches scaled below these
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.95
+WORD_PREFIX_SCORE = 0.9
+PHONE_SUBSTRING_SCORE = 0.8
+FUZZY_SCORE_SCALE = 0.85
+
+# Shorter digit queries match too many phone numbers to be useful
+PHONE_MIN_DIGITS = 3
+
+
+def normalize_name(value: Optional[str]) -> str:
+    """Casefold, strip accents and punctuation, and collapse whitespace."""
+    if not value:
+        return ""
+    if not value.isascii():
+        decomposed = unicodedata.normalize("NFKD", value)
+        value = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(_NON_WORD.sub(" ", value.casefold()).split())
+
+
+def normalize_phone(value: Optional[str]) -> str:
+    """Digits only, without an international 00 prefix."""
+    digits = _NON_DIGIT.sub("", value or "")
+    return digits[2:] if digits.startswith("00") else digits
+
+
+def word_trigrams(word: str) -> Set[str]:
+    """Trigrams of a word padded as in pg_trgm: two spaces before, one after."""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def phone_trigrams(digits: str) -> Set[str]:
+    return {digits[i:i + 3] for i in range(len(digits) - 2)}
+
+
+def indexed_patients_query(db: Session, since: Optional[datetime] = None):
+    """The indexed columns of every patient, or of those changed since `since`."""
+    query = db.query(Patient.patient_id, Patient.full_name, Patient.contact_number)
+    if since is not None:
+        query = query.filter(Patient.updated_at >= since)
+    return query
+
+
+class PatientSearchIndex:
+    """
+    In-memory index over patient names and phone numbers.
+
+    Names are indexed by word: a sorted vocabulary answers prefix lookups
+    by binary search, each word maps to a compact array of patient ids,
+    and a trigram index over the vocabulary finds misspelled words, so
+    fuzzy matching compares the query with distinct words rather than with
+    every patient. Phone numbers are indexed by digit trigrams for
+    substring lookups.
+
+    Postings are append-only. Matches are checked against each patient's
+    current normalized name or phone, so entries left behind by updates
+    and deletes cost a failed check until the next compaction.
+
+    Changes committed in this process are applied on commit; changes made
+    by other workers are picked up by a sync on updated_at at most every
+    PATIENT_SEARCH_SYNC_SECONDS. Callers re-read matches from the database,
+    which drops patients deleted elsewhere.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._reset_locked()
+        self._synced_at: Optional[datetime] = None
+        self._synced_monotonic = 0.0
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def _reset_locked(self) -> None:
+        self._names: Dict[int, str] = {}
+        self._phones: Dict[int, str] = {}
+        self._vocabulary: List[str] = []
+        # (name, patient_id) in name order, for whole-name prefix lookups
+        self._ordered_names: List[Tuple[str, int]] = []
+        # While set, new words and names are appended and sorted once at the end
+        self._bulk = False
+        self._word_ids: Dict[str, array] = {}
+        self._word_grams: Dict[str, Set[str]] = {}
+        self._phone_postings: Dict[str, array] = {}
+        self._postings = 0
+        self._stale = 0
+
+    def _post_name_locked(self, patient_id: int, name: str) -> None:
+        for word in set(name.split()):
+            ids = self._word_ids.get(word)
+            if ids is None:
+                ids = self._word_ids[word] = array("i")
+                if self._bulk:
+                    self._vocabulary.append(word)
+                else:
+                    insort(self._vocabulary, word)
+                for gram in word_trigrams(word):
+                    self._word_grams.setdefault(gram, set()).add(word)
+            ids.append(patient_id)
+            self._postings += 1
+
+    def _post_phone_locked(self, patient_id: int, phone: str) -> None:
+        for gram in phone_trigrams(phone):
+            postings = self._phone_postings.get(gram)
+            if postings is None:
+                postings = self._phone_postings[gram] = array("i")
+            postings.append(patient_id)
+            self._postings += 1
+
+    def _order_name_locked(self, patient_id: int, name: str) -> None:
+        if self._bulk:
+            self._ordered_names.append((name, patient_id))
+        else:
+            insort(self._ordered_names, (name, patient_id))
+
+    def _unorder_name_locked(self, patient_id: int, name: str) -> None:
+        position = bisect_left(self._ordered_names, (name, patient_id))
+        if position < len(self._ordered_names) and self._ordered_names[position] == (name, patient_id):
+            del self._ordered_names[position]
+
+    def _put_locked(self, patient_id: int, full_name: Optional[str], contact_number: Optional[str]) -> None:
+        name = normalize_name(full_name)
+        old_name = self._names.get(patient_id)
+        if old_name != name:
+            if old_name is not None:
+                self._stale += len(set(old_name.split()))
+                self._unorder_name_locked(patient_id, old_name)
+            self._names[patient_id] = name
+            self._order_name_locked(patient_id, name)
+            self._post_name_locked(patient_id, name)
+        phone = normalize_phone(contact_number)
+        if contact_number and contact_number.startswith(PLACEHOLDER_CONTACT_PREFIX):
+            # Shared by every self-registered patient, so their trigrams would
+            # post nearly everyone and a "000" query would scan them all
+            phone = ""
+        old_phone = self._phones.get(patient_id)
+        if old_phone != phone:
+            if old_phone is not None:
+                self._stale += len(phone_trigrams(old_phone))
+            self._phones[patient_id] = phone
+            self._post_phone_locked(patient_id, phone)
+
+    def _remove_locked(self, patient_id: int) -> None:
+        name = self._names.pop(patient_id, None)
+        if name is not None:
+            self._stale += len(set(name.split()))
+            self._unorder_name_locked(patient_id, name)
+        phone = self._phones.pop(patient_id, None)
+        if phone is not None:
+            self._stale += len(phone_trigrams(phone))
+
+    def _maybe_compact_locked(self) -> None:
+        """Rebuild postings once a fifth of them are stale."""
+        if self._stale * 5 <= self._postings:
+            return
+        names, phones, ordered_names = self._names, self._phones, self._ordered_names
+        self._reset_locked()
+        self._names, self._phones, self._ordered_names = names, phones, ordered_names
+        self._bulk = True
+        for patient_id, name in names.items():
+            self._post_name_locked(patient_id, name)
+        for patient_id, phone in phones.items():
+            self._post_phone_locked(patient_id, phone)
+        self._end_bulk_locked()
+
+    def _end_bulk_locked(self) -> None:
+        self._vocabulary.sort()
+        self._ordered_names.sort()
+        self._bulk = False
+
+    def put(self, patient_id: int, full_name: Optional[str], contact_number: Optional[str]) -> None:
+        """Index a new patient or re-index a changed one."""
+        with self._lock:
+            self._put_locked(patient_id, full_name, contact_number)
+            self._maybe_compact_locked()
+
+    def remove(self, patient_id: int) -> None:
+        with self._lock:
+            self._remove_locked(patient_id)
+            self._maybe_compact_locked()
+
+    def _put_rows(self, rows: Iterable, bulk: bool = False) -> None:
+        with self._lock:
+            self._bulk = bulk
+            try:
+                for row in rows:
+                    self._put_locked(row.patient_id, row.full_name, row.contact_number)
+            finally:
+                if bulk:
+                    self._end_bulk_locked()
+            self._maybe_compact_locked()
+
+    def load(self, db: Session) -> None:
+        """Build the index from every patient, streaming rows in batches."""
+        now = datetime.utcnow()
+        rows = db.query(Patient.patient_id, Patient.full_name, Patient.contact_number).execution_options(
+            yield_per=settings.EXPORT_BATCH_SIZE
+        )
+        with self._lock:
+            self._reset_locked()
+        self._put_rows(rows, bulk=True)
+        self._synced_at = now
+        self._synced_monotonic = time.monotonic()
+
+    def sync(self, db: Session) -> None:
+        """Re-index patients changed since the last sync, including by other workers."""
+        now = datetime.utcnow()
+        since = None
+        if self._synced_at is not None:
+            # Overlap the previous window so rows from slow transactions are not missed
+            since = self._synced_at - timedelta(seconds=settings.PATIENT_SEARCH_SYNC_SECONDS * 2 + 30)
+        self._put_rows(indexed_patients_query(db, since).all())
+        self._synced_at = now
+        self._synced_monotonic = time.monotonic()
+
+    def maybe_sync(self, db: Session) -> None:
+        """Sync if the interval has elapsed; concurrent callers skip rather than wait."""
+        if time.monotonic() - self._synced_monotonic < settings.PATIENT_SEARCH_SYNC_SECONDS:
+            return
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            self.sync(db)
+        finally:
+            self._sync_lock.release()
+
+    def _prefix_words(self, prefix: str) -> List[str]:
+        start = bisect_left(self._vocabulary, prefix)
+        end = bisect_left(self._vocabulary, prefix + "\uffff", start)
+        return self._vocabulary[start:end]
+
+    def _similar_words(self, word: str, min_similarity: float) -> Dict[str, float]:
+        """Vocabulary words whose trigram similarity to word reaches min_similarity."""
+        grams = word_trigrams(word)
+        shared: Dict[str, int] = {}
+        for gram in grams:
+            for candidate in self._word_grams.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        # Similarity is at most shared / len(grams), so skip words that cannot qualify
+        needed = math.ceil(min_similarity * len(grams))
+        similar = {}
+        for candidate, count in shared.items():
+            if count < needed:
+                continue
+            candidate_grams = word_trigrams(candidate)
+            similarity = count / len(grams | candidate_grams)
+            if similarity >= min_similarity:
+                similar[candidate] = similarity
+        return similar
+
+    def _ids_for(self, word_scores: List[Dict[str, float]]) -> Set[int]:
+        """Patients with a matching word for the most selective query word."""
+        postings = [[self._word_ids[word] for word in scores] for scores in word_scores]
+        narrowest = min(postings, key=lambda lists: sum(len(ids) for ids in lists))
+        ids: Set[int] = set()
+        for entries in narrowest:
+            ids.update(entries)
+        return ids
+
+    def _score_names(
+        self,
+        query: str,
+        ids: Iterable[int],
+        word_scores: List[Dict[str, float]],
+        fuzzy: bool
+    ) -> List[Tuple[float, str, int]]:
+        """Score candidates whose current name matches every query word."""
+        names = self._names
+        scored = []
+        for patient_id in ids:
+            name = names.get(patient_id)
+            if name is None:
+                continue
+            words = name.split()
+            total = 0.0
+            for scores in word_scores:
+                best = max([scores.get(word, 0.0) for word in words], default=0.0)
+                if not best:
+                    break
+                total += best
+            else:
+                score = FUZZY_SCORE_SCALE * total / len(word_scores) if fuzzy else WORD_PREFIX_SCORE
+                scored.append((score, name, patient_id))
+        return scored
+
+    def _search_names(self, query: str, limit: int, min_similarity: float) -> List[Tuple[float, str, int]]:
+        parts = query.split()
+        with self._lock:
+            # Names starting with the query come first and are already in name order
+            ordered = self._ordered_names
+            position = bisect_left(ordered, (query,))
+            scored = []
+            while position < len(ordered) and len(scored) < limit and ordered[position][0].startswith(query):
+                name, patient_id = ordered[position]
+                scored.append((EXACT_SCORE if name == query else PREFIX_SCORE, name, patient_id))
+                position += 1
+            if len(scored) >= limit:
+                return scored
+            
+            # Then names where each query word prefixes some word
+            word_scores = [dict.fromkeys(self._prefix_words(part), 1.0) for part in parts]
+            found = {patient_id for _, _, patient_id in scored}
+            if all(word_scores):
+                scored.extend(self._score_names(query, self._ids_for(word_scores) - found, word_scores, fuzzy=False))
+                if len(scored) >= limit:
+                    return scored
+            # Too few prefix matches: words of three or more letters also match misspellings
+            for part, scores in zip(parts, word_scores):
+                if len(part) >= 3:
+                    for word, similarity in self._similar_words(part, min_similarity).items():
+                        scores.setdefault(word, similarity)
+            if not all(word_scores):
+                return scored
+            found.update(patient_id for _, _, patient_id in scored)
+            scored.extend(self._score_names(query, self._ids_for(word_scores) - found, word_scores, fuzzy=True))
+        return scored
+
+    def _search_phones(self, digits: str) -> List[Tuple[float, str, int]]:
+        with self._lock:
+            # A substring match contains every trigram; scan the rarest posting
+            grams = phone_trigrams(digits)
+            candidates = min((self._phone_postings.get(gram, _EMPTY) for gram in grams), key=len)
+            phones = self._phones
+            scored = []
+            for patient_id in set(candidates):
+                phone = phones.get(patient_id)
+                if phone is None or digits not in phone:
+                    continue
+                if phone == digits:
+                    score = EXACT_SCORE
+                elif phone.startswith(digits) or phone.endswith(digits):
+                    score = PREFIX_SCORE
+                else:
+                    score = PHONE_SUBSTRING_SCORE
+                scored.append((score, phone, patient_id))
+        return scored
+
+    def search(self, query: str, limit: int, min_similarity: Optional[float] = None) -> List[Tuple[int, float]]:
+        """
+        Rank patients matching a partial name or phone number.
+
+        Queries without letters match phone numbers by digit substring
+        (at least PHONE_MIN_DIGITS digits).
+        Anything else matches names by word prefix, and when that finds
+        fewer than limit patients, also by trigram similarity so
+        misspellings still match. Returns (patient_id, score) pairs, best
+        first, ties in name or phone order.
+        """
+        if min_similarity is None:
+            min_similarity = settings.PATIENT_SEARCH_MIN_SIMILARITY
+        digits = normalize_phone(query)
+        if digits and not any(char.isalpha() for char in query):
+            if len(digits) < PHONE_MIN_DIGITS:
+                return []
+            scored = self._search_phones(digits)
+        else:
+            name = normalize_name(query)
+            scored = self._search_names(name, limit, min_similarity) if name else []
+        best = heapq.nsmallest(limit, scored, key=lambda item: (-item[0], item[1], item[2]))
+        return [(patient_id, round(score, 4)) for score, _, patient_id in best]
+
+
+patient_search = PatientSearchIndex()
+
+_PENDING_KEY = "patient_search_changes"
+
+
+def _queue_change(target, deleted: bool) -> None:
+    session = object_session(target)
+    if session is None:
+        return
+    changes = session.info.setdefault(_PENDING_KEY, {})
+    changes[target.patient_id] = None if deleted else (target.full_name, target.contact_number)
+
+
+@event.listens_for(Patient, "after_insert")
+@event.listens_for(Patient, "after_update")
+def _index_changed_patient(mapper, connection, target):
+    _queue_change(target, deleted=False)
+
+
+@event.listens_for(Patient, "after_delete")
+def _unindex_deleted_patient(mapper, connection, target):
+    _queue_change(target, deleted=True)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_patient_changes(session):
+    """Apply committed patient changes; rolled-back ones never reach the index."""
+    for patient_id, values in session.info.pop(_PENDING_KEY, {}).items():
+        if values is None:
+            patient_search.remove(patient_id)
+        else:
+            patient_search.put(patient_id, *values)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_patient_changes(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,113 @@
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Hashable, Set
+
+
+class PubSubBackend:
+    """
+    Transport used by EventBroker to fan messages out to subscribers.
+
+    Backends deliver each published message to every local callback
+    registered for the channel. Callbacks may be invoked from any thread.
+    """
+
+    def subscribe(self, channel: Hashable, callback: Callable[[Any], None]) -> None:
+        raise NotImplementedError
+
+    def unsubscribe(self, channel: Hashable, callback: Callable[[Any], None]) -> None:
+        raise NotImplementedError
+
+    def publish(self, channel: Hashable, message: Any) -> None:
+        raise NotImplementedError
+
+
+class InMemoryBackend(PubSubBackend):
+    """Single-process backend: publish calls subscriber callbacks directly."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._callbacks: Dict[Hashable, Set[Callable[[Any], None]]] = {}
+
+    def subscribe(self, channel, callback):
+        with self._lock:
+            self._callbacks.setdefault(channel, set()).add(callback)
+
+    def unsubscribe(self, channel, callback):
+        with self._lock:
+            callbacks = self._callbacks.get(channel)
+            if callbacks is not None:
+                callbacks.discard(callback)
+                if not callbacks:
+                    del self._callbacks[channel]
+
+    def publish(self, channel, message):
+        with self._lock:
+            callbacks = list(self._callbacks.get(channel, ()))
+        for callback in callbacks:
+            callback(message)
+
+
+class Subscription:
+    """An asyncio queue of messages for one subscriber on one channel."""
+
+    def __init__(self, broker: "EventBroker", channel: Hashable, maxsize: int):
+        self.broker = broker
+        self.channel = channel
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._loop = asyncio.get_running_loop()
+
+    def _enqueue(self, message: Any) -> None:
+        # Slow consumers drop their oldest message rather than block publishers
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    def deliver(self, message: Any) -> None:
+        """Hand a message to this subscriber from any thread."""
+        self._loop.call_soon_threadsafe(self._enqueue, message)
+
+    async def get(self) -> Any:
+        return await self.queue.get()
+
+    def close(self) -> None:
+        self.broker.backend.unsubscribe(self.broker.channel_name(self.channel), self.deliver)
+
+
+class EventBroker:
+    """
+    Publish/subscribe hub with a pluggable transport backend.
+
+    Without a backend, messages go through the process's shared state
+    (SHARED_STATE_URL), so subscribers in every worker receive them.
+    Channels are then named "<namespace>:<channel>".
+    """
+
+    def __init__(self, backend: PubSubBackend = None, subscriber_queue_size: int = 100, namespace: str = "events"):
+        self._backend = backend
+        self.subscriber_queue_size = subscriber_queue_size
+        self.namespace = namespace
+
+    @property
+    def backend(self) -> PubSubBackend:
+        if self._backend is None:
+            from .shared_state import shared_state
+
+            self._backend = shared_state
+        return self._backend
+
+    def channel_name(self, channel: Hashable) -> str:
+        return f"{self.namespace}:{channel}"
+
+    def subscribe(self, channel: Hashable) -> Subscription:
+        """Subscribe the running event loop to a channel."""
+        subscription = Subscription(self, channel, self.subscriber_queue_size)
+        self.backend.subscribe(self.channel_name(channel), subscription.deliver)
+        return subscription
+
+    def publish(self, channel: Hashable, message: Any) -> None:
+        """Publish a message to every subscriber of a channel. Thread-safe."""
+        self.backend.publish(self.channel_name(channel), message)
+
+
+# Queue board updates, one channel per doctor_id
+queue_events = EventBroker(namespace="queue")
@@ -0,0 +1,357 @@
+import threading
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from .config import settings
+from .shared_state import shared_state
+from ..models.queue import QueueEntry, QueueStatus, QueuePriority
+from ..models.appointment import Appointment, AppointmentType
+
+# Lower rank is served first
+PRIORITY_RANK = {
+    QueuePriority.EMERGENCY: 0,
+    QueuePriority.URGENT: 1,
+    QueuePriority.ROUTINE: 2,
+}
+
+# Minutes assumed per patient ahead until a doctor has enough history
+AVERAGE_SERVICE_MINUTES = 15
+
+QueueKey = Tuple[int, datetime, int]
+
+
+def queue_key(priority: QueuePriority, check_in_time: datetime, queue_id: int) -> QueueKey:
+    """Sort key ordering entries by priority, then arrival, then id."""
+    return (PRIORITY_RANK[QueuePriority(priority)], check_in_time, queue_id)
+
+
+def service_history_query(db: Session):
+    """The most recent completed consultations, newest first."""
+    return db.query(
+        QueueEntry.called_time,
+        QueueEntry.completed_time,
+        Appointment.doctor_id,
+        Appointment.appointment_type
+    ).join(Appointment).filter(
+        QueueEntry.status == QueueStatus.COMPLETED,
+        QueueEntry.called_time.isnot(None),
+        QueueEntry.completed_time.isnot(None)
+    ).order_by(QueueEntry.completed_time.desc()).limit(settings.SERVICE_TIME_HISTORY_LIMIT)
+
+
+def waiting_rows_query(db: Session, doctor_id: int):
+    """A doctor's waiting rows with what the queue order and stored positions need."""
+    return db.query(
+        QueueEntry.queue_id,
+        QueueEntry.priority,
+        QueueEntry.check_in_time,
+        QueueEntry.position,
+        QueueEntry.estimated_wait_minutes,
+        Appointment.appointment_type
+    ).join(Appointment).filter(
+        Appointment.doctor_id == doctor_id,
+        QueueEntry.status == QueueStatus.WAITING
+    )
+
+
+def waiting_doctors_query(db: Session):
+    """Doctors with at least one waiting patient."""
+    return db.query(Appointment.doctor_id).join(QueueEntry).filter(
+        QueueEntry.status == QueueStatus.WAITING
+    ).distinct()
+
+
+class ServiceTimeEstimator:
+    """
+    Exponentially weighted moving average of consultation length.
+
+    Kept per (doctor, appointment type) and per doctor, from the time
+    between called_time and completed_time of finished queue entries.
+    Lookups fall back from the per-type average to the doctor's overall
+    average to AVERAGE_SERVICE_MINUTES until SERVICE_TIME_MIN_SAMPLES
+    consultations have been observed.
+
+    Every worker keeps its own averages; record() folds a consultation in
+    here at once and publishes it through the shared state so all of them
+    fold in the same samples and estimate the same waits.
+    """
+
+    CHANNEL = "service-times"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # key -> [average minutes, sample count]
+        self._stats: Dict[Tuple, List[float]] = {}
+        self._subscribed = False
+        # Tells this worker's own published samples apart, which it has already observed
+        self._origin = uuid.uuid4().hex
+
+    def _update_locked(self, key: Tuple, minutes: float) -> None:
+        stat = self._stats.get(key)
+        if stat is None:
+            self._stats[key] = [minutes, 1]
+            return
+        stat[1] += 1
+        # Plain running mean for the first samples, then a fixed-weight EWMA
+        alpha = max(settings.SERVICE_TIME_EWMA_ALPHA, 1.0 / stat[1])
+        stat[0] += alpha * (minutes - stat[0])
+
+    def observe(self, doctor_id: int, appointment_type: Optional[AppointmentType], minutes: float) -> None:
+        """Fold one completed consultation into the averages."""
+        if minutes <= 0 or minutes > settings.SERVICE_TIME_MAX_MINUTES:
+            # Entries completed without being called, or left open for hours
+            return
+        with self._lock:
+            self._update_locked((doctor_id, appointment_type), minutes)
+            self._update_locked((doctor_id,), minutes)
+
+    def record(self, doctor_id: int, appointment_type: Optional[AppointmentType], minutes: float) -> None:
+        """Observe a consultation here and in every other worker."""
+        self.observe(doctor_id, appointment_type, minutes)
+        shared_state.publish(self.CHANNEL, {
+            "doctor_id": doctor_id,
+            "appointment_type": appointment_type.name if appointment_type is not None else None,
+            "minutes": minutes,
+            "origin": self._origin,
+        })
+
+    def _observe_published(self, message: dict) -> None:
+        if message.get("origin") == self._origin:
+            return
+        appointment_type = message["appointment_type"]
+        self.observe(
+            message["doctor_id"],
+            AppointmentType[appointment_type] if appointment_type is not None else None,
+            message["minutes"]
+        )
+
+    def service_minutes(self, doctor_id: int, appointment_type: Optional[AppointmentType] = None) -> float:
+        """Expected consultation length for a doctor and appointment type."""
+        with self._lock:
+            for key in ((doctor_id, appointment_type), (doctor_id,)):
+                stat = self._stats.get(key)
+                if stat is not None and stat[1] >= settings.SERVICE_TIME_MIN_SAMPLES:
+                    return stat[0]
+        return float(AVERAGE_SERVICE_MINUTES)
+
+    def load(self, db: Session) -> None:
+        """Warm the averages from the most recent completed consultations."""
+        if not self._subscribed:
+            self._subscribed = True
+            shared_state.subscribe(self.CHANNEL, self._observe_published)
+        rows = service_history_query(db).all()
+
+        with self._lock:
+            self._stats = {}
+        # Replay oldest first so the newest consultations carry the most weight
+        for row in reversed(rows):
+            minutes = (row.completed_time - row.called_time).total_seconds() / 60
+            self.observe(row.doctor_id, row.appointment_type, minutes)
+
+
+class DoctorQueue:
+    """
+    Ordered waiting list for a single doctor.
+
+    Entries are kept sorted by queue_key using binary search, so the slice
+    of entries whose position shifts after an insert or removal is known
+    directly instead of being recomputed for the whole queue.
+    """
+
+    def __init__(self, doctor_id: int):
+        self.doctor_id = doctor_id
+        self.lock = threading.RLock()
+        self._entries: List[QueueKey] = []
+        self._keys: Dict[int, QueueKey] = {}
+        self._types: Dict[int, Optional[AppointmentType]] = {}
+        # Shared version this copy reflects; None until loaded
+        self.version: Optional[int] = None
+        self.mutations = 0
+
+    def clear(self) -> None:
+        self._entries = []
+        self._keys = {}
+        self._types = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, queue_id: int) -> bool:
+        return queue_id in self._keys
+
+    def _positions_from(self, index: int) -> Dict[int, int]:
+        """Positions (1-based) of every entry at or after index."""
+        return {
+            key[2]: position
+            for position, key in enumerate(self._entries[index:], start=index + 1)
+        }
+
+    def push(
+        self,
+        queue_id: int,
+        priority: QueuePriority,
+        check_in_time: datetime,
+        appointment_type: Optional[AppointmentType] = None
+    ) -> Dict[int, int]:
+        """Add an entry and return the positions that changed."""
+        if queue_id in self._keys:
+            return {}
+        key = queue_key(priority, check_in_time, queue_id)
+        index = bisect_left(self._entries, key)
+        self._entries.insert(index, key)
+        self._keys[queue_id] = key
+        self._types[queue_id] = appointment_type
+        self.mutations += 1
+        return self._positions_from(index)
+
+    def peek(self) -> Optional[int]:
+        """Return the queue_id that would be called next."""
+        return self._entries[0][2] if self._entries else None
+
+    def remove(self, queue_id: int) -> Dict[int, int]:
+        """Remove an entry and return the positions that changed."""
+        key = self._keys.pop(queue_id, None)
+        if key is None:
+            return {}
+        self._types.pop(queue_id, None)
+        index = bisect_left(self._entries, key)
+        del self._entries[index]
+        self.mutations += 1
+        return self._positions_from(index)
+
+    def positions(self) -> Dict[int, int]:
+        """Current position of every waiting entry."""
+        return self._positions_from(0)
+
+    def estimated_waits(self, estimator: ServiceTimeEstimator) -> Dict[int, int]:
+        """Minutes until each waiting entry is called: the expected service time of everyone ahead."""
+        waits = {}
+        ahead = 0.0
+        for key in self._entries:
+            queue_id = key[2]
+            waits[queue_id] = int(round(ahead))
+            ahead += estimator.service_minutes(self.doctor_id, self._types.get(queue_id))
+        return waits
+
+
+class QueueEngine:
+    """
+    Per-doctor waiting queues, held in memory by every worker.
+
+    queue_entries is the source of truth. Changes to a doctor's queue are
+    made inside locked(), which serializes them across workers through the
+    shared state and reloads this worker's copy first if another worker
+    changed the queue since (its shared version counter moved on).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queues: Dict[int, DoctorQueue] = {}
+
+    def queue_for(self, doctor_id: int) -> DoctorQueue:
+        """Get (or create) the local copy of a doctor's queue. Mutate it only inside locked()."""
+        with self._lock:
+            queue = self._queues.get(doctor_id)
+            if queue is None:
+                queue = DoctorQueue(doctor_id)
+                self._queues[doctor_id] = queue
+            return queue
+
+    @contextmanager
+    def locked(self, db: Session, doctor_id: int) -> Iterator[DoctorQueue]:
+        """
+        Hold a doctor's queue exclusively, in this worker and every other.
+
+        Yields the up-to-date queue. The caller commits its changes before
+        leaving the block; if the block raises, the local copy is reloaded
+        on next use rather than trusted.
+        """
+        queue = self.queue_for(doctor_id)
+        version_key = f"queue-version:{doctor_id}"
+        with queue.lock, shared_state.lock(f"queue:{doctor_id}", settings.SHARED_LOCK_TIMEOUT_SECONDS):
+            version = shared_state.get(version_key) or 0
+            if queue.version != version:
+                self._reload(db, queue)
+                queue.version = version
+            mutations = queue.mutations
+            try:
+                yield queue
+            except BaseException:
+                queue.version = None
+                raise
+            if queue.mutations != mutations:
+                queue.version = shared_state.incr(version_key)
+
+    def _reload(self, db: Session, queue: DoctorQueue) -> None:
+        """Rebuild a doctor's queue from its waiting rows and repair stale positions."""
+        rows = waiting_rows_query(db, queue.doctor_id).all()
+
+        queue.clear()
+        stored = {}
+        for row in rows:
+            queue.push(row.queue_id, row.priority, row.check_in_time, row.appointment_type)
+            stored[row.queue_id] = (row.position, row.estimated_wait_minutes)
+        waits = queue.estimated_waits(service_times)
+        changed = {
+            queue_id: position
+            for queue_id, position in queue.positions().items()
+            if stored.get(queue_id) != (position, waits[queue_id])
+        }
+        write_positions(db, queue, changed)
+
+    def load(self, db: Session) -> None:
+        """Load the queue of every doctor with waiting patients, repairing stale positions."""
+        doctor_ids = [row.doctor_id for row in waiting_doctors_query(db)]
+        with self._lock:
+            self._queues = {}
+        for doctor_id in doctor_ids:
+            with self.locked(db, doctor_id):
+                db.commit()
+
+
+def write_positions(db: Session, queue: DoctorQueue, changed: Dict[int, int]) -> None:
+    """Persist position and estimated wait for the queue rows whose position changed."""
+    if not changed:
+        return
+    waits = queue.estimated_waits(service_times)
+    db.execute(
+        update(QueueEntry),
+        [
+            {
+                "queue_id": queue_id,
+                "position": position,
+                "estimated_wait_minutes": waits.get(queue_id),
+            }
+            for queue_id, position in changed.items()
+        ]
+    )
+
+
+def refresh_estimates(db: Session, queue: DoctorQueue) -> None:
+    """
+    Rewrite estimated_wait_minutes for the waiting rows whose estimate moved,
+    e.g. after a new consultation changed the doctor's average service time.
+    """
+    waits = queue.estimated_waits(service_times)
+    if not waits:
+        return
+    stored = dict(
+        db.query(QueueEntry.queue_id, QueueEntry.estimated_wait_minutes).filter(
+            QueueEntry.queue_id.in_(list(waits))
+        ).all()
+    )
+    changed = [
+        {"queue_id": queue_id, "estimated_wait_minutes": wait}
+        for queue_id, wait in waits.items()
+        if stored.get(queue_id) != wait
+    ]
+    if changed:
+        db.execute(update(QueueEntry), changed)
+
+
+service_times = ServiceTimeEstimator()
+queue_engine = QueueEngine()
@@ -0,0 +1,65 @@
+import importlib
+import threading
+from typing import List
+from fastapi import FastAPI
+from starlette.routing import BaseRoute, Match, NoMatchFound
+from .config import settings
+
+
+class LazyRouter(BaseRoute):
+    """
+    Placeholder that imports a router module on the first request under its
+    prefix and includes it in the app.
+
+    The placeholder itself never matches. Loading appends the real routes to
+    the app's route list, which Starlette is iterating at that moment, so the
+    same request goes on to match them. Once loaded it is skipped at the cost
+    of one prefix check.
+    """
+
+    def __init__(self, app: FastAPI, module: str, prefix: str, tags: List[str]):
+        self.app = app
+        self.module = module
+        self.prefix = prefix
+        self.tags = tags
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        if self.loaded:
+            return
+        with self._lock:
+            if self.loaded:
+                return
+            router = importlib.import_module(self.module).router
+            self.app.include_router(router, prefix=self.prefix, tags=self.tags)
+            self.loaded = True
+
+    def matches(self, scope):
+        if not self.loaded and scope["type"] in ("http", "websocket"):
+            path = scope["path"]
+            if path == self.prefix or path.startswith(self.prefix + "/"):
+                self.load()
+        return Match.NONE, {}
+
+    def url_path_for(self, name: str, /, **path_params):
+        raise NoMatchFound(name, path_params)
+
+    async def handle(self, scope, receive, send):
+        raise RuntimeError("LazyRouter never matches a request")
+
+
+def include_lazy_router(app: FastAPI, module: str, prefix: str, tags: List[str]) -> None:
+    """Include a router by module path, importing it now or on first use (LAZY_ROUTERS)."""
+    lazy = LazyRouter(app, module, prefix, tags)
+    if settings.LAZY_ROUTERS:
+        app.router.routes.append(lazy)
+    else:
+        lazy.load()
+
+
+def load_lazy_routers(app: FastAPI) -> None:
+    """Import every router not loaded yet, e.g. before generating the OpenAPI document."""
+    for route in list(app.router.routes):
+        if isinstance(route, LazyRouter):
+            route.load()
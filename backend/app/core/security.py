@@ -1,16 +1,44 @@
-from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+import asyncio
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import lru_cache
+from typing import Optional, Tuple
 from .config import settings
+from .tokens import ACCESS_TOKEN, REFRESH_TOKEN, token_verifier
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+@lru_cache(maxsize=None)
+def pwd_context():
+    """Password hashing context, built (and passlib/bcrypt imported) on first use."""
+    from passlib.context import CryptContext
+
+    # Hashes created with a different cost factor are flagged by needs_update()
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__rounds=settings.BCRYPT_ROUNDS
+    )
+
+# Dedicated pool for bcrypt work so hashing bursts do not starve the
+# request threadpool. bcrypt releases the GIL, so threads scale with cores.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+# Admission control: running plus queued hashing jobs
+_hash_slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_MAX_PENDING)
+
+
+class HashingPoolSaturated(Exception):
+    """Raised when the password hashing pool has no free admission slots."""
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
@@ -23,7 +51,56 @@ def get_password_hash(password: str) -> str:
     password_bytes = password.encode('utf-8')
     if len(password_bytes) > 72:
         password = password_bytes[:72].decode('utf-8', errors='ignore')
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and rehash it if its cost factor is outdated.
+    
+    Returns:
+        Tuple of (is_valid, new_hash). new_hash is None unless the stored
+        hash should be replaced.
+    """
+    return pwd_context().verify_and_update(plain_password, hashed_password)
+
+
+async def _run_in_hash_pool(func, *args):
+    """Run a hashing function on the dedicated pool, rejecting work when saturated."""
+    if not _hash_slots.acquire(blocking=False):
+        raise HashingPoolSaturated()
+    try:
+        future = _hash_executor.submit(func, *args)
+    except Exception:
+        _hash_slots.release()
+        raise
+    # Release on job completion, not on await, so cancelled requests still
+    # count against the limit while their hash is running
+    future.add_done_callback(lambda _: _hash_slots.release())
+    return await asyncio.wrap_future(future)
+
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Async variant of verify_and_update_password backed by the hashing pool."""
+    return await _run_in_hash_pool(verify_and_update_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Async variant of get_password_hash backed by the hashing pool."""
+    return await _run_in_hash_pool(get_password_hash, password)
+
+
+def _issue_token(data: dict, token_type: str, expires_delta: timedelta) -> str:
+    now = time.time()
+    to_encode = data.copy()
+    to_encode.update({
+        # Fractional iat so a revocation and a new login in the same second are ordered
+        "iat": round(now, 3),
+        "exp": int(now + expires_delta.total_seconds()),
+        "jti": uuid.uuid4().hex,
+        "type": token_type,
+    })
+    return token_verifier.encode(to_encode)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -37,15 +114,19 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     Returns:
         Encoded JWT token string
     """
-    to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
+    if expires_delta is None:
+        expires_delta = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return _issue_token(data, ACCESS_TOKEN, expires_delta)
+
+
+def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    """
+    Create a long-lived refresh token, exchanged at /api/auth/refresh for a
+    new access token without re-entering the password.
+    """
+    if expires_delta is None:
+        expires_delta = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    return _issue_token(data, REFRESH_TOKEN, expires_delta)
 
 
 def decode_access_token(token: str) -> Optional[dict]:
@@ -58,8 +139,9 @@ def decode_access_token(token: str) -> Optional[dict]:
     Returns:
         Decoded token payload or None if invalid
     """
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
-    except JWTError:
-        return None
\ No newline at end of file
+    return token_verifier.verify(token, ACCESS_TOKEN)
+
+
+def decode_refresh_token(token: str) -> Optional[dict]:
+    """Decode and verify a refresh token. Returns None if invalid."""
+    return token_verifier.verify(token, REFRESH_TOKEN)
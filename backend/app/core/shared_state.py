@@ -0,0 +1,331 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from .config import settings
+from .pubsub import InMemoryBackend, PubSubBackend
+
+logger = logging.getLogger(__name__)
+
+
+class SharedLockTimeout(RuntimeError):
+    """A shared lock could not be acquired within its timeout."""
+
+
+class SharedState(PubSubBackend):
+    """
+    State every worker process must agree on.
+
+    Besides pub/sub (queue board events, cache invalidations) a backend
+    provides integer counters, expiring claims, named locks and token
+    buckets, which is enough to keep per-worker copies of the queues and
+    caches consistent and to enforce rate limits across workers. Keys and
+    channels are strings; messages must be JSON-serializable.
+    """
+
+    def get(self, key: str) -> Optional[int]:
+        """Current value of a counter, or None if it was never set."""
+        raise NotImplementedError
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """Add to a counter and return the new value; with ttl it expires that long after the last change."""
+        raise NotImplementedError
+
+    def claim(self, key: str, ttl: float) -> bool:
+        """Take a key for ttl seconds unless another worker holds it. Returns whether it was taken."""
+        raise NotImplementedError
+
+    def extend(self, key: str, ttl: float) -> None:
+        """Keep a claimed key for ttl seconds from now."""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def lock(self, name: str, timeout: float):
+        """
+        Context manager holding a named lock across workers.
+
+        Raises SharedLockTimeout if it is not acquired within timeout
+        seconds. A lock whose holder died is released after timeout.
+        """
+        raise NotImplementedError
+
+    def take_token(self, key: str, rate: float, capacity: float) -> float:
+        """
+        Take one token from a bucket refilled at `rate` per second up to
+        `capacity`. Returns 0 when a token was taken, otherwise the seconds
+        until one is available.
+        """
+        raise NotImplementedError
+
+    def on_reset(self, callback: Callable[[], None]) -> None:
+        """Register a callback for when published messages may have been missed."""
+
+    def close(self) -> None:
+        pass
+
+
+class InMemorySharedState(InMemoryBackend, SharedState):
+    """Process-local state, for a single worker (SHARED_STATE_URL=memory://)."""
+
+    # Expired keys are swept after this many writes
+    SWEEP_EVERY = 1000
+
+    def __init__(self):
+        super().__init__()
+        self._values_lock = threading.Lock()
+        # key -> (value, monotonic expiry or None)
+        self._values: Dict[str, Tuple[int, Optional[float]]] = {}
+        self._writes = 0
+        self._locks: Dict[str, threading.Lock] = {}
+        self._buckets: Dict[str, List[float]] = {}
+
+    def _get_locked(self, key: str, now: float) -> Optional[int]:
+        item = self._values.get(key)
+        if item is None:
+            return None
+        if item[1] is not None and item[1] <= now:
+            del self._values[key]
+            return None
+        return item[0]
+
+    def _set_locked(self, key: str, value: int, ttl: Optional[float], now: float) -> None:
+        self._values[key] = (value, None if ttl is None else now + ttl)
+        self._writes += 1
+        if self._writes % self.SWEEP_EVERY == 0:
+            for stale in [k for k, (_, expires) in self._values.items() if expires is not None and expires <= now]:
+                del self._values[stale]
+
+    def get(self, key):
+        with self._values_lock:
+            return self._get_locked(key, time.monotonic())
+
+    def incr(self, key, amount=1, ttl=None):
+        now = time.monotonic()
+        with self._values_lock:
+            value = (self._get_locked(key, now) or 0) + amount
+            self._set_locked(key, value, ttl, now)
+            return value
+
+    def claim(self, key, ttl):
+        now = time.monotonic()
+        with self._values_lock:
+            if self._get_locked(key, now) is not None:
+                return False
+            self._set_locked(key, 1, ttl, now)
+            return True
+
+    def extend(self, key, ttl):
+        now = time.monotonic()
+        with self._values_lock:
+            self._set_locked(key, 1, ttl, now)
+
+    def delete(self, key):
+        with self._values_lock:
+            self._values.pop(key, None)
+
+    @contextmanager
+    def lock(self, name, timeout):
+        with self._values_lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        if not lock.acquire(timeout=timeout):
+            raise SharedLockTimeout(f"lock {name} not acquired within {timeout}s")
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def take_token(self, key, rate, capacity):
+        now = time.monotonic()
+        with self._values_lock:
+            bucket = self._buckets.setdefault(key, [capacity, now])
+            bucket[0] = min(capacity, bucket[0] + max(now - bucket[1], 0.0) * rate)
+            bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / rate
+
+
+# Refill and take in one step so concurrent workers never share a token
+TAKE_TOKEN_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - updated, 0) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisSharedState(SharedState):
+    """
+    State in a Redis-compatible server (SHARED_STATE_URL=redis://...).
+
+    Every key and channel is prefixed with SHARED_STATE_PREFIX so several
+    deployments can share a server. One pattern subscription per process
+    receives all of the prefix's channels on a listener thread, which hands
+    each message to the local callbacks for its channel; after the
+    connection drops it resubscribes and calls the on_reset callbacks, since
+    messages published meanwhile are lost.
+    """
+
+    RECONNECT_SECONDS = 1.0
+
+    def __init__(self, url: str, prefix: str = ""):
+        import redis
+
+        self._redis = redis.Redis.from_url(url, health_check_interval=30)
+        self._prefix = prefix
+        self._take_token = self._redis.register_script(TAKE_TOKEN_SCRIPT)
+        self._lock = threading.Lock()
+        self._callbacks: Dict[str, Set[Callable[[Any], None]]] = {}
+        self._reset_callbacks: List[Callable[[], None]] = []
+        self._listener: Optional[threading.Thread] = None
+        self._pubsub = None
+        self._closed = threading.Event()
+
+    def _key(self, key: str) -> str:
+        return f"{self._prefix}{key}"
+
+    def subscribe(self, channel, callback):
+        with self._lock:
+            self._callbacks.setdefault(self._key(channel), set()).add(callback)
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name="shared-state-listener", daemon=True)
+                self._listener.start()
+
+    def unsubscribe(self, channel, callback):
+        with self._lock:
+            callbacks = self._callbacks.get(self._key(channel))
+            if callbacks is not None:
+                callbacks.discard(callback)
+                if not callbacks:
+                    del self._callbacks[self._key(channel)]
+
+    def publish(self, channel, message):
+        # Best effort, like the in-memory backend: the caller's change is
+        # already committed and every consumer can recover from a lost event
+        try:
+            self._redis.publish(self._key(channel), json.dumps(message))
+        except Exception:
+            logger.exception("publishing to %s failed", channel)
+
+    def on_reset(self, callback):
+        with self._lock:
+            self._reset_callbacks.append(callback)
+
+    def _listen(self) -> None:
+        connected_before = False
+        while not self._closed.is_set():
+            try:
+                self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                self._pubsub.psubscribe(f"{self._prefix}*")
+                if connected_before:
+                    self._reset()
+                connected_before = True
+                while not self._closed.is_set():
+                    message = self._pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self._dispatch(message)
+            except Exception:
+                if self._closed.is_set():
+                    break
+                logger.exception("shared state subscription lost; reconnecting")
+                time.sleep(self.RECONNECT_SECONDS)
+            finally:
+                try:
+                    self._pubsub.close()
+                except Exception:
+                    pass
+
+    def _dispatch(self, message: dict) -> None:
+        channel = message["channel"]
+        if isinstance(channel, bytes):
+            channel = channel.decode()
+        with self._lock:
+            callbacks = list(self._callbacks.get(channel, ()))
+        if not callbacks:
+            return
+        payload = json.loads(message["data"])
+        for callback in callbacks:
+            try:
+                callback(payload)
+            except Exception:
+                logger.exception("shared state subscriber for %s failed", channel)
+
+    def _reset(self) -> None:
+        with self._lock:
+            callbacks = list(self._reset_callbacks)
+        for callback in callbacks:
+            callback()
+
+    def get(self, key):
+        value = self._redis.get(self._key(key))
+        return None if value is None else int(value)
+
+    def incr(self, key, amount=1, ttl=None):
+        if ttl is None:
+            return self._redis.incrby(self._key(key), amount)
+        pipeline = self._redis.pipeline()
+        pipeline.incrby(self._key(key), amount)
+        pipeline.pexpire(self._key(key), int(ttl * 1000))
+        return pipeline.execute()[0]
+
+    def claim(self, key, ttl):
+        return bool(self._redis.set(self._key(key), 1, nx=True, px=max(int(ttl * 1000), 1)))
+
+    def extend(self, key, ttl):
+        self._redis.set(self._key(key), 1, px=max(int(ttl * 1000), 1))
+
+    def delete(self, key):
+        self._redis.delete(self._key(key))
+
+    @contextmanager
+    def lock(self, name, timeout):
+        lock = self._redis.lock(self._key(f"lock:{name}"), timeout=timeout, blocking_timeout=timeout)
+        if not lock.acquire():
+            raise SharedLockTimeout(f"lock {name} not acquired within {timeout}s")
+        try:
+            yield
+        finally:
+            try:
+                lock.release()
+            except Exception:
+                # Held past its timeout and possibly taken over; nothing left to release
+                logger.warning("shared lock %s expired before release", name)
+
+    def take_token(self, key, rate, capacity):
+        return float(self._take_token(keys=[self._key(key)], args=[rate, capacity, time.time()]))
+
+    def close(self):
+        self._closed.set()
+        if self._listener is not None:
+            self._listener.join(timeout=2)
+        self._redis.close()
+
+
+def build_shared_state(url: str, prefix: str = "") -> SharedState:
+    """Backend for a SHARED_STATE_URL: memory:// or redis:// (rediss://, unix://)."""
+    scheme = url.split(":", 1)[0]
+    if scheme == "memory":
+        return InMemorySharedState()
+    if scheme in ("redis", "rediss", "unix"):
+        return RedisSharedState(url, prefix)
+    raise ValueError(f"Unsupported SHARED_STATE_URL scheme: {scheme}")
+
+
+shared_state = build_shared_state(settings.SHARED_STATE_URL, settings.SHARED_STATE_PREFIX)
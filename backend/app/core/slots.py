@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+from typing import List
+from sqlalchemy.orm import Session
+from .config import settings
+from ..models.appointment import ACTIVE_APPOINTMENT_STATUSES, Appointment, AppointmentSlot
+
+
+def slot_starts(start_time: datetime, end_time: datetime) -> List[datetime]:
+    """List the slot boundaries covered by [start_time, end_time)."""
+    step = timedelta(minutes=settings.SLOT_GRANULARITY_MINUTES)
+    # Align down to the slot grid; only appointments booked before times
+    # were validated can be misaligned, and they cover any partial slot
+    offset = timedelta(minutes=start_time.minute % settings.SLOT_GRANULARITY_MINUTES,
+                       seconds=start_time.second, microseconds=start_time.microsecond)
+    current = start_time - offset
+    starts = []
+    while current < end_time:
+        starts.append(current)
+        current += step
+    return starts
+
+
+def rebuild_appointment_slots(db: Session) -> int:
+    """Recreate slot reservations for all active appointments. Returns the row count."""
+    db.query(AppointmentSlot).delete(synchronize_session=False)
+    appointments = db.query(Appointment).filter(
+        Appointment.status.in_(ACTIVE_APPOINTMENT_STATUSES)
+    ).order_by(Appointment.appointment_id)
+    count = 0
+    claimed = set()
+    for appointment in appointments:
+        for slot_start in slot_starts(appointment.appointment_date, appointment.end_time):
+            key = (appointment.doctor_id, slot_start)
+            # Legacy double bookings keep the earliest appointment's claim
+            if key in claimed:
+                continue
+            claimed.add(key)
+            db.add(AppointmentSlot(
+                doctor_id=appointment.doctor_id,
+                slot_start=slot_start,
+                appointment_id=appointment.appointment_id
+            ))
+            count += 1
+    db.commit()
+    return count
+
+
+def backfill_appointment_slots(db: Session) -> None:
+    """Populate slot reservations once for databases created before the slot table."""
+    has_slots = db.query(AppointmentSlot.doctor_id).first() is not None
+    has_active = db.query(Appointment.appointment_id).filter(
+        Appointment.status.in_(ACTIVE_APPOINTMENT_STATUSES)
+    ).first() is not None
+    if has_active and not has_slots:
+        rebuild_appointment_slots(db)
@@ -0,0 +1,108 @@
+# Imported by the app package before anything heavy, so the cold-start clock
+# includes framework imports; settings and metrics are imported on use.
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _process_age() -> Optional[float]:
+    """Seconds since this process was started, where /proc can tell (Linux)."""
+    try:
+        with open("/proc/self/stat") as stat:
+            # Fields after the parenthesised command name; starttime is field 22
+            fields = stat.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as uptime:
+            seconds_since_boot = float(uptime.read().split()[0])
+        return max(seconds_since_boot - int(fields[19]) / os.sysconf("SC_CLK_TCK"), 0.0)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class StartupProfile:
+    """
+    Wall-clock breakdown of a worker's cold start.
+
+    The clock starts when the `app` package is first imported. Phases are
+    recorded in order: importing app.main (framework, models and routers),
+    each startup step, and finally the first request served, so the report
+    answers "where did the time to first request go". Time spent before the
+    `app` import (interpreter boot, server imports) is reported separately
+    where the platform exposes the process start time.
+    """
+
+    def __init__(self):
+        self.before_app_import = _process_age()
+        self._origin = time.perf_counter()
+        self._last = self._origin
+        self.phases: Dict[str, float] = {}
+        self.ready: Optional[float] = None
+        self.first_request: Optional[float] = None
+        self.first_request_duration: Optional[float] = None
+
+    def mark(self, name: str) -> None:
+        """Close a phase that started where the previous one ended."""
+        now = time.perf_counter()
+        self.phases[name] = now - self._last
+        self._last = now
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._last = time.perf_counter()
+            self.phases[name] = self._last - start
+
+    def mark_ready(self) -> None:
+        self.ready = time.perf_counter() - self._origin
+        from .config import settings
+
+        if settings.STARTUP_PROFILE:
+            logger.info("startup profile (ready): %s", self.format())
+
+    def request_finished(self, duration: float) -> None:
+        """Called after every request; only the first one is recorded."""
+        if self.first_request is not None:
+            return
+        self.first_request = time.perf_counter() - self._origin
+        self.first_request_duration = duration
+        from .config import settings
+        from .metrics import registry
+
+        gauge = registry.gauge("startup_phase_seconds", "Cold start time by phase, for this worker")
+        for name, seconds in self.phases.items():
+            gauge.set(seconds, phase=name)
+        registry.gauge(
+            "startup_first_request_seconds",
+            "Time from importing the app package to the first response"
+        ).set(self.first_request)
+        if settings.STARTUP_PROFILE:
+            logger.info("startup profile (first request): %s", self.format())
+
+    def report(self) -> dict:
+        def ms(seconds: Optional[float]) -> Optional[float]:
+            return None if seconds is None else round(seconds * 1000, 1)
+
+        return {
+            "before_app_import_ms": ms(self.before_app_import),
+            "phases_ms": {name: ms(seconds) for name, seconds in self.phases.items()},
+            "ready_ms": ms(self.ready),
+            "first_request_ms": ms(self.first_request),
+            "first_request_duration_ms": ms(self.first_request_duration),
+        }
+
+    def format(self) -> str:
+        report = self.report()
+        parts = [f"{name}={value}ms" for name, value in report["phases_ms"].items()]
+        for key in ("before_app_import_ms", "ready_ms", "first_request_ms", "first_request_duration_ms"):
+            if report[key] is not None:
+                parts.append(f"{key[:-3]}={report[key]}ms")
+        return " ".join(parts)
+
+
+startup_profile = StartupProfile()
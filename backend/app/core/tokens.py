@@ -0,0 +1,289 @@
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from .config import settings
+from ..models.token_revocation import TokenRevocation
+
+ACCESS_TOKEN = "access"
+REFRESH_TOKEN = "refresh"
+
+_HMAC_DIGESTS = {
+    "HS256": hashlib.sha256,
+    "HS384": hashlib.sha384,
+    "HS512": hashlib.sha512,
+}
+
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _compact_json(value) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def _timestamp(value: datetime) -> float:
+    """Seconds since the epoch for a naive UTC datetime."""
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class TokenVerifier:
+    """
+    Verifies JWTs against key material parsed once at startup.
+
+    HMAC-signed tokens are signed and checked directly with hmac, which
+    skips python-jose's per-call key construction and claim machinery and
+    keeps python-jose (and cryptography) out of startup entirely. Other
+    algorithms go through python-jose, imported and keyed on first use.
+    Only signature and time claims are checked here; revocation is checked
+    separately against the RevocationSet.
+    """
+
+    def __init__(self, secret: str, algorithm: str):
+        self.algorithm = algorithm
+        self._digest = _HMAC_DIGESTS.get(algorithm)
+        self._signing_secret = secret
+        self._secret = secret.encode("utf-8")
+        self._header_segment = _b64encode(_compact_json({"alg": algorithm, "typ": "JWT"}))
+        self._key = None
+
+    def _jose_key(self):
+        if self._key is None:
+            from jose import jwk
+
+            self._key = jwk.construct(self._signing_secret, self.algorithm)
+        return self._key
+
+    def encode(self, claims: dict) -> str:
+        if self._digest is None:
+            from jose import jwt
+
+            return jwt.encode(claims, self._signing_secret, algorithm=self.algorithm)
+        signing_input = f"{self._header_segment}.{_b64encode(_compact_json(claims))}"
+        signature = hmac.new(self._secret, signing_input.encode("ascii"), self._digest).digest()
+        return f"{signing_input}.{_b64encode(signature)}"
+
+    def verify(self, token: str, token_type: str = ACCESS_TOKEN) -> Optional[dict]:
+        """Return the token's claims, or None if it is invalid, expired or of another type."""
+        try:
+            claims = self._verified_claims(token)
+        except (ValueError, TypeError, UnicodeError):
+            return None
+        if not isinstance(claims, dict):
+            return None
+        now = time.time()
+        exp = claims.get("exp")
+        if not isinstance(exp, (int, float)) or exp <= now:
+            return None
+        nbf = claims.get("nbf")
+        if isinstance(nbf, (int, float)) and nbf > now:
+            return None
+        # Tokens issued before refresh tokens existed carry no type
+        if claims.get("type", ACCESS_TOKEN) != token_type:
+            return None
+        return claims
+
+    def _verified_claims(self, token: str):
+        if self._digest is None:
+            from jose import JWTError, jwt
+
+            try:
+                return jwt.decode(token, self._jose_key(), algorithms=[self.algorithm], options={"verify_exp": False})
+            except JWTError:
+                return None
+
+        header_segment, payload_segment, signature_segment = token.split(".")
+        header = json.loads(_b64decode(header_segment))
+        if not isinstance(header, dict) or header.get("alg") != self.algorithm:
+            return None
+        signing_input = f"{header_segment}.{payload_segment}".encode("ascii")
+        expected = hmac.new(self._secret, signing_input, self._digest).digest()
+        if not hmac.compare_digest(expected, _b64decode(signature_segment)):
+            return None
+        return json.loads(_b64decode(payload_segment))
+
+
+class RevocationSet:
+    """
+    In-memory view of the token_revocations table.
+
+    Holds revoked jtis and per-user "not before" timestamps, so checking a
+    token is two dictionary lookups. Revocations apply as soon as their
+    transaction commits: in this process directly, and in every other
+    worker through the shared state's token-revocations channel. A sync
+    from the table at most every TOKEN_REVOCATION_SYNC_SECONDS, and right
+    after the shared state reconnects, catches any message that was lost.
+    """
+
+    CHANNEL = "token-revocations"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        # jti -> expiry timestamp
+        self._jtis: Dict[str, float] = {}
+        # user_id -> (not_before timestamp, expiry timestamp)
+        self._not_before: Dict[int, tuple] = {}
+        self._synced_at: Optional[datetime] = None
+        self._synced_monotonic = 0.0
+        self._subscribed = False
+
+    def __contains__(self, jti: str) -> bool:
+        return jti in self._jtis
+
+    def is_revoked(self, claims: dict) -> bool:
+        jti = claims.get("jti")
+        if jti is not None and jti in self._jtis:
+            return True
+        entry = self._not_before.get(claims.get("uid"))
+        return entry is not None and claims.get("iat", 0) < entry[0]
+
+    def _add(self, jti: Optional[str], user_id: Optional[int], not_before: Optional[datetime], expires_at: datetime) -> None:
+        expires = _timestamp(expires_at)
+        with self._lock:
+            if jti is not None:
+                self._jtis[jti] = expires
+            if user_id is not None and not_before is not None:
+                current = self._not_before.get(user_id)
+                cutoff = _timestamp(not_before)
+                if current is None or cutoff > current[0]:
+                    self._not_before[user_id] = (cutoff, expires)
+
+    def _subscribe(self) -> None:
+        # Deferred to the first sync so importing this module never connects to the shared state
+        if self._subscribed:
+            return
+        from .shared_state import shared_state
+
+        with self._lock:
+            if self._subscribed:
+                return
+            self._subscribed = True
+        shared_state.subscribe(self.CHANNEL, self._apply_published)
+        shared_state.on_reset(self._sync_soon)
+
+    def _apply_published(self, message: List[list]) -> None:
+        for jti, user_id, not_before, expires_at in message:
+            self._add(
+                jti,
+                user_id,
+                datetime.fromisoformat(not_before) if not_before else None,
+                datetime.fromisoformat(expires_at)
+            )
+
+    def _sync_soon(self) -> None:
+        self._synced_monotonic = 0.0
+
+    def publish(self, committed: List[tuple]) -> None:
+        """Send committed revocations to the other workers."""
+        from .shared_state import shared_state
+
+        self._subscribe()
+        shared_state.publish(self.CHANNEL, [
+            [jti, user_id, not_before.isoformat() if not_before else None, expires_at.isoformat()]
+            for jti, user_id, not_before, expires_at in committed
+        ])
+
+    def _add_on_commit(self, db: Session, *revocation) -> None:
+        """Apply a revocation here once db commits; a rollback discards it."""
+        db.info.setdefault(_PENDING_KEY, []).append(revocation)
+
+    def revoke_token(self, db: Session, claims: dict) -> None:
+        """
+        Revoke a single token by jti. The caller commits.
+
+        jti is unique, so committing a second revocation of the same token
+        raises IntegrityError; refresh relies on that to detect reuse.
+        """
+        if claims.get("jti") is None:
+            return
+        expires_at = datetime.utcfromtimestamp(claims["exp"])
+        db.add(TokenRevocation(jti=claims["jti"], expires_at=expires_at))
+        self._add_on_commit(db, claims["jti"], None, None, expires_at)
+
+    def revoke_user(self, db: Session, user_id: int, connection=None) -> None:
+        """
+        Revoke every token issued to a user until now. The caller commits.
+
+        Inside flush events, where the session cannot execute, pass the
+        event's connection as well.
+        """
+        now = datetime.utcnow()
+        expires_at = now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        (connection if connection is not None else db).execute(
+            TokenRevocation.__table__.insert().values(
+                user_id=user_id, not_before=now, expires_at=expires_at, created_at=now
+            )
+        )
+        self._add_on_commit(db, None, user_id, now, expires_at)
+
+    def sync(self, db: Session) -> None:
+        """Load revocations recorded since the last sync (all of them on the first call)."""
+        # Listen first, so nothing committed during the load is missed
+        self._subscribe()
+        now = datetime.utcnow()
+        query = db.query(TokenRevocation).filter(TokenRevocation.expires_at > now)
+        if self._synced_at is not None:
+            # Overlap the previous window so rows from slow transactions are not missed
+            lookback = timedelta(seconds=settings.TOKEN_REVOCATION_SYNC_SECONDS * 2 + 30)
+            query = query.filter(TokenRevocation.created_at >= self._synced_at - lookback)
+        for row in query.all():
+            self._add(row.jti, row.user_id, row.not_before, row.expires_at)
+
+        cutoff = time.time()
+        with self._lock:
+            self._jtis = {jti: expires for jti, expires in self._jtis.items() if expires > cutoff}
+            self._not_before = {
+                user_id: entry for user_id, entry in self._not_before.items() if entry[1] > cutoff
+            }
+        self._synced_at = now
+        self._synced_monotonic = time.monotonic()
+
+    def maybe_sync(self, db: Session) -> None:
+        """Sync if the interval has elapsed; concurrent callers skip rather than wait."""
+        if time.monotonic() - self._synced_monotonic < settings.TOKEN_REVOCATION_SYNC_SECONDS:
+            return
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            self.sync(db)
+        finally:
+            self._sync_lock.release()
+
+    def prune(self, db: Session) -> int:
+        """Delete expired revocation rows. The caller commits."""
+        return db.query(TokenRevocation).filter(
+            TokenRevocation.expires_at <= datetime.utcnow()
+        ).delete(synchronize_session=False)
+
+
+token_verifier = TokenVerifier(settings.SECRET_KEY, settings.ALGORITHM)
+revocations = RevocationSet()
+
+_PENDING_KEY = "token_revocations"
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_revocations(session):
+    """Apply committed revocations here and in every other worker; rolled-back ones never reach the set."""
+    committed = session.info.pop(_PENDING_KEY, ())
+    for revocation in committed:
+        revocations._add(*revocation)
+    if committed:
+        revocations.publish(committed)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_revocations(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
@@ -1,9 +1,12 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from .core.database import init_db
 from .core.config import settings
-from .api import auth, appointments, doctors, patients, queue
+from .core.instrumentation import RequestMetricsMiddleware, bind_threadpool_limiter
+from .core.metrics import PROMETHEUS_CONTENT_TYPE, registry
+from .core.openapi import install_openapi
+from .core.routing import include_lazy_router
+from .core.startup import startup_profile
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -20,19 +23,89 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestMetricsMiddleware)
 
-# Include routers
-app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
-app.include_router(patients.router, prefix="/api/patients", tags=["Patients"])
-app.include_router(doctors.router, prefix="/api/doctors", tags=["Doctors"])
-app.include_router(appointments.router, prefix="/api/appointments", tags=["Appointments"])
-app.include_router(queue.router, prefix="/api/queue", tags=["Queue"])
+# Include routers; with LAZY_ROUTERS each is imported on the first request under its prefix
+include_lazy_router(app, "app.api.auth", prefix="/api/auth", tags=["Authentication"])
+include_lazy_router(app, "app.api.patients", prefix="/api/patients", tags=["Patients"])
+include_lazy_router(app, "app.api.doctors", prefix="/api/doctors", tags=["Doctors"])
+include_lazy_router(app, "app.api.appointments", prefix="/api/appointments", tags=["Appointments"])
+include_lazy_router(app, "app.api.queue", prefix="/api/queue", tags=["Queue"])
+include_lazy_router(app, "app.api.exports", prefix="/api/exports", tags=["Exports"])
+include_lazy_router(app, "app.api.analytics", prefix="/api/analytics", tags=["Analytics"])
+install_openapi(app)
+startup_profile.mark("import")
 
 
 @app.on_event("startup")
 def startup_event():
-    """Initialize database on startup."""
-    init_db()
+    """
+    Check the schema version and warm in-memory state on startup: slot
+    reservations, analytics rollups, queues, token revocations and the
+    patient search index.
+    
+    Schema changes are applied by `python -m app.migrate upgrade` before the
+    workers start, never by the workers themselves. Each step is timed in
+    the startup profile (STARTUP_PROFILE). The modules behind these steps
+    are imported here rather than with app.main, so importing the app stays
+    cheap; no router module is needed.
+    """
+    from .core.analytics import backfill_daily_stats
+    from .core.database import SessionLocal, engine
+    from .core.migrations import check_schema
+    from .core.patient_search import patient_search
+    from .core.queue_engine import queue_engine, service_times
+    from .core.slots import backfill_appointment_slots
+    from .core.tokens import revocations
+
+    with startup_profile.phase("schema_check"):
+        check_schema(engine)
+    db = SessionLocal()
+    try:
+        with startup_profile.phase("slot_backfill"):
+            backfill_appointment_slots(db)
+        with startup_profile.phase("analytics_backfill"):
+            backfill_daily_stats(db)
+        with startup_profile.phase("service_times"):
+            service_times.load(db)
+        with startup_profile.phase("token_revocations"):
+            revocations.prune(db)
+            db.commit()
+            revocations.sync(db)
+        with startup_profile.phase("queue_engine"):
+            queue_engine.load(db)
+        with startup_profile.phase("patient_search"):
+            patient_search.load(db)
+    finally:
+        db.close()
+    startup_profile.mark_ready()
+
+
+@app.on_event("startup")
+async def start_background_workers():
+    """Start background work on the server's event loop: threadpool gauges, notification dispatcher and reminders."""
+    bind_threadpool_limiter()
+    if settings.NOTIFICATIONS_ENABLED:
+        from .notifications import dispatcher, reminder_scheduler
+
+        dispatcher.start()
+        if settings.REMINDERS_ENABLED:
+            reminder_scheduler.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers and release pooled async and shared-state connections."""
+    from .core.database import dispose_async_engine
+    from .core.shared_state import shared_state
+
+    if settings.NOTIFICATIONS_ENABLED:
+        from .notifications import dispatcher, reminder_scheduler
+
+        await reminder_scheduler.stop()
+        await dispatcher.stop()
+    await dispose_async_engine()
+    shared_state.close()
 
 
 @app.get("/")
@@ -52,4 +125,10 @@ def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat()
-    }
\ No newline at end of file
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics endpoint."""
+    return Response(content=registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,5 @@
+"""Schema migration CLI: `python -m app.migrate upgrade|downgrade|current|check|history`."""
+from .core.migrations import main
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,11 @@
 from .user import User, UserRole
 from .patient import Patient
 from .doctor import Doctor
-from .appointment import Appointment, AppointmentStatus, AppointmentType
+from .appointment import Appointment, AppointmentSlot, AppointmentStatus, AppointmentType
 from .queue import QueueEntry, QueueStatus, QueuePriority
 from .notification import Notification, NotificationChannel, NotificationStatus
+from .token_revocation import TokenRevocation
+from .analytics import DailyDoctorStats
 
 __all__ = [
     "User",
@@ -12,6 +14,7 @@ __all__ = [
     "Patient",
     "Doctor",
     "Appointment",
+    "AppointmentSlot",
     "AppointmentStatus",
     "AppointmentType",
     "QueueEntry",
@@ -20,4 +23,6 @@ __all__ = [
     "Notification",
     "NotificationChannel",
     "NotificationStatus",
+    "TokenRevocation",
+    "DailyDoctorStats",
 ]
\ No newline at end of file
@@ -0,0 +1,56 @@
+from sqlalchemy import Column, Integer, Date, Float, ForeignKey, PrimaryKeyConstraint
+from ..core.database import Base
+
+# Additive counters kept per doctor per day; every metric is derived from these
+DAILY_STAT_COUNTERS = (
+    "booked",
+    "booked_minutes",
+    "completed",
+    "cancelled",
+    "no_show",
+    "checked_in",
+    "called",
+    "wait_minutes_total",
+    "served",
+    "timed_services",
+    "service_minutes_total",
+)
+
+
+class DailyDoctorStats(Base):
+    """
+    Per-doctor, per-day rollup of appointment and queue activity.
+
+    Appointment counters are attributed to the day of the appointment and
+    queue counters to the day of the appointment they belong to. Rows are
+    adjusted in the same transaction as each status transition, so analytics
+    reads never scan appointments or queue entries.
+    """
+
+    __tablename__ = "daily_doctor_stats"
+
+    doctor_id = Column(Integer, ForeignKey("doctors.doctor_id"), nullable=False)
+    # Indexed for clinic-wide date range reads, which have no doctor_id
+    day = Column(Date, nullable=False, index=True)
+    # Appointments not cancelled, and the minutes they book
+    booked = Column(Integer, nullable=False, default=0)
+    booked_minutes = Column(Integer, nullable=False, default=0)
+    # Appointment outcomes
+    completed = Column(Integer, nullable=False, default=0)
+    cancelled = Column(Integer, nullable=False, default=0)
+    no_show = Column(Integer, nullable=False, default=0)
+    # Queue: check-ins, calls with the wait before them, completed visits
+    checked_in = Column(Integer, nullable=False, default=0)
+    called = Column(Integer, nullable=False, default=0)
+    wait_minutes_total = Column(Float, nullable=False, default=0.0)
+    served = Column(Integer, nullable=False, default=0)
+    # Completed visits that were called first, so have a service time
+    timed_services = Column(Integer, nullable=False, default=0)
+    service_minutes_total = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("doctor_id", "day"),
+    )
+
+    def __repr__(self):
+        return f"<DailyDoctorStats(doctor={self.doctor_id}, day='{self.day}')>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Text, Index
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Text, Index, PrimaryKeyConstraint, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -15,6 +15,14 @@ class AppointmentStatus(str, enum.Enum):
     NO_SHOW = "no_show"
 
 
+# Statuses that hold a doctor's time slot
+ACTIVE_APPOINTMENT_STATUSES = (
+    AppointmentStatus.SCHEDULED,
+    AppointmentStatus.CHECKED_IN,
+    AppointmentStatus.IN_PROGRESS,
+)
+
+
 class AppointmentType(str, enum.Enum):
     """Enumeration for appointment types."""
     CONSULTATION = "consultation"
@@ -47,11 +55,46 @@ class Appointment(Base):
     creator = relationship("User", foreign_keys=[created_by])
     notifications = relationship("Notification", back_populates="appointment")
     queue_entry = relationship("QueueEntry", back_populates="appointment", uselist=False)
+    slots = relationship("AppointmentSlot", back_populates="appointment", cascade="all, delete-orphan")
     
-    # Composite index for efficient queries
+    # Composite indexes for efficient queries; benchmarks/explain_check.py
+    # fails if one of the hot queries stops using them
     __table_args__ = (
         Index('idx_doctor_date', 'doctor_id', 'appointment_date'),
+        Index('idx_patient_date', 'patient_id', 'appointment_date'),
+        Index('idx_doctor_status_date', 'doctor_id', 'status', 'appointment_date'),
+        # Partial: reminder scans only ever look at scheduled appointments
+        Index(
+            'idx_scheduled_date', 'appointment_date',
+            sqlite_where=text("status = 'SCHEDULED'"),
+            postgresql_where=text("status = 'SCHEDULED'")
+        ),
+    )
+    
+    def __repr__(self):
+        return f"<Appointment(id={self.appointment_id}, patient={self.patient_id}, doctor={self.doctor_id}, date='{self.appointment_date}')>"
+
+
+class AppointmentSlot(Base):
+    """
+    Reservation of one fixed-width time slot on a doctor's calendar.
+    
+    The (doctor_id, slot_start) primary key makes double booking fail
+    atomically at insert time and doubles as the index for overlap probes.
+    """
+    
+    __tablename__ = "appointment_slots"
+    
+    doctor_id = Column(Integer, ForeignKey("doctors.doctor_id"), nullable=False)
+    slot_start = Column(DateTime, nullable=False)
+    appointment_id = Column(Integer, ForeignKey("appointments.appointment_id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    # Relationships
+    appointment = relationship("Appointment", back_populates="slots")
+    
+    __table_args__ = (
+        PrimaryKeyConstraint('doctor_id', 'slot_start', name='pk_appointment_slots'),
     )
     
     def __repr__(self):
-        return f"<Appointment(id={self.appointment_id}, patient={self.patient_id}, doctor={self.doctor_id}, date='{self.appointment_date}')>"
\ No newline at end of file
+        return f"<AppointmentSlot(doctor={self.doctor_id}, start='{self.slot_start}', appointment={self.appointment_id})>"
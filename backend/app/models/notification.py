@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Text, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -35,10 +35,25 @@ class Notification(Base):
     sent_at = Column(DateTime, nullable=True)
     delivered_at = Column(DateTime, nullable=True)
     error_message = Column(Text, nullable=True)
+    # A dispatcher worker holds the row until then, while sending it or
+    # through a retry's backoff
+    claimed_until = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     appointment = relationship("Appointment", back_populates="notifications")
     
+    __table_args__ = (
+        # Reminder dedup looks up sent templates per appointment
+        Index('idx_notification_appointment_template', 'appointment_id', 'template_name'),
+        # Partial: the dispatcher claims pending rows in id order, and only
+        # the pending backlog needs to be in the index
+        Index(
+            'idx_notification_pending', 'notification_id',
+            sqlite_where=text("status = 'PENDING'"),
+            postgresql_where=text("status = 'PENDING'")
+        ),
+    )
+    
     def __repr__(self):
         return f"<Notification(id={self.notification_id}, channel='{self.channel}', status='{self.status}')>"
\ No newline at end of file
@@ -3,6 +3,10 @@ from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..core.database import Base
 
+# Self-registered patients get a unique placeholder number with this prefix
+# until they enter a real one
+PLACEHOLDER_CONTACT_PREFIX = "000-"
+
 
 class Patient(Base):
     """Patient model representing clinic patients."""
@@ -19,7 +23,8 @@ class Patient(Base):
     medical_history = Column(Text, nullable=True)
     consent_flag = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Indexed for the search index's incremental sync
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relationships
     appointments = relationship("Appointment", back_populates="patient")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -39,5 +39,11 @@ class QueueEntry(Base):
     # Relationships
     appointment = relationship("Appointment", back_populates="queue_entry")
     
+    # Every queue read filters on status: active queues, the waiting rows the
+    # engine warms from, and the latest completed visits by completed_time
+    __table_args__ = (
+        Index('idx_queue_status_completed', 'status', 'completed_time'),
+    )
+    
     def __repr__(self):
         return f"<QueueEntry(id={self.queue_id}, appointment={self.appointment_id}, status='{self.status}')>"
\ No newline at end of file
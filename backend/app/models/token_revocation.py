@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from datetime import datetime
+from ..core.database import Base
+
+
+class TokenRevocation(Base):
+    """
+    Revoked tokens, shared between workers.
+
+    A row either revokes a single token by jti, or revokes every token of a
+    user issued before not_before. Rows can be pruned once expires_at has
+    passed, since any token they cover has expired by then.
+    """
+
+    __tablename__ = "token_revocations"
+
+    revocation_id = Column(Integer, primary_key=True, index=True)
+    # Unique: a second revocation of the same token fails, which is how a
+    # reused refresh token is detected even when two refreshes race
+    jti = Column(String(64), nullable=True, unique=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.user_id"), nullable=True)
+    not_before = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<TokenRevocation(id={self.revocation_id}, jti='{self.jti}', user={self.user_id})>"
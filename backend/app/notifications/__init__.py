@@ -0,0 +1,23 @@
+# Notifications package
+from .adapters import ChannelAdapter, DeliveryResult, FakeAdapter, LogAdapter, build_adapter
+from .dispatcher import NotificationDispatcher, dispatcher
+from .events import (
+    TEMPLATES,
+    enqueue_appointment_event,
+)
+from .reminders import REMINDERS, ReminderScheduler, reminder_scheduler
+
+__all__ = [
+    "ChannelAdapter",
+    "DeliveryResult",
+    "FakeAdapter",
+    "LogAdapter",
+    "build_adapter",
+    "NotificationDispatcher",
+    "dispatcher",
+    "TEMPLATES",
+    "enqueue_appointment_event",
+    "REMINDERS",
+    "ReminderScheduler",
+    "reminder_scheduler",
+]
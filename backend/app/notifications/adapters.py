@@ -0,0 +1,71 @@
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+from ..models.notification import NotificationChannel
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DeliveryResult:
+    """Outcome of handing one notification to a channel provider."""
+    delivered: bool = False
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class ChannelAdapter:
+    """
+    Sends notifications through one provider.
+    
+    Implementations should raise (or return an error result) for failures
+    worth retrying; the dispatcher handles backoff and rate limiting.
+    """
+
+    async def send(self, channel: NotificationChannel, recipient: str, message: str) -> DeliveryResult:
+        raise NotImplementedError
+
+
+class LogAdapter(ChannelAdapter):
+    """Writes notifications to the application log instead of a provider."""
+
+    async def send(self, channel, recipient, message):
+        logger.info("notification via %s to %s: %s", channel.value, recipient, message)
+        return DeliveryResult(delivered=False)
+
+
+class FakeAdapter(ChannelAdapter):
+    """
+    In-memory adapter for tests and local development.
+    
+    Records every send (bounded) and can be told to fail the next N sends.
+    """
+
+    def __init__(self, history: int = 1000):
+        self.sent = deque(maxlen=history)
+        self.fail_next = 0
+
+    async def send(self, channel, recipient, message):
+        if self.fail_next > 0:
+            self.fail_next -= 1
+            return DeliveryResult(error="simulated provider failure")
+        self.sent.append((channel, recipient, message))
+        return DeliveryResult(delivered=True)
+
+
+_ADAPTERS = {
+    "log": LogAdapter,
+    "fake": FakeAdapter,
+}
+
+
+def build_adapter(name: str) -> ChannelAdapter:
+    """Create an adapter by its NOTIFICATION_ADAPTER name."""
+    try:
+        return _ADAPTERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown notification adapter '{name}'. Choose from: {', '.join(sorted(_ADAPTERS))}")
@@ -0,0 +1,228 @@
+import asyncio
+import logging
+import random
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..core.shared_state import SharedState, shared_state
+from ..models.notification import Notification, NotificationChannel, NotificationStatus
+from .adapters import ChannelAdapter, DeliveryResult, build_adapter
+
+logger = logging.getLogger(__name__)
+
+# Shared attempt counters outlive any backoff; they are dropped once a row is sent or failed
+ATTEMPTS_TTL_SECONDS = 24 * 3600
+
+
+def parse_rate_limits(spec: str) -> Dict[NotificationChannel, float]:
+    """Parse "sms:5,email:20" into sends-per-second per channel."""
+    limits = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        channel, _, rate = item.partition(":")
+        limits[NotificationChannel(channel.strip())] = float(rate)
+    return limits
+
+
+def unclaimed_filter(now: datetime):
+    """Rows no worker holds a live claim on, for delivery or a retry backoff."""
+    return or_(Notification.claimed_until.is_(None), Notification.claimed_until <= now)
+
+
+def claimable_query(db: Session, now: datetime, skip=()):
+    """The next batch of due PENDING rows, leaving out ids in skip."""
+    query = db.query(
+        Notification.notification_id,
+        Notification.channel,
+        Notification.recipient,
+        Notification.message
+    ).filter(Notification.status == NotificationStatus.PENDING, unclaimed_filter(now))
+    if skip:
+        query = query.filter(Notification.notification_id.notin_(skip))
+    return query.order_by(Notification.notification_id).limit(settings.NOTIFICATION_BATCH_SIZE)
+
+
+class TokenBucket:
+    """
+    Async token bucket allowing `rate` acquisitions per second with a burst
+    of `capacity`. The bucket lives in the shared state under `key`, so the
+    limit holds across every worker rather than per process.
+    """
+
+    def __init__(self, key: str, rate: float, capacity: float = None, state: SharedState = None):
+        self.key = key
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.state = state or shared_state
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                wait = await asyncio.to_thread(self.state.take_token, self.key, self.rate, self.capacity)
+                if wait <= 0:
+                    return
+                await asyncio.sleep(wait)
+
+
+class NotificationDispatcher:
+    """
+    Background outbox worker that delivers PENDING notifications.
+    
+    Claims pending rows in batches, sends them through the channel adapter
+    with bounded concurrency and per-channel rate limits, and retries
+    failures with exponential backoff.
+
+    With several workers, each row is claimed in the database before it is
+    sent: a conditional UPDATE sets claimed_until only while the row is
+    still PENDING and unclaimed, so a row another worker has sent, or holds
+    for a retry's backoff, is never taken again. Attempt counts live in the
+    shared state; with the in-memory backend a restart gives undelivered
+    rows a fresh set of attempts.
+    """
+
+    def __init__(self, adapter: ChannelAdapter = None):
+        self.adapter = adapter
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._in_flight: set = set()
+        self._buckets: Dict[NotificationChannel, TokenBucket] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+
+    # Lifecycle
+
+    def start(self) -> None:
+        """Start the worker on the running event loop."""
+        if self._task is not None:
+            return
+        if self.adapter is None:
+            self.adapter = build_adapter(settings.NOTIFICATION_ADAPTER)
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(settings.NOTIFICATION_CONCURRENCY)
+        self._buckets = {
+            channel: TokenBucket(f"notification-rate:{channel.value}", rate)
+            for channel, rate in parse_rate_limits(settings.NOTIFICATION_RATE_LIMITS).items()
+        }
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the worker; undelivered rows stay PENDING for the next start."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def notify(self) -> None:
+        """Wake the worker after new notifications commit. Safe from any thread."""
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    # Worker
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                claimed = await self.run_once()
+            except Exception:
+                logger.exception("notification dispatch cycle failed")
+                claimed = 0
+            if claimed >= settings.NOTIFICATION_BATCH_SIZE:
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), settings.NOTIFICATION_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def run_once(self) -> int:
+        """Claim and deliver one batch. Returns the number of rows claimed."""
+        batch = await asyncio.to_thread(self._claim_batch)
+        if batch:
+            await asyncio.gather(*(self._deliver(item) for item in batch))
+        return len(batch)
+
+    def _claim_batch(self) -> List[dict]:
+        """Claim due PENDING rows that no worker is delivering or holding for a retry."""
+        now = datetime.utcnow()
+        claimed_until = now + timedelta(seconds=settings.NOTIFICATION_CLAIM_SECONDS)
+        unclaimed = unclaimed_filter(now)
+        with self._lock:
+            skip = set(self._in_flight)
+        db = SessionLocal()
+        try:
+            rows = claimable_query(db, now, skip).all()
+            # Re-checked by the UPDATE itself: a row another worker claimed or
+            # sent since the read matches nothing and is left to it
+            rows = [
+                row for row in rows
+                if db.query(Notification).filter(
+                    Notification.notification_id == row.notification_id,
+                    Notification.status == NotificationStatus.PENDING,
+                    unclaimed
+                ).update({Notification.claimed_until: claimed_until}, synchronize_session=False)
+            ]
+            db.commit()
+        finally:
+            db.close()
+        with self._lock:
+            self._in_flight.update(row.notification_id for row in rows)
+        return [row._asdict() for row in rows]
+
+    async def _deliver(self, item: dict) -> None:
+        notification_id = item["notification_id"]
+        try:
+            async with self._semaphore:
+                bucket = self._buckets.get(item["channel"])
+                if bucket is not None:
+                    await bucket.acquire()
+                try:
+                    result = await self.adapter.send(item["channel"], item["recipient"], item["message"])
+                except Exception as exc:
+                    result = DeliveryResult(error=f"{type(exc).__name__}: {exc}")
+            await asyncio.to_thread(self._record, notification_id, result)
+        finally:
+            with self._lock:
+                self._in_flight.discard(notification_id)
+
+    def _record(self, notification_id: int, result: DeliveryResult) -> None:
+        """Persist a delivery outcome, scheduling a retry or giving up."""
+        now = datetime.utcnow()
+        attempts_key = f"notification-attempts:{notification_id}"
+        values = {"claimed_until": None}
+        if result.ok:
+            values.update(status=NotificationStatus.SENT, sent_at=now, error_message=None)
+            if result.delivered:
+                values.update(status=NotificationStatus.DELIVERED, delivered_at=now)
+            shared_state.delete(attempts_key)
+        else:
+            attempts = shared_state.incr(attempts_key, ttl=ATTEMPTS_TTL_SECONDS)
+            if attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+                shared_state.delete(attempts_key)
+                values["status"] = NotificationStatus.FAILED
+            else:
+                delay = settings.NOTIFICATION_RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+                # Keep every worker off the row until its backoff is over
+                values["claimed_until"] = now + timedelta(seconds=delay * random.uniform(0.8, 1.2))
+            values["error_message"] = result.error
+        db = SessionLocal()
+        try:
+            db.query(Notification).filter(
+                Notification.notification_id == notification_id
+            ).update(values, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+dispatcher = NotificationDispatcher()
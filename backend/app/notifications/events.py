@@ -0,0 +1,52 @@
+from typing import Optional
+from sqlalchemy.orm import Session
+from ..core.config import settings
+from ..models.appointment import Appointment
+from ..models.notification import Notification, NotificationChannel
+
+# Message templates keyed by Notification.template_name
+TEMPLATES = {
+    "appointment_created": "Hello {name}, your appointment with {doctor} is booked for {when}.",
+    "appointment_rescheduled": "Hello {name}, your appointment with {doctor} has moved to {when}.",
+    "appointment_cancelled": "Hello {name}, your appointment with {doctor} on {when} has been cancelled.",
+    "queue_called": "Hello {name}, {doctor} is ready to see you now{room}.",
+    "reminder_24h": "Reminder: {name}, you have an appointment with {doctor} on {when}.",
+    "reminder_1h": "Reminder: {name}, your appointment with {doctor} starts in one hour at {when}{room}.",
+}
+
+
+def _recipient(appointment: Appointment, channel: NotificationChannel):
+    """Pick the patient's address for a channel, falling back to SMS."""
+    patient = appointment.patient
+    if channel == NotificationChannel.EMAIL and patient.email:
+        return channel, patient.email
+    return (channel if channel != NotificationChannel.EMAIL else NotificationChannel.SMS), patient.contact_number
+
+
+def enqueue_appointment_event(db: Session, appointment: Appointment, template_name: str) -> Optional[Notification]:
+    """
+    Add a PENDING notification for an appointment event to the session.
+    
+    The row commits with the caller's transaction (outbox pattern); delivery
+    happens later in the dispatcher, never in the request. Returns None when
+    the appointment has no patient or doctor record to address.
+    """
+    if appointment.patient is None or appointment.doctor is None:
+        return None
+    channel, recipient = _recipient(appointment, NotificationChannel(settings.NOTIFICATION_DEFAULT_CHANNEL))
+    doctor = appointment.doctor
+    message = TEMPLATES[template_name].format(
+        name=appointment.patient.full_name,
+        doctor=doctor.full_name,
+        when=appointment.appointment_date.strftime("%Y-%m-%d %H:%M"),
+        room=f" in room {doctor.room_number}" if doctor.room_number else "",
+    )
+    notification = Notification(
+        appointment_id=appointment.appointment_id,
+        channel=channel,
+        template_name=template_name,
+        message=message,
+        recipient=recipient,
+    )
+    db.add(notification)
+    return notification
@@ -0,0 +1,258 @@
+import asyncio
+import heapq
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..core.shared_state import shared_state
+from ..models.appointment import Appointment, AppointmentStatus
+from ..models.notification import Notification
+from .dispatcher import dispatcher
+from .events import enqueue_appointment_event
+
+logger = logging.getLogger(__name__)
+
+# Reminder template -> lead time before the appointment, longest lead first
+REMINDERS: List[Tuple[str, timedelta]] = [
+    ("reminder_24h", timedelta(hours=24)),
+    ("reminder_1h", timedelta(hours=1)),
+]
+
+# How long a worker's claim on writing one reminder keeps the others off it;
+# after its commit the Notification row itself marks the reminder as sent
+REMINDER_CLAIM_SECONDS = 3600
+
+
+def reminder_window_query(db: Session, window_start: datetime, horizon_end: datetime):
+    """SCHEDULED appointments starting in [window_start, horizon_end)."""
+    return db.query(Appointment.appointment_id, Appointment.appointment_date).filter(
+        Appointment.appointment_date >= window_start,
+        Appointment.appointment_date < horizon_end,
+        Appointment.status == AppointmentStatus.SCHEDULED
+    )
+
+
+def sent_reminders_query(db: Session, appointment_ids: List[int]):
+    """Reminder notifications already written for the appointments."""
+    return db.query(Notification.appointment_id, Notification.template_name).filter(
+        Notification.appointment_id.in_(appointment_ids),
+        Notification.template_name.in_([name for name, _ in REMINDERS])
+    )
+
+
+class ReminderScheduler:
+    """
+    Time-ordered heap of pending appointment reminders.
+
+    Upcoming SCHEDULED appointments are loaded from the appointment_date
+    index one horizon window at a time, never by scanning the whole table.
+    Handlers call schedule()/cancel() after committing changes; superseded
+    heap entries are skipped lazily via a per-appointment version number.
+    When a reminder falls due, a Notification row is written for the
+    dispatcher to deliver.
+
+    Every worker runs a scheduler over the same appointments, so a due
+    reminder is checked against the appointment's current time and claimed
+    in the shared state before it is written; one worker writes it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._heap: List[Tuple[datetime, int, int, str]] = []
+        self._versions: Dict[int, int] = {}
+        self._horizon_end: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    # Heap maintenance
+
+    def _push_locked(self, appointment_id: int, appointment_date: datetime, sent: frozenset = frozenset()) -> None:
+        version = self._versions.get(appointment_id, 0) + 1
+        self._versions[appointment_id] = version
+        for template_name, lead in REMINDERS:
+            if template_name not in sent:
+                heapq.heappush(self._heap, (appointment_date - lead, appointment_id, version, template_name))
+
+    def schedule(self, appointment_id: int, appointment_date: datetime, status: AppointmentStatus) -> None:
+        """(Re)schedule reminders for an appointment after it is created or changed."""
+        with self._lock:
+            if status != AppointmentStatus.SCHEDULED:
+                self._versions.pop(appointment_id, None)
+            elif self._horizon_end is None or appointment_date < self._horizon_end:
+                self._push_locked(appointment_id, appointment_date)
+            else:
+                # Beyond the loaded window; the next horizon scan picks it up
+                self._versions.pop(appointment_id, None)
+        self._notify()
+
+    def cancel(self, appointment_id: int) -> None:
+        """Drop every pending reminder for an appointment."""
+        with self._lock:
+            self._versions.pop(appointment_id, None)
+
+    def pending(self) -> int:
+        """Number of appointments with live reminders."""
+        with self._lock:
+            return len(self._versions)
+
+    def _notify(self) -> None:
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    # Loading
+
+    def load_window(self, db: Session, now: datetime) -> int:
+        """
+        Load SCHEDULED appointments whose reminders fall before the new
+        horizon. Only the appointment_date slice past the previous horizon
+        is queried.
+        """
+        # Horizon in appointment time: reminders due within REMINDER_HORIZON_HOURS
+        horizon_end = now + timedelta(hours=settings.REMINDER_HORIZON_HOURS) + REMINDERS[0][1]
+        with self._lock:
+            window_start = max(self._horizon_end or now, now)
+        if window_start >= horizon_end:
+            return 0
+        rows = reminder_window_query(db, window_start, horizon_end).all()
+        sent = self._sent_reminders(db, [row.appointment_id for row in rows])
+        with self._lock:
+            for row in rows:
+                if row.appointment_id not in self._versions:
+                    self._push_locked(row.appointment_id, row.appointment_date, sent.get(row.appointment_id, frozenset()))
+            self._horizon_end = horizon_end
+        return len(rows)
+
+    @staticmethod
+    def _sent_reminders(db: Session, appointment_ids: List[int]) -> Dict[int, frozenset]:
+        """Reminder templates already written for each appointment."""
+        if not appointment_ids:
+            return {}
+        sent: Dict[int, set] = {}
+        for row in sent_reminders_query(db, appointment_ids):
+            sent.setdefault(row.appointment_id, set()).add(row.template_name)
+        return {key: frozenset(value) for key, value in sent.items()}
+
+    # Firing
+
+    def pop_due(self, now: datetime) -> List[Tuple[int, str]]:
+        """Remove and return every live reminder due at or before now."""
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, appointment_id, version, template_name = heapq.heappop(self._heap)
+                if self._versions.get(appointment_id) == version:
+                    due.append((appointment_id, template_name))
+        return due
+
+    def next_due(self) -> Optional[datetime]:
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def fire(self, due: List[Tuple[int, str]], now: datetime) -> int:
+        """Write Notification rows for due reminders. Returns the number written."""
+        if not due:
+            return 0
+        db = SessionLocal()
+        written = 0
+        claimed = []
+        try:
+            appointments = {
+                appointment.appointment_id: appointment
+                for appointment in db.query(Appointment).filter(
+                    Appointment.appointment_id.in_({appointment_id for appointment_id, _ in due})
+                )
+            }
+            already_sent = self._sent_reminders(db, list(appointments))
+            for appointment_id, template_name in due:
+                appointment = appointments.get(appointment_id)
+                if appointment is None or appointment.status != AppointmentStatus.SCHEDULED:
+                    continue
+                if appointment.appointment_date <= now:
+                    continue
+                if template_name in already_sent.get(appointment_id, frozenset()):
+                    continue
+                # A missed longer-lead reminder is superseded by a shorter one that is also due
+                current_lead = dict(REMINDERS)[template_name]
+                if appointment.appointment_date - current_lead > now:
+                    # Moved later since this entry was pushed, possibly by another worker
+                    continue
+                if appointment.created_at is not None and appointment.appointment_date - current_lead < appointment.created_at:
+                    # Booked after this reminder was due (e.g. later the same day); the
+                    # booking notification already covered it
+                    continue
+                if any(
+                    lead < current_lead and appointment.appointment_date - lead <= now
+                    for _, lead in REMINDERS
+                ):
+                    continue
+                claim_key = f"reminder:{appointment_id}:{template_name}"
+                if not shared_state.claim(claim_key, REMINDER_CLAIM_SECONDS):
+                    continue
+                claimed.append(claim_key)
+                if enqueue_appointment_event(db, appointment, template_name) is not None:
+                    written += 1
+            db.commit()
+        except Exception:
+            for claim_key in claimed:
+                shared_state.delete(claim_key)
+            raise
+        finally:
+            db.close()
+        if written:
+            dispatcher.notify()
+        return written
+
+    # Lifecycle
+
+    def start(self) -> None:
+        """Start the reminder loop on the running event loop."""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def _load_window_with_session(self, now: datetime) -> int:
+        db = SessionLocal()
+        try:
+            return self.load_window(db, now)
+        finally:
+            db.close()
+
+    async def _run(self) -> None:
+        rescan_every = timedelta(minutes=settings.REMINDER_RESCAN_MINUTES)
+        next_scan = datetime.utcnow()
+        while True:
+            try:
+                now = datetime.utcnow()
+                if now >= next_scan:
+                    await asyncio.to_thread(self._load_window_with_session, now)
+                    next_scan = now + rescan_every
+                await asyncio.to_thread(self.fire, self.pop_due(now), now)
+            except Exception:
+                logger.exception("reminder cycle failed")
+            next_due = self.next_due()
+            wake_at = min(next_scan, next_due) if next_due else next_scan
+            timeout = max((wake_at - datetime.utcnow()).total_seconds(), 0.05)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+
+reminder_scheduler = ReminderScheduler()
@@ -0,0 +1,19 @@
+# Response schemas package
+from .common import parse_expand
+from .appointment import AppointmentOut, AppointmentPage, DoctorSummary, PatientSummary, serialize_appointment
+from .queue import QueueEntryOut, serialize_queue_entry
+from .analytics import DailyStatsOut, DoctorStatsOut, clinic_stats
+
+__all__ = [
+    "parse_expand",
+    "AppointmentOut",
+    "AppointmentPage",
+    "DoctorSummary",
+    "PatientSummary",
+    "serialize_appointment",
+    "QueueEntryOut",
+    "serialize_queue_entry",
+    "DailyStatsOut",
+    "DoctorStatsOut",
+    "clinic_stats",
+]
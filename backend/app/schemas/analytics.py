@@ -0,0 +1,62 @@
+from datetime import date
+from typing import Optional
+from pydantic import BaseModel
+from ..core.config import settings
+
+
+class ClinicStatsOut(BaseModel):
+    """Counters from the daily rollups and the metrics derived from them."""
+
+    doctor_id: int
+    booked: int
+    booked_minutes: int
+    completed: int
+    cancelled: int
+    no_show: int
+    checked_in: int
+    called: int
+    served: int
+    # booked_minutes over the clinic's opening hours
+    utilization: Optional[float] = None
+    no_show_rate: Optional[float] = None
+    average_wait_minutes: Optional[float] = None
+    average_service_minutes: Optional[float] = None
+    # Completed queue visits
+    throughput: int
+
+
+class DailyStatsOut(ClinicStatsOut):
+    """Rollup for one doctor on one day."""
+
+    day: date
+
+
+class DoctorStatsOut(ClinicStatsOut):
+    """Rollups for one doctor summed over a date range."""
+
+    days: int
+
+
+def _ratio(numerator: float, denominator: float) -> Optional[float]:
+    return round(numerator / denominator, 4) if denominator else None
+
+
+def clinic_stats(counters, days: int = 1) -> dict:
+    """Derive metrics from summed rollup counters over `days` working days."""
+    clinic_minutes = (settings.CLINIC_CLOSE_HOUR - settings.CLINIC_OPEN_HOUR) * 60 * days
+    return {
+        "doctor_id": counters.doctor_id,
+        "booked": counters.booked,
+        "booked_minutes": counters.booked_minutes,
+        "completed": counters.completed,
+        "cancelled": counters.cancelled,
+        "no_show": counters.no_show,
+        "checked_in": counters.checked_in,
+        "called": counters.called,
+        "served": counters.served,
+        "utilization": _ratio(counters.booked_minutes, clinic_minutes),
+        "no_show_rate": _ratio(counters.no_show, counters.booked),
+        "average_wait_minutes": _ratio(counters.wait_minutes_total, counters.called),
+        "average_service_minutes": _ratio(counters.service_minutes_total, counters.timed_services),
+        "throughput": counters.served,
+    }
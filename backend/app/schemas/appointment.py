@@ -0,0 +1,86 @@
+from datetime import datetime
+from typing import List, Optional, Set
+from pydantic import BaseModel, ConfigDict
+from ..models.appointment import Appointment, AppointmentStatus, AppointmentType
+from ..models.queue import QueuePriority, QueueStatus
+
+
+class PatientSummary(BaseModel):
+    """Patient fields embedded in expanded responses."""
+    model_config = ConfigDict(from_attributes=True)
+    
+    patient_id: int
+    full_name: str
+    contact_number: str
+    email: Optional[str] = None
+
+
+class DoctorSummary(BaseModel):
+    """Doctor fields embedded in expanded responses."""
+    model_config = ConfigDict(from_attributes=True)
+    
+    doctor_id: int
+    full_name: str
+    specialization: str
+    room_number: Optional[str] = None
+
+
+class QueueEntrySummary(BaseModel):
+    """Queue fields embedded in expanded appointment responses."""
+    model_config = ConfigDict(from_attributes=True)
+    
+    queue_id: int
+    status: Optional[QueueStatus] = None
+    priority: Optional[QueuePriority] = None
+    position: Optional[int] = None
+    estimated_wait_minutes: Optional[int] = None
+    check_in_time: datetime
+
+
+class AppointmentOut(BaseModel):
+    """
+    Appointment response. Relation fields are only present when requested
+    via expand, so serialization never triggers lazy loads.
+    """
+    model_config = ConfigDict(from_attributes=True)
+    
+    appointment_id: int
+    patient_id: int
+    doctor_id: int
+    appointment_date: datetime
+    end_time: datetime
+    appointment_type: AppointmentType
+    status: Optional[AppointmentStatus] = None
+    reason: Optional[str] = None
+    notes: Optional[str] = None
+    created_by: int
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    patient: Optional[PatientSummary] = None
+    doctor: Optional[DoctorSummary] = None
+    queue_entry: Optional[QueueEntrySummary] = None
+
+
+class AppointmentPage(BaseModel):
+    """One page of appointments from keyset pagination."""
+    items: List[AppointmentOut]
+    next_cursor: Optional[str] = None
+
+
+# Column fields copied onto AppointmentOut; relations are handled separately
+_APPOINTMENT_COLUMNS = [column.key for column in Appointment.__table__.columns]
+
+
+def serialize_appointment(appointment: Appointment, expand: Set[str] = frozenset()) -> AppointmentOut:
+    """Build an AppointmentOut, reading only relations named in expand."""
+    data = {key: getattr(appointment, key) for key in _APPOINTMENT_COLUMNS}
+    if "patient" in expand:
+        data["patient"] = PatientSummary.model_validate(appointment.patient)
+    if "doctor" in expand:
+        data["doctor"] = DoctorSummary.model_validate(appointment.doctor)
+    if "queue_entry" in expand:
+        data["queue_entry"] = (
+            QueueEntrySummary.model_validate(appointment.queue_entry)
+            if appointment.queue_entry is not None else None
+        )
+    return AppointmentOut(**data)
@@ -0,0 +1,21 @@
+from typing import FrozenSet, Optional, Set
+from fastapi import HTTPException
+
+
+def parse_expand(expand: Optional[str], allowed: FrozenSet[str]) -> Set[str]:
+    """
+    Parse a comma-separated expand parameter.
+    
+    Raises:
+        HTTPException: 400 if an unknown relation is requested
+    """
+    if not expand:
+        return set()
+    requested = {name.strip() for name in expand.split(",") if name.strip()}
+    unknown = requested - allowed
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot expand {', '.join(sorted(unknown))}. Allowed: {', '.join(sorted(allowed))}"
+        )
+    return requested
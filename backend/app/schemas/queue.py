@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Optional, Set
+from pydantic import BaseModel, ConfigDict
+from ..models.queue import QueueEntry, QueuePriority, QueueStatus
+from .appointment import AppointmentOut, serialize_appointment
+
+
+class QueueEntryOut(BaseModel):
+    """
+    Queue entry response. The appointment (and its patient/doctor) is only
+    present when requested via expand.
+    """
+    model_config = ConfigDict(from_attributes=True)
+    
+    queue_id: int
+    appointment_id: int
+    check_in_time: datetime
+    priority: Optional[QueuePriority] = None
+    position: Optional[int] = None
+    status: Optional[QueueStatus] = None
+    called_time: Optional[datetime] = None
+    completed_time: Optional[datetime] = None
+    estimated_wait_minutes: Optional[int] = None
+    appointment: Optional[AppointmentOut] = None
+
+
+_QUEUE_COLUMNS = [column.key for column in QueueEntry.__table__.columns]
+
+
+def serialize_queue_entry(entry: QueueEntry, expand: Set[str] = frozenset()) -> QueueEntryOut:
+    """Build a QueueEntryOut, reading only relations named in expand."""
+    data = {key: getattr(entry, key) for key in _QUEUE_COLUMNS}
+    if "appointment" in expand or expand & {"patient", "doctor"}:
+        data["appointment"] = serialize_appointment(entry.appointment, expand - {"appointment"})
+    return QueueEntryOut(**data)
@@ -0,0 +1,175 @@
+"""
+Measure a worker's cold start: time from process start to first response.
+
+Modes:
+    eager             every router imported with app.main, OpenAPI generated
+                      on first /openapi.json (the previous setup)
+    lazy              routers imported on the first request under their prefix
+    lazy_precompiled  lazy routers plus the OpenAPI document written at build
+                      time (the deployed configuration)
+
+Each run is a fresh interpreter that imports app.main, runs the startup
+steps and serves one request in-process, then reports the app's startup
+profile (app.core.startup). The medians per mode are printed as JSON; with
+--target-ms the command exits non-zero when the deployed configuration's
+median time to first request is over the target.
+
+Usage (from backend/):
+    python -m benchmarks.cold_start --runs 7 --target-ms 1500
+    python -m benchmarks.cold_start --modes lazy_precompiled --importtime
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from typing import Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ("eager", "lazy", "lazy_precompiled")
+DEPLOYED_MODE = "lazy_precompiled"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per mode")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--path", default="/api/doctors/", help="First request; a router path loads a lazy router")
+    parser.add_argument("--target-ms", type=float, help="Fail if the deployed mode's median time to first request is over this")
+    parser.add_argument("--importtime", action="store_true", help="Also print import time by package (python -X importtime)")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def child(path: str) -> None:
+    """Runs in the measured process: import, start up, serve one request, report."""
+    import asyncio
+    import time
+    # Stands in for the server's own imports, which happen before the app's
+    import httpx
+    from app.main import app
+    from app.core.startup import startup_profile
+
+    async def serve() -> dict:
+        await app.router.startup()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            status = (await client.get(path)).status_code
+            start = time.perf_counter()
+            openapi_status = (await client.get("/openapi.json")).status_code
+            openapi_ms = round((time.perf_counter() - start) * 1000, 1)
+        await app.router.shutdown()
+        return {"status": status, "openapi_status": openapi_status, "openapi_ms": openapi_ms}
+
+    result = asyncio.run(serve())
+    result.update(startup_profile.report())
+    print(json.dumps(result))
+
+
+def mode_environment(mode: str, database_url: str, schema_path: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": BACKEND_DIR,
+        "DATABASE_URL": database_url,
+        "NOTIFICATIONS_ENABLED": "False",
+        "STARTUP_PROFILE": "False",
+        "LAZY_ROUTERS": "False" if mode == "eager" else "True",
+        "OPENAPI_SCHEMA_PATH": schema_path if mode == "lazy_precompiled" else "",
+    })
+    return env
+
+
+def run_child(env: Dict[str, str], path: str, importtime: bool = False) -> subprocess.CompletedProcess:
+    command = [sys.executable] + (["-X", "importtime"] if importtime else [])
+    command += ["-m", "benchmarks.cold_start", "--child", "--path", path]
+    result = subprocess.run(command, cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        sys.exit(f"cold start run failed:\n{result.stderr}")
+    return result
+
+
+def time_to_first_request(report: dict) -> float:
+    """Process start to first response, or app import to first response where /proc is unavailable."""
+    return (report["before_app_import_ms"] or 0.0) + report["first_request_ms"]
+
+
+def summarize(reports: List[dict]) -> dict:
+    def median(values):
+        return round(statistics.median(values), 1)
+
+    phases = defaultdict(list)
+    for report in reports:
+        for name, value in report["phases_ms"].items():
+            phases[name].append(value)
+    return {
+        "runs": len(reports),
+        "first_request_status": reports[0]["status"],
+        "time_to_first_request_ms": median([time_to_first_request(report) for report in reports]),
+        "before_app_import_ms": median([report["before_app_import_ms"] or 0.0 for report in reports]),
+        "phases_ms": {name: median(values) for name, values in phases.items()},
+        "ready_ms": median([report["ready_ms"] for report in reports]),
+        "first_request_ms": median([report["first_request_ms"] for report in reports]),
+        "first_request_duration_ms": median([report["first_request_duration_ms"] for report in reports]),
+        "first_openapi_ms": median([report["openapi_ms"] for report in reports]),
+    }
+
+
+def import_breakdown(stderr: str, top: int = 15) -> Dict[str, float]:
+    """Self import time in ms grouped by top-level package, from -X importtime output."""
+    totals = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        totals[name.strip().split(".")[0]] += int(self_us) / 1000
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {package: round(ms, 1) for package, ms in ranked}
+
+
+def prepare(directory: str) -> tuple:
+    """Migrate a fresh SQLite database and precompile the OpenAPI document."""
+    database_url = f"sqlite:///{os.path.join(directory, 'clinic.db')}"
+    schema_path = os.path.join(directory, "openapi.json")
+    env = mode_environment("eager", database_url, "")
+    for command in (["-m", "app.migrate", "upgrade"], ["-m", "app.core.openapi", "--output", schema_path]):
+        result = subprocess.run([sys.executable] + command, cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            sys.exit(f"{' '.join(command)} failed:\n{result.stderr}")
+    return database_url, schema_path
+
+
+def main() -> None:
+    args = parse_args()
+    if args.child:
+        child(args.path)
+        return
+
+    database_url, schema_path = prepare(tempfile.mkdtemp(prefix="clinic-cold-start-"))
+    report = {"path": args.path, "modes": {}}
+    for mode in args.modes:
+        env = mode_environment(mode, database_url, schema_path)
+        runs = [json.loads(run_child(env, args.path).stdout.splitlines()[-1]) for _ in range(args.runs)]
+        report["modes"][mode] = summarize(runs)
+        if args.importtime:
+            stderr = run_child(env, args.path, importtime=True).stderr
+            report["modes"][mode]["import_self_ms_by_package"] = import_breakdown(stderr)
+
+    if args.target_ms is not None:
+        report["target_ms"] = args.target_ms
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+    if args.target_ms is not None and DEPLOYED_MODE in report["modes"]:
+        measured = report["modes"][DEPLOYED_MODE]["time_to_first_request_ms"]
+        if measured > args.target_ms:
+            sys.exit(f"median time to first request {measured}ms is over the {args.target_ms}ms target")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+Check that several gunicorn workers keep queue boards consistent.
+
+Seeds a synthetic clinic, starts `gunicorn -c gunicorn.conf.py` with
+--workers uvicorn workers sharing --shared-state-url, and opens queue board
+streams (SSE) on separate connections, so they land on different workers.
+It then checks in each doctor's appointments for today and calls and
+completes them with several concurrent requests per doctor, every request
+on a new connection. It fails (exit 1) when:
+
+    a patient is called twice, or a checked-in patient is never called
+    stored positions are not 1..n in priority and arrival order
+    a board missed an event, or ended on a different queue than the database
+
+Usage (from backend/):
+    python -m benchmarks.multi_worker --workers 4 --shared-state-url redis://localhost:6379/0
+    python -m benchmarks.multi_worker --workers 1
+
+Without --database-url a fresh SQLite file in a temporary directory is used.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Dict, List
+
+from benchmarks.load_test import BENCH_PASSWORD, configure_environment, seed_clinic
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PRIORITY_RANK = {"emergency": 0, "urgent": 1, "routine": 2}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--shared-state-url", default="memory://", help="SHARED_STATE_URL for the workers")
+    parser.add_argument("--database-url", help="Database to seed and test (default: temporary SQLite file)")
+    parser.add_argument("--reset", action="store_true", help="Allow wiping --database-url before seeding")
+    parser.add_argument("--doctors", type=int, default=3)
+    parser.add_argument("--appointments-per-day", type=int, default=12, help="Per doctor; today's are checked in")
+    parser.add_argument("--boards", type=int, default=4, help="Board streams per doctor")
+    parser.add_argument("--callers", type=int, default=3, help="Concurrent call-next requests per doctor")
+    parser.add_argument("--port", type=int, help="Port for gunicorn (default: a free one)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the JSON report to this file as well as stdout")
+    args = parser.parse_args()
+    # Fields seed_clinic reads
+    args.patients = 100
+    args.users = 1
+    args.days = 0
+    args.bcrypt_rounds = 4
+    return args
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args: argparse.Namespace, database_url: str, port: int) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": BACKEND_DIR,
+        "DATABASE_URL": database_url,
+        "SHARED_STATE_URL": args.shared_state_url,
+        "WEB_CONCURRENCY": str(args.workers),
+        "PORT": str(port),
+        "NOTIFICATIONS_ENABLED": "False",
+    })
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app.main:app", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{port}"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+
+
+async def wait_until_serving(client, server: subprocess.Popen, timeout: float = 60) -> None:
+    """Wait for the first worker to answer; workers still starting up do not accept connections."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            sys.exit(f"gunicorn exited:\n{server.stderr.read()}")
+        try:
+            await client.get("/")
+            return
+        except Exception:
+            await asyncio.sleep(0.2)
+    sys.exit("gunicorn did not start in time")
+
+
+async def watch_board(base_url: str, doctor_id: int, events: List[dict], ready: asyncio.Event) -> None:
+    import httpx
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        async with client.stream("GET", f"/api/queue/stream/{doctor_id}") as response:
+            async for line in response.aiter_lines():
+                if line.startswith("data: "):
+                    message = json.loads(line[len("data: "):])
+                    if message["event"] == "snapshot":
+                        ready.set()
+                    else:
+                        events.append(message)
+
+
+def queue_ids(entries: List[dict]) -> List[int]:
+    return [entry["queue_id"] for entry in entries]
+
+
+def position_errors(entries: List[dict], priorities: Dict[int, str]) -> int:
+    """Waiting entries whose stored position is not their rank by priority and arrival."""
+    waiting = [entry for entry in entries if entry["status"] == "waiting"]
+    expected = sorted(
+        waiting,
+        key=lambda entry: (PRIORITY_RANK[priorities[entry["queue_id"]]], entry["check_in_time"], entry["queue_id"])
+    )
+    return sum(
+        1 for position, entry in enumerate(expected, start=1) if entry["position"] != position
+    )
+
+
+async def run(args: argparse.Namespace, database_url: str) -> dict:
+    import httpx
+
+    rng = random.Random(args.seed)
+    clinic = seed_clinic(args, rng)
+    port = args.port or free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(args, database_url, port)
+    # No keep-alive: every request opens a connection, which any worker may accept
+    client = httpx.AsyncClient(
+        base_url=base_url, timeout=60, limits=httpx.Limits(max_keepalive_connections=0)
+    )
+    boards: Dict[int, List[List[dict]]] = {}
+    tasks = []
+    try:
+        await wait_until_serving(client, server)
+        login = await client.post("/api/auth/login", data={"username": "user0", "password": BENCH_PASSWORD})
+        login.raise_for_status()
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        doctor_ids = [doctor_id for doctor_id in clinic["doctor_ids"] if doctor_id in clinic["todays_appointments"]]
+
+        for doctor_id in doctor_ids:
+            boards[doctor_id] = []
+            for _ in range(args.boards):
+                events, ready = [], asyncio.Event()
+                boards[doctor_id].append(events)
+                tasks.append(asyncio.create_task(watch_board(base_url, doctor_id, events, ready)))
+                await asyncio.wait_for(ready.wait(), 30)
+
+        statuses = Counter()
+        priorities: Dict[int, str] = {}
+        checked_in: Dict[int, List[int]] = {doctor_id: [] for doctor_id in doctor_ids}
+        called: Dict[int, List[int]] = {doctor_id: [] for doctor_id in doctor_ids}
+        misordered = 0
+
+        async def check_in(doctor_id: int, appointment_id: int) -> None:
+            priority = rng.choice(["routine", "routine", "urgent", "emergency"])
+            response = await client.post(
+                "/api/queue/check-in", params={"appointment_id": appointment_id, "priority": priority}, headers=headers
+            )
+            statuses[f"check-in {response.status_code}"] += 1
+            if response.status_code == 201:
+                priorities[response.json()["queue_id"]] = priority
+                checked_in[doctor_id].append(response.json()["queue_id"])
+
+        async def call_until_empty(doctor_id: int) -> None:
+            while True:
+                response = await client.post(f"/api/queue/call-next/{doctor_id}", headers=headers)
+                statuses[f"call-next {response.status_code}"] += 1
+                if response.status_code == 404:
+                    return
+                if response.status_code != 200:
+                    continue
+                queue_id = response.json()["queue_id"]
+                called[doctor_id].append(queue_id)
+                completed = await client.put(f"/api/queue/{queue_id}/complete", headers=headers)
+                statuses[f"complete {completed.status_code}"] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            check_in(doctor_id, appointment_id)
+            for doctor_id in doctor_ids
+            for appointment_id in clinic["todays_appointments"][doctor_id]
+        ))
+        for doctor_id in doctor_ids:
+            entries = (await client.get(f"/api/queue/status/{doctor_id}")).json()
+            misordered += position_errors(entries, priorities)
+        await asyncio.gather(*(
+            call_until_empty(doctor_id)
+            for doctor_id in doctor_ids
+            for _ in range(args.callers)
+        ))
+        wall_seconds = time.perf_counter() - started
+
+        # Let the last events reach every board
+        await asyncio.sleep(1.0)
+        final_queues = {
+            doctor_id: (await client.get(f"/api/queue/status/{doctor_id}")).json() for doctor_id in doctor_ids
+        }
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await client.aclose()
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    double_calls = sum(len(ids) - len(set(ids)) for ids in called.values())
+    never_called = sum(len(set(checked_in[doctor_id]) - set(called[doctor_id])) for doctor_id in doctor_ids)
+    expected_events = {doctor_id: 3 * len(checked_in[doctor_id]) for doctor_id in doctor_ids}
+    missed_events = sum(
+        max(expected_events[doctor_id] - len(events), 0)
+        for doctor_id, doctor_boards in boards.items()
+        for events in doctor_boards
+    )
+    stale_boards = sum(
+        1
+        for doctor_id, doctor_boards in boards.items()
+        for events in doctor_boards
+        if not events or queue_ids(events[-1]["queue"]) != queue_ids(final_queues[doctor_id])
+    )
+    return {
+        "workers": args.workers,
+        "shared_state": args.shared_state_url.split(":", 1)[0],
+        "database": database_url.split(":", 1)[0],
+        "doctors": len(doctor_ids),
+        "checked_in": sum(len(ids) for ids in checked_in.values()),
+        "boards": sum(len(doctor_boards) for doctor_boards in boards.values()),
+        "wall_seconds": round(wall_seconds, 3),
+        "statuses": dict(sorted(statuses.items())),
+        "double_calls": double_calls,
+        "never_called": never_called,
+        "misordered_positions": misordered,
+        "missed_board_events": missed_events,
+        "stale_boards": stale_boards,
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    database_url = configure_environment(args)
+    report = asyncio.run(run(args, database_url))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(output + "\n")
+    print(output)
+    failures = ("double_calls", "never_called", "misordered_positions", "missed_board_events", "stale_boards")
+    sys.exit(1 if any(report[key] for key in failures) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Compare SQLite read/write throughput across engine profiles.
+
+Profiles:
+    default         rollback journal, driver defaults (the previous setup)
+    wal             production profile: WAL + pragmas
+    wal_serialized  production profile plus the in-process writer lock
+
+Runs concurrent reader and writer threads against a fresh database file for
+each profile and prints a JSON report.
+
+Usage (from backend/):
+    python -m benchmarks.sqlite_throughput --readers 8 --writers 4 --seconds 5
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from app.core.database import configure_sqlite, sqlite_connect_args
+
+
+PROFILES = ("default", "wal", "wal_serialized")
+
+
+def build_engine(path: str, profile: str):
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args=sqlite_connect_args(serialize_writes=profile == "wal_serialized"),
+        pool_size=32,
+        max_overflow=0
+    )
+    if profile != "default":
+        configure_sqlite(engine)
+    return engine
+
+
+def seed(engine, rows: int) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE bench (id INTEGER PRIMARY KEY, doctor_id INTEGER NOT NULL, "
+            "slot TIMESTAMP NOT NULL, note TEXT)"
+        ))
+        conn.execute(text("CREATE INDEX idx_bench_doctor ON bench (doctor_id, slot)"))
+        conn.execute(
+            text("INSERT INTO bench (doctor_id, slot, note) VALUES (:d, datetime('now'), 'seed')"),
+            [{"d": i % 50} for i in range(rows)]
+        )
+
+
+def run_profile(profile: str, readers: int, writers: int, seconds: float, rows: int) -> dict:
+    directory = tempfile.mkdtemp(prefix="sqlite-bench-")
+    path = os.path.join(directory, "bench.db")
+    engine = build_engine(path, profile)
+    seed(engine, rows)
+
+    counts = {"reads": 0, "writes": 0, "read_errors": 0, "write_errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def bump(key: str) -> None:
+        with lock:
+            counts[key] += 1
+
+    def reader(worker: int) -> None:
+        while time.perf_counter() < deadline:
+            try:
+                with engine.connect() as conn:
+                    conn.execute(
+                        text("SELECT count(*) FROM bench WHERE doctor_id = :d"),
+                        {"d": worker % 50}
+                    ).scalar()
+                bump("reads")
+            except OperationalError:
+                bump("read_errors")
+
+    def writer(worker: int) -> None:
+        while time.perf_counter() < deadline:
+            try:
+                with engine.begin() as conn:
+                    # Booking-style transaction: read, then write
+                    conn.execute(
+                        text("SELECT count(*) FROM bench WHERE doctor_id = :d"),
+                        {"d": worker % 50}
+                    ).scalar()
+                    conn.execute(
+                        text("INSERT INTO bench (doctor_id, slot, note) VALUES (:d, datetime('now'), 'w')"),
+                        {"d": worker % 50}
+                    )
+                bump("writes")
+            except OperationalError:
+                bump("write_errors")
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+
+    return {
+        "profile": profile,
+        "seconds": round(elapsed, 3),
+        "reads_per_second": round(counts["reads"] / elapsed, 1),
+        "writes_per_second": round(counts["writes"] / elapsed, 1),
+        "read_errors": counts["read_errors"],
+        "write_errors": counts["write_errors"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--profiles", nargs="+", choices=PROFILES, default=list(PROFILES))
+    args = parser.parse_args()
+
+    report = {
+        "config": vars(args),
+        "results": [
+            run_profile(profile, args.readers, args.writers, args.seconds, args.rows)
+            for profile in args.profiles
+        ],
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
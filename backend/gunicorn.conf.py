@@ -0,0 +1,37 @@
+"""
+Gunicorn settings for running several uvicorn workers (from backend/):
+
+    python -m app.migrate upgrade
+    gunicorn app.main:app -c gunicorn.conf.py
+
+Each worker keeps its own copy of the queues and caches and coordinates
+through SHARED_STATE_URL, so more than one worker, on this host or on
+several, needs a Redis-compatible server there; the default in-process
+backend only supports WEB_CONCURRENCY=1. Migrations run once before the
+workers start, never in them.
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Workers import the app themselves: the background tasks, pools and
+# shared-state connections started at import or startup must not be forked
+preload_app = False
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+# Behind the platform's proxy; trust its X-Forwarded-* headers
+forwarded_allow_ips = "*"
+
+
+def on_starting(server):
+    from app.core.config import settings
+
+    if server.cfg.workers > 1 and settings.SHARED_STATE_URL.startswith("memory:"):
+        raise RuntimeError(
+            f"{server.cfg.workers} workers need shared state; "
+            "set SHARED_STATE_URL=redis://... or WEB_CONCURRENCY=1"
+        )
@@ -0,0 +1,38 @@
+"""Alembic environment: migrates the database the app's settings point at."""
+from logging.config import fileConfig
+from alembic import context
+from app.core.config import settings
+from app.core.database import Base, engine
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+
+config = context.config
+# Skipped when the app or the migrate CLI runs migrations with its own logging
+if config.config_file_name is not None and config.attributes.get("configure_logging", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def _options(url: str) -> dict:
+    # SQLite cannot ALTER most things in place; batch mode copies the table
+    return {"target_metadata": target_metadata, "render_as_batch": url.startswith("sqlite")}
+
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL to stdout (`alembic upgrade head --sql`)."""
+    context.configure(url=settings.DATABASE_URL, literal_binds=True, **_options(settings.DATABASE_URL))
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    with engine.connect() as connection:
+        context.configure(connection=connection, **_options(settings.DATABASE_URL))
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
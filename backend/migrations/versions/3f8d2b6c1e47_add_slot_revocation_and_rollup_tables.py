@@ -0,0 +1,81 @@
+"""Add appointment slot, token revocation and daily rollup tables
+
+Revision ID: 3f8d2b6c1e47
+Revises: 5a1d0c3e8f27
+Create Date: 2026-10-18 10:55:00
+
+Tables added after the baseline schema. Builds between those features and
+the move to migrations created them with create_all, so a table that
+already exists is kept as it is. The startup backfills fill the slot
+reservations and the rollups from existing appointments.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '3f8d2b6c1e47'
+down_revision = '5a1d0c3e8f27'
+branch_labels = None
+depends_on = None
+
+
+def _missing(table: str) -> bool:
+    if op.get_context().as_sql:
+        return True
+    return not sa.inspect(op.get_bind()).has_table(table)
+
+
+def upgrade() -> None:
+    if _missing('appointment_slots'):
+        op.create_table(
+            'appointment_slots',
+            sa.Column('doctor_id', sa.Integer(), nullable=False),
+            sa.Column('slot_start', sa.DateTime(), nullable=False),
+            sa.Column('appointment_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['appointment_id'], ['appointments.appointment_id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['doctor_id'], ['doctors.doctor_id']),
+            sa.PrimaryKeyConstraint('doctor_id', 'slot_start', name='pk_appointment_slots')
+        )
+        op.create_index('ix_appointment_slots_appointment_id', 'appointment_slots', ['appointment_id'])
+
+    if _missing('token_revocations'):
+        op.create_table(
+            'token_revocations',
+            sa.Column('revocation_id', sa.Integer(), nullable=False),
+            sa.Column('jti', sa.String(length=64), nullable=True),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('not_before', sa.DateTime(), nullable=True),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['users.user_id']),
+            sa.PrimaryKeyConstraint('revocation_id')
+        )
+        op.create_index('ix_token_revocations_created_at', 'token_revocations', ['created_at'])
+        op.create_index('ix_token_revocations_expires_at', 'token_revocations', ['expires_at'])
+        op.create_index('ix_token_revocations_jti', 'token_revocations', ['jti'])
+        op.create_index('ix_token_revocations_revocation_id', 'token_revocations', ['revocation_id'])
+
+    if _missing('daily_doctor_stats'):
+        op.create_table(
+            'daily_doctor_stats',
+            sa.Column('doctor_id', sa.Integer(), nullable=False),
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('booked', sa.Integer(), nullable=False),
+            sa.Column('booked_minutes', sa.Integer(), nullable=False),
+            sa.Column('completed', sa.Integer(), nullable=False),
+            sa.Column('cancelled', sa.Integer(), nullable=False),
+            sa.Column('no_show', sa.Integer(), nullable=False),
+            sa.Column('checked_in', sa.Integer(), nullable=False),
+            sa.Column('called', sa.Integer(), nullable=False),
+            sa.Column('wait_minutes_total', sa.Float(), nullable=False),
+            sa.Column('served', sa.Integer(), nullable=False),
+            sa.Column('timed_services', sa.Integer(), nullable=False),
+            sa.Column('service_minutes_total', sa.Float(), nullable=False),
+            sa.ForeignKeyConstraint(['doctor_id'], ['doctors.doctor_id']),
+            sa.PrimaryKeyConstraint('doctor_id', 'day')
+        )
+
+
+def downgrade() -> None:
+    for table in ('daily_doctor_stats', 'token_revocations', 'appointment_slots'):
+        op.drop_table(table)
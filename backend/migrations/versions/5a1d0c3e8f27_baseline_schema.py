@@ -0,0 +1,166 @@
+"""Baseline schema
+
+Revision ID: 5a1d0c3e8f27
+Revises:
+Create Date: 2026-10-18 10:53:59
+
+The original schema, as init_db() created it with Base.metadata.create_all
+before slot reservations, refresh-token revocations and analytics rollups
+were added. `python -m app.migrate upgrade` stamps databases that already
+have all of these tables at this revision instead of running it; the tables
+added since come from the following revisions.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '5a1d0c3e8f27'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+ENUMS = {
+    'userrole': ('ADMIN', 'MANAGER', 'RECEPTION', 'DOCTOR', 'PATIENT'),
+    'appointmenttype': ('CONSULTATION', 'FOLLOW_UP', 'EMERGENCY', 'ROUTINE_CHECKUP'),
+    'appointmentstatus': ('SCHEDULED', 'CHECKED_IN', 'IN_PROGRESS', 'COMPLETED', 'CANCELLED', 'NO_SHOW'),
+    'notificationchannel': ('SMS', 'EMAIL', 'WHATSAPP'),
+    'notificationstatus': ('PENDING', 'SENT', 'DELIVERED', 'FAILED'),
+    'queuepriority': ('ROUTINE', 'URGENT', 'EMERGENCY'),
+    'queuestatus': ('WAITING', 'CALLED', 'IN_CONSULTATION', 'SKIPPED', 'COMPLETED'),
+}
+
+
+def _enum(name: str) -> sa.Enum:
+    return sa.Enum(*ENUMS[name], name=name)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'doctors',
+        sa.Column('doctor_id', sa.Integer(), nullable=False),
+        sa.Column('full_name', sa.String(length=100), nullable=False),
+        sa.Column('specialization', sa.String(length=100), nullable=False),
+        sa.Column('contact_number', sa.String(length=15), nullable=False),
+        sa.Column('email', sa.String(length=100), nullable=False),
+        sa.Column('room_number', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('doctor_id')
+    )
+    op.create_index('ix_doctors_doctor_id', 'doctors', ['doctor_id'])
+    op.create_index('ix_doctors_email', 'doctors', ['email'], unique=True)
+
+    op.create_table(
+        'patients',
+        sa.Column('patient_id', sa.Integer(), nullable=False),
+        sa.Column('full_name', sa.String(length=100), nullable=False),
+        sa.Column('gender', sa.String(length=10), nullable=False),
+        sa.Column('date_of_birth', sa.Date(), nullable=False),
+        sa.Column('contact_number', sa.String(length=15), nullable=False),
+        sa.Column('email', sa.String(length=100), nullable=True),
+        sa.Column('address', sa.Text(), nullable=True),
+        sa.Column('medical_history', sa.Text(), nullable=True),
+        sa.Column('consent_flag', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('patient_id')
+    )
+    op.create_index('ix_patients_contact_number', 'patients', ['contact_number'], unique=True)
+    op.create_index('ix_patients_email', 'patients', ['email'], unique=True)
+    op.create_index('ix_patients_patient_id', 'patients', ['patient_id'])
+
+    op.create_table(
+        'users',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=50), nullable=False),
+        sa.Column('email', sa.String(length=100), nullable=False),
+        sa.Column('password_hash', sa.String(length=255), nullable=False),
+        sa.Column('role', _enum('userrole'), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('doctor_id', sa.Integer(), nullable=True),
+        sa.Column('patient_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('last_login', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['doctor_id'], ['doctors.doctor_id']),
+        sa.ForeignKeyConstraint(['patient_id'], ['patients.patient_id']),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+    op.create_index('ix_users_user_id', 'users', ['user_id'])
+    op.create_index('ix_users_username', 'users', ['username'], unique=True)
+
+    op.create_table(
+        'appointments',
+        sa.Column('appointment_id', sa.Integer(), nullable=False),
+        sa.Column('patient_id', sa.Integer(), nullable=False),
+        sa.Column('doctor_id', sa.Integer(), nullable=False),
+        sa.Column('appointment_date', sa.DateTime(), nullable=False),
+        sa.Column('end_time', sa.DateTime(), nullable=False),
+        sa.Column('appointment_type', _enum('appointmenttype'), nullable=False),
+        sa.Column('status', _enum('appointmentstatus'), nullable=True),
+        sa.Column('reason', sa.Text(), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('created_by', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['created_by'], ['users.user_id']),
+        sa.ForeignKeyConstraint(['doctor_id'], ['doctors.doctor_id']),
+        sa.ForeignKeyConstraint(['patient_id'], ['patients.patient_id']),
+        sa.PrimaryKeyConstraint('appointment_id')
+    )
+    op.create_index('idx_doctor_date', 'appointments', ['doctor_id', 'appointment_date'])
+    op.create_index('ix_appointments_appointment_date', 'appointments', ['appointment_date'])
+    op.create_index('ix_appointments_appointment_id', 'appointments', ['appointment_id'])
+
+    op.create_table(
+        'notifications',
+        sa.Column('notification_id', sa.Integer(), nullable=False),
+        sa.Column('appointment_id', sa.Integer(), nullable=False),
+        sa.Column('channel', _enum('notificationchannel'), nullable=False),
+        sa.Column('template_name', sa.String(length=50), nullable=False),
+        sa.Column('message', sa.Text(), nullable=False),
+        sa.Column('recipient', sa.String(length=100), nullable=False),
+        sa.Column('status', _enum('notificationstatus'), nullable=True),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.Column('delivered_at', sa.DateTime(), nullable=True),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['appointment_id'], ['appointments.appointment_id']),
+        sa.PrimaryKeyConstraint('notification_id')
+    )
+    op.create_index('ix_notifications_notification_id', 'notifications', ['notification_id'])
+
+    op.create_table(
+        'queue_entries',
+        sa.Column('queue_id', sa.Integer(), nullable=False),
+        sa.Column('appointment_id', sa.Integer(), nullable=False),
+        sa.Column('check_in_time', sa.DateTime(), nullable=False),
+        sa.Column('priority', _enum('queuepriority'), nullable=True),
+        sa.Column('position', sa.Integer(), nullable=True),
+        sa.Column('status', _enum('queuestatus'), nullable=True),
+        sa.Column('called_time', sa.DateTime(), nullable=True),
+        sa.Column('completed_time', sa.DateTime(), nullable=True),
+        sa.Column('estimated_wait_minutes', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['appointment_id'], ['appointments.appointment_id']),
+        sa.PrimaryKeyConstraint('queue_id'),
+        sa.UniqueConstraint('appointment_id')
+    )
+    op.create_index('ix_queue_entries_queue_id', 'queue_entries', ['queue_id'])
+
+
+def downgrade() -> None:
+    # Dropping a table drops its indexes
+    for table in (
+        'queue_entries',
+        'notifications',
+        'appointments',
+        'users',
+        'patients',
+        'doctors',
+    ):
+        op.drop_table(table)
+    # Postgres keeps enum types after their tables are gone
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        for name in ENUMS:
+            _enum(name).drop(bind, checkfirst=True)
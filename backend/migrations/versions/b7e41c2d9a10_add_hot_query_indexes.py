@@ -0,0 +1,40 @@
+"""Add composite and partial indexes for the hot queries
+
+Revision ID: b7e41c2d9a10
+Revises: 3f8d2b6c1e47
+Create Date: 2026-10-18 09:00:00
+
+Built with app.core.migration_ops.create_index, so on a live database the
+appointments indexes are added concurrently (Postgres, MySQL) or one at a
+time (SQLite) rather than blocking bookings for the whole migration.
+"""
+from app.core.migration_ops import create_index, drop_index
+
+
+revision = 'b7e41c2d9a10'
+down_revision = '3f8d2b6c1e47'
+branch_labels = None
+depends_on = None
+
+
+# (name, table, columns, partial index predicate)
+INDEXES = [
+    ('idx_patient_date', 'appointments', ['patient_id', 'appointment_date'], None),
+    ('idx_doctor_status_date', 'appointments', ['doctor_id', 'status', 'appointment_date'], None),
+    ('idx_scheduled_date', 'appointments', ['appointment_date'], "status = 'SCHEDULED'"),
+    ('idx_queue_status_completed', 'queue_entries', ['status', 'completed_time'], None),
+    ('idx_notification_appointment_template', 'notifications', ['appointment_id', 'template_name'], None),
+    ('idx_notification_pending', 'notifications', ['notification_id'], "status = 'PENDING'"),
+    ('ix_patients_updated_at', 'patients', ['updated_at'], None),
+    ('ix_daily_doctor_stats_day', 'daily_doctor_stats', ['day'], None),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns, where in INDEXES:
+        create_index(name, table, columns, where=where)
+
+
+def downgrade() -> None:
+    for name, table, _, _ in reversed(INDEXES):
+        drop_index(name, table)
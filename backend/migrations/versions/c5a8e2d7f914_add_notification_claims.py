@@ -0,0 +1,26 @@
+"""Add notifications.claimed_until for dispatcher claims
+
+Revision ID: c5a8e2d7f914
+Revises: b7e41c2d9a10
+Create Date: 2026-10-18 12:10:00
+
+Dispatcher workers claim a PENDING row with a conditional UPDATE of this
+column, so only one of them sends it or holds it through a retry's backoff.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'c5a8e2d7f914'
+down_revision = 'b7e41c2d9a10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('notifications', sa.Column('claimed_until', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('notifications') as batch_op:
+        batch_op.drop_column('claimed_until')
@@ -0,0 +1,34 @@
+"""Make token_revocations.jti unique
+
+Revision ID: d2f6b9a4c381
+Revises: c5a8e2d7f914
+Create Date: 2026-10-18 12:40:00
+
+Refresh relies on the constraint to detect a refresh token used twice,
+including by two concurrent requests. Duplicate rows left by such races
+are removed first, keeping the earliest.
+"""
+from alembic import op
+from app.core.migration_ops import create_index, drop_index
+
+
+revision = 'd2f6b9a4c381'
+down_revision = 'c5a8e2d7f914'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The derived table lets MySQL delete from the table it selects from
+    op.execute(
+        "DELETE FROM token_revocations WHERE jti IS NOT NULL AND revocation_id NOT IN ("
+        "SELECT revocation_id FROM (SELECT MIN(revocation_id) AS revocation_id "
+        "FROM token_revocations WHERE jti IS NOT NULL GROUP BY jti) AS earliest)"
+    )
+    drop_index('ix_token_revocations_jti', 'token_revocations')
+    create_index('ix_token_revocations_jti', 'token_revocations', ['jti'], unique=True)
+
+
+def downgrade() -> None:
+    drop_index('ix_token_revocations_jti', 'token_revocations')
+    create_index('ix_token_revocations_jti', 'token_revocations', ['jti'])
@@ -0,0 +1,55 @@
+"""
+Fixtures for the test suite (run `python -m pytest` from backend/).
+
+Settings are read from the environment when app modules are first
+imported, so the test database is configured here before any of them: a
+migrated SQLite file in a temporary directory, emptied after each test.
+"""
+import os
+import tempfile
+from datetime import date
+
+_directory = tempfile.mkdtemp(prefix="clinic-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_directory, 'clinic.db')}"
+os.environ["NOTIFICATIONS_ENABLED"] = "False"
+os.environ["SHARED_STATE_URL"] = "memory://"
+os.environ["BCRYPT_ROUNDS"] = "4"
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def engine():
+    from app.core.database import engine
+    from app.core.migrations import upgrade
+
+    upgrade(engine)
+    return engine
+
+
+@pytest.fixture
+def db(engine):
+    from app.core.database import Base, SessionLocal
+
+    session = SessionLocal()
+    yield session
+    session.close()
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+
+
+@pytest.fixture
+def clinic(db):
+    """Two doctors, a patient and a staff user, committed."""
+    from app.models import Doctor, Patient, User, UserRole
+
+    doctors = [
+        Doctor(full_name=f"Dr {name}", specialization="General Practice", contact_number=f"555-000{index}", email=f"{name}@clinic.test")
+        for index, name in enumerate(("a", "b"))
+    ]
+    patient = Patient(full_name="Pat Test", gender="Female", date_of_birth=date(1990, 1, 1), contact_number="555-1000")
+    user = User(username="staff", email="staff@clinic.test", password_hash="unused", role=UserRole.RECEPTION)
+    db.add_all([*doctors, patient, user])
+    db.commit()
+    return {"doctors": doctors, "patient": patient, "user": user}
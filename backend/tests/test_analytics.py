@@ -0,0 +1,84 @@
+"""Incremental daily rollups must match a rebuild from the same history."""
+from datetime import datetime, timedelta
+
+from app.core.analytics import verify_daily_stats
+from app.models import Appointment, AppointmentStatus, AppointmentType, DailyDoctorStats, QueueEntry, QueueStatus
+
+START = datetime(2030, 3, 4, 10, 0)
+
+
+def book(db, clinic, start=START, doctor=0):
+    appointment = Appointment(
+        patient_id=clinic["patient"].patient_id,
+        doctor_id=clinic["doctors"][doctor].doctor_id,
+        appointment_date=start,
+        end_time=start + timedelta(minutes=30),
+        appointment_type=AppointmentType.CONSULTATION,
+        status=AppointmentStatus.SCHEDULED,
+        created_by=clinic["user"].user_id,
+    )
+    db.add(appointment)
+    db.commit()
+    return appointment
+
+
+def check_in(db, appointment, called=False):
+    appointment.status = AppointmentStatus.CHECKED_IN
+    entry = QueueEntry(appointment_id=appointment.appointment_id, check_in_time=START - timedelta(minutes=20))
+    if called:
+        entry.status = QueueStatus.CALLED
+        entry.called_time = START - timedelta(minutes=5)
+    db.add(entry)
+    db.commit()
+    return entry
+
+
+def stats(db, doctor, day):
+    return db.query(DailyDoctorStats).filter_by(doctor_id=doctor.doctor_id, day=day).one_or_none()
+
+
+def test_rescheduled_check_in_moves_queue_counters(db, clinic):
+    appointment = check_in(db, book(db, clinic), called=True)
+    appointment = appointment.appointment
+
+    appointment.appointment_date = START + timedelta(days=1)
+    appointment.end_time = appointment.appointment_date + timedelta(minutes=30)
+    db.commit()
+
+    doctor = clinic["doctors"][0]
+    old, new = stats(db, doctor, START.date()), stats(db, doctor, START.date() + timedelta(days=1))
+    assert (old.checked_in, old.called, old.wait_minutes_total) == (0, 0, 0)
+    assert (new.checked_in, new.called, new.wait_minutes_total) == (1, 1, 15)
+    assert verify_daily_stats(db) == {}
+
+
+def test_reassigned_doctor_moves_queue_counters(db, clinic):
+    entry = check_in(db, book(db, clinic), called=True)
+    entry.appointment.doctor_id = clinic["doctors"][1].doctor_id
+    db.commit()
+
+    assert stats(db, clinic["doctors"][0], START.date()).checked_in == 0
+    assert stats(db, clinic["doctors"][1], START.date()).checked_in == 1
+    assert verify_daily_stats(db) == {}
+
+
+def test_reschedule_and_queue_change_in_one_flush(db, clinic):
+    entry = check_in(db, book(db, clinic))
+    entry.appointment.appointment_date = START + timedelta(days=2)
+    entry.appointment.end_time = START + timedelta(days=2, minutes=30)
+    entry.status = QueueStatus.COMPLETED
+    entry.called_time = START
+    entry.completed_time = START + timedelta(minutes=12)
+    db.commit()
+
+    assert verify_daily_stats(db) == {}
+
+
+def test_verify_reports_a_drifted_row(db, clinic):
+    check_in(db, book(db, clinic))
+    row = stats(db, clinic["doctors"][0], START.date())
+    row.checked_in = 3
+    db.commit()
+
+    mismatches = verify_daily_stats(db)
+    assert mismatches == {(clinic["doctors"][0].doctor_id, START.date()): {"checked_in": (3, 1)}}
@@ -0,0 +1,147 @@
+"""Authentication: cached principals, token verification and revocation."""
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.auth import RefreshRequest, _detached_copy, _issue_token_pair, get_current_user, principal_cache, refresh_access_token
+from app.core import tokens
+from app.core.security import decode_access_token, decode_refresh_token
+from app.core.tokens import ACCESS_TOKEN, REFRESH_TOKEN, RevocationSet, token_verifier
+from app.models import UserRole
+
+
+def segment(value) -> str:
+    raw = value if isinstance(value, bytes) else json.dumps(value).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def signed(header: dict, claims: dict, digest=hashlib.sha256) -> str:
+    signing_input = f"{segment(header)}.{segment(claims)}"
+    signature = hmac.new(token_verifier._secret, signing_input.encode(), digest).digest()
+    return f"{signing_input}.{segment(signature)}"
+
+
+def claims(token_type=ACCESS_TOKEN, **overrides) -> dict:
+    now = int(time.time())
+    return {"sub": "staff", "uid": 1, "iat": now, "exp": now + 300, "jti": "j1", "type": token_type, **overrides}
+
+
+@pytest.fixture
+def revocation_set(monkeypatch):
+    """A fresh RevocationSet, so revocations do not leak into other tests."""
+    fresh = RevocationSet()
+    monkeypatch.setattr(tokens, "revocations", fresh)
+    monkeypatch.setattr("app.api.auth.revocations", fresh)
+    return fresh
+
+
+def test_principal_cached_during_a_change_is_evicted_on_commit(db, clinic):
+    user = clinic["user"]
+    user.role = UserRole.ADMIN
+    db.flush()
+    # A request racing the open transaction reads and caches the old row
+    stale = _detached_copy(user)
+    stale.role = UserRole.RECEPTION
+    principal_cache.set(user.username, stale)
+
+    db.commit()
+    assert principal_cache.get(user.username) is None
+
+
+def test_valid_token_round_trips():
+    assert token_verifier.verify(token_verifier.encode(claims()))["sub"] == "staff"
+
+
+def test_tampered_signature_or_payload_is_rejected():
+    header, payload, signature = token_verifier.encode(claims()).split(".")
+    flipped = signature[:-2] + ("A" if signature[-2] != "A" else "B") + signature[-1]
+    assert token_verifier.verify(f"{header}.{payload}.{flipped}") is None
+    forged = segment(claims(role=UserRole.ADMIN.value))
+    assert token_verifier.verify(f"{header}.{forged}.{signature}") is None
+
+
+@pytest.mark.parametrize("header", [
+    {"alg": "none", "typ": "JWT"},
+    {"alg": "HS512", "typ": "JWT"},
+    {"typ": "JWT"},
+])
+def test_header_algorithm_must_match_the_configured_one(header):
+    assert token_verifier.algorithm == "HS256"
+    digest = hashlib.sha512 if header.get("alg") == "HS512" else hashlib.sha256
+    assert token_verifier.verify(signed(header, claims(), digest)) is None
+    unsigned = f"{segment(header)}.{segment(claims())}."
+    assert token_verifier.verify(unsigned) is None
+
+
+@pytest.mark.parametrize("token", [
+    "",
+    "only-one-segment",
+    "two.segments",
+    "a.b.c.d",
+    "%%%.@@@.!!!",
+    "e30.e30.e30",
+    "bm90IGpzb24.bm90IGpzb24.",
+])
+def test_malformed_tokens_are_rejected(token):
+    assert token_verifier.verify(token) is None
+
+
+def test_malformed_segments_of_a_signed_token_are_rejected():
+    header, payload, signature = token_verifier.encode(claims()).split(".")
+    assert token_verifier.verify(f"{header}.{payload}") is None
+    assert token_verifier.verify(f"{header}.{payload}.{signature}.{signature}") is None
+    assert token_verifier.verify(f"{header}.{payload}!.{signature}") is None
+    # A JSON array body, correctly signed, is not a claims set
+    assert token_verifier.verify(signed({"alg": "HS256"}, ["sub", "staff"])) is None
+
+
+def test_expired_and_not_yet_valid_tokens_are_rejected():
+    now = int(time.time())
+    assert token_verifier.verify(token_verifier.encode(claims(exp=now - 1))) is None
+    assert token_verifier.verify(token_verifier.encode(claims(nbf=now + 60))) is None
+    assert token_verifier.verify(token_verifier.encode(claims(nbf=now - 60))) is not None
+    no_expiry = claims()
+    del no_expiry["exp"]
+    assert token_verifier.verify(token_verifier.encode(no_expiry)) is None
+
+
+def test_token_types_are_not_interchangeable(db, clinic, revocation_set):
+    pair = _issue_token_pair(clinic["user"])
+    assert decode_access_token(pair["refresh_token"]) is None
+    assert decode_refresh_token(pair["access_token"]) is None
+    with pytest.raises(HTTPException) as error:
+        get_current_user(pair["refresh_token"], db)
+    assert error.value.status_code == 401
+    with pytest.raises(HTTPException) as error:
+        refresh_access_token(RefreshRequest(refresh_token=pair["access_token"]), db)
+    assert error.value.status_code == 401
+    assert token_verifier.verify(token_verifier.encode(claims(REFRESH_TOKEN)), REFRESH_TOKEN) is not None
+
+
+def test_refresh_token_reuse_revokes_every_token_of_the_user(db, clinic, revocation_set):
+    user = clinic["user"]
+    first = _issue_token_pair(user)
+    second = refresh_access_token(RefreshRequest(refresh_token=first["refresh_token"]), db)
+    assert get_current_user(second["access_token"], db).user_id == user.user_id
+    time.sleep(0.01)
+
+    with pytest.raises(HTTPException) as error:
+        refresh_access_token(RefreshRequest(refresh_token=first["refresh_token"]), db)
+    assert error.value.status_code == 401
+
+    principal_cache.invalidate(user.username)
+    for token in (first["access_token"], second["access_token"]):
+        with pytest.raises(HTTPException):
+            get_current_user(token, db)
+    with pytest.raises(HTTPException):
+        refresh_access_token(RefreshRequest(refresh_token=second["refresh_token"]), db)
+
+    # Logging in again afterwards issues working tokens
+    time.sleep(0.01)
+    third = _issue_token_pair(user)
+    assert get_current_user(third["access_token"], db).user_id == user.user_id
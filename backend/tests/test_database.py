@@ -0,0 +1,46 @@
+"""The SQLite writer lock belongs to the connection holding it, not to its thread."""
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.database import serialized_writer_connection_class
+
+
+def connect(path, factory):
+    return sqlite3.connect(str(path), factory=factory, check_same_thread=False)
+
+
+def test_reused_thread_does_not_inherit_the_writer_lock(tmp_path):
+    factory = serialized_writer_connection_class()
+    first, second = (connect(tmp_path / "writer.db", factory) for _ in range(2))
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pool.submit(first.acquire_writer).result()
+        # Another request's connection on the same pool thread must still queue
+        waiting = pool.submit(second.acquire_writer)
+        with pytest.raises(TimeoutError):
+            waiting.result(0.2)
+
+        # Released from another thread than the one that took it
+        first.rollback()
+        waiting.result(5)
+        assert second.holds_writer and not first.holds_writer
+        second.rollback()
+    first.close()
+    second.close()
+
+
+def test_second_writer_in_one_thread_times_out(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.core.database.settings.SQLITE_BUSY_TIMEOUT_MS", 50)
+    factory = serialized_writer_connection_class()
+    first, second = (connect(tmp_path / "writer.db", factory) for _ in range(2))
+
+    first.acquire_writer()
+    with pytest.raises(sqlite3.OperationalError, match="database is locked"):
+        second.acquire_writer()
+    first.commit()
+    second.acquire_writer()
+    second.commit()
+    first.close()
+    second.close()
@@ -0,0 +1,48 @@
+"""Import bodies are parsed as they stream in, whatever the chunk boundaries."""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.appointments import read_import_rows
+
+CSV = (
+    'patient_id,doctor_id,appointment_date,appointment_type,reason\r\n'
+    '1,2,2030-03-04T10:00:00,consultation,"Follow-up\r\nbring ""old"" scans"\r\n'
+    '\r\n'
+    '1,2,2030-03-04T10:30:00,consultation,plain\r\n'
+)
+
+
+class StreamedRequest:
+    def __init__(self, body: bytes, content_type: str, chunk_size: int):
+        self.headers = {"content-type": content_type}
+        self._chunks = [body[offset:offset + chunk_size] for offset in range(0, len(body), chunk_size)]
+
+    async def stream(self):
+        for chunk in self._chunks:
+            yield chunk
+
+
+def read(body: str, content_type: str = "text/csv", chunk_size: int = 7):
+    return asyncio.run(read_import_rows(StreamedRequest(body.encode(), content_type, chunk_size)))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_csv_quoted_field_spans_lines(chunk_size):
+    rows = read(CSV, chunk_size=chunk_size)
+    assert [row["reason"] for row in rows] == ['Follow-up\r\nbring "old" scans', "plain"]
+    assert rows[1]["appointment_date"] == "2030-03-04T10:30:00"
+
+
+def test_row_limit_counts_records_not_lines(monkeypatch):
+    monkeypatch.setattr("app.api.appointments.settings.IMPORT_MAX_ROWS", 2)
+    assert len(read(CSV)) == 2
+    with pytest.raises(HTTPException) as error:
+        read(CSV + "1,2,2030-03-04T11:00:00,consultation,\n")
+    assert error.value.status_code == 413
+
+
+def test_ndjson_rows():
+    rows = read('{"patient_id": 1}\n\n[1]\nnot json', content_type="application/x-ndjson")
+    assert rows == [{"patient_id": 1}, {"_error": "Row must be a JSON object"}, {"_error": "Invalid JSON"}]
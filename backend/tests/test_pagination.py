@@ -0,0 +1,45 @@
+"""Keyset cursors: only values matching the sort key reach the database."""
+import base64
+import json
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.appointments import APPOINTMENT_PAGE_ORDER, list_appointments
+from app.core.pagination import InvalidCursor, decode_cursor, encode_cursor, paginate_keyset
+from app.models import Appointment
+
+
+def raw_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trips():
+    values = [datetime(2030, 3, 4, 10, 30), 17]
+    assert decode_cursor(encode_cursor(values), APPOINTMENT_PAGE_ORDER) == values
+
+
+@pytest.mark.parametrize("values", [
+    [[1], 2],
+    [{"dt": "2030-03-04T10:30:00", "x": 1}, 2],
+    [{"dt": 5}, 2],
+    ["2030-03-04T10:30:00", 2],
+    [{"dt": "2030-03-04T10:30:00+02:00"}, 2],
+    [{"dt": "not a date"}, 2],
+    [{"dt": "2030-03-04T10:30:00"}, True],
+    [{"dt": "2030-03-04T10:30:00"}, "2"],
+    [{"dt": "2030-03-04T10:30:00"}, 2.5],
+    [{"dt": "2030-03-04T10:30:00"}, 2 ** 70],
+    [{"dt": "2030-03-04T10:30:00"}, None],
+    [{"dt": "2030-03-04T10:30:00"}],
+])
+def test_values_of_the_wrong_shape_are_rejected(values, db):
+    with pytest.raises(InvalidCursor):
+        paginate_keyset(db.query(Appointment), APPOINTMENT_PAGE_ORDER, raw_cursor(values), 10)
+
+
+def test_crafted_cursor_is_a_400(db, clinic):
+    with pytest.raises(HTTPException) as error:
+        list_appointments(limit=10, cursor=raw_cursor([[1], {"a": 1}]), db=db, current_user=clinic["user"])
+    assert error.value.status_code == 400
@@ -0,0 +1,26 @@
+"""Patient search index: placeholder phone numbers stay out of the phone postings."""
+from app.core.patient_search import PatientSearchIndex
+from app.models.patient import PLACEHOLDER_CONTACT_PREFIX
+
+
+def test_placeholder_numbers_are_not_phone_indexed():
+    index = PatientSearchIndex()
+    for patient_id in range(1, 5001):
+        index.put(patient_id, f"Self Registered {patient_id}", f"{PLACEHOLDER_CONTACT_PREFIX}{patient_id % 900 + 100}-{patient_id:04d}")
+    index.put(9001, "Real Person", "555-100-0042")
+    index.put(9002, "Other Person", "555-123-4567")
+
+    # Only the real number posts the "000" trigram, so the lookup scans one row
+    assert len(index._phone_postings["000"]) == 1
+    assert [patient_id for patient_id, _ in index.search("10000", limit=20)] == [9001]
+    assert [patient_id for patient_id, _ in index.search("5551234567", limit=20)] == [9002]
+    # Placeholder patients are still found by name
+    assert [patient_id for patient_id, _ in index.search("self registered 4999", limit=1)] == [4999]
+
+
+def test_replacing_a_placeholder_indexes_the_real_number():
+    index = PatientSearchIndex()
+    index.put(1, "Pat", f"{PLACEHOLDER_CONTACT_PREFIX}123-4567")
+    assert index.search("1234567", limit=5) == []
+    index.put(1, "Pat", "555-123-4567")
+    assert [patient_id for patient_id, _ in index.search("1234567", limit=5)] == [1]
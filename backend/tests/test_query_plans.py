@@ -0,0 +1,8 @@
+"""Hot queries, as the app builds them, must search an index rather than scan a table."""
+from benchmarks.explain_check import check_plans, hot_queries
+
+
+def test_hot_queries_avoid_full_scans(engine, db):
+    results = check_plans(engine, hot_queries(db))
+    assert results
+    assert {name: scans for name, _, scans in results if scans} == {}
@@ -0,0 +1,95 @@
+"""Queue endpoints must keep the stored positions and waits in step with the queue engine."""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.queue import call_next_patient, check_in_patient, complete_queue_entry
+from app.core.queue_engine import queue_engine, service_times
+from app.models import Appointment, AppointmentStatus, AppointmentType, QueueEntry, QueueStatus
+
+START = datetime(2030, 3, 4, 10, 0)
+
+
+@pytest.fixture
+def queue_state(db):
+    """Start every test from an empty queue engine and no service-time samples."""
+    queue_engine.load(db)
+    service_times.load(db)
+    yield
+    queue_engine.load(db)
+    service_times.load(db)
+
+
+def book(db, clinic, minutes=0):
+    appointment = Appointment(
+        patient_id=clinic["patient"].patient_id,
+        doctor_id=clinic["doctors"][0].doctor_id,
+        appointment_date=START + timedelta(minutes=minutes),
+        end_time=START + timedelta(minutes=minutes + 30),
+        appointment_type=AppointmentType.CONSULTATION,
+        status=AppointmentStatus.SCHEDULED,
+        created_by=clinic["user"].user_id,
+    )
+    db.add(appointment)
+    db.commit()
+    return appointment
+
+
+def test_completion_refreshes_waiting_estimates(db, clinic, queue_state, monkeypatch):
+    monkeypatch.setattr("app.core.queue_engine.settings.SERVICE_TIME_MIN_SAMPLES", 1)
+    user = clinic["user"]
+    entries = [check_in_patient(book(db, clinic, 30 * index).appointment_id, db=db, current_user=user) for index in range(3)]
+    before = {entry.queue_id: entry.estimated_wait_minutes for entry in entries[1:]}
+
+    called = call_next_patient(clinic["doctors"][0].doctor_id, db=db, current_user=user)
+    called.called_time = datetime.utcnow() - timedelta(minutes=60)
+    db.commit()
+    complete_queue_entry(called.queue_id, db=db, current_user=user)
+
+    db.expire_all()
+    waiting = db.query(QueueEntry).filter(QueueEntry.status == QueueStatus.WAITING).order_by(QueueEntry.position).all()
+    assert [entry.estimated_wait_minutes for entry in waiting] == [0, 60]
+    assert [before[entry.queue_id] for entry in waiting] != [0, 60]
+
+
+def test_call_next_skips_rows_gone_from_the_queue(db, clinic, queue_state):
+    user = clinic["user"]
+    doctor_id = clinic["doctors"][0].doctor_id
+    first, second, third = [
+        check_in_patient(book(db, clinic, 30 * index).appointment_id, db=db, current_user=user) for index in range(3)
+    ]
+    first_id, second_id, third_id = first.queue_id, second.queue_id, third.queue_id
+    db.query(QueueEntry).filter(QueueEntry.queue_id == first_id).delete()
+    db.query(QueueEntry).filter(QueueEntry.queue_id == second_id).update({QueueEntry.status: QueueStatus.SKIPPED})
+    db.commit()
+
+    called = call_next_patient(doctor_id, db=db, current_user=user)
+    assert called.queue_id == third_id
+    assert called.status == QueueStatus.CALLED
+
+    with pytest.raises(HTTPException) as error:
+        call_next_patient(doctor_id, db=db, current_user=user)
+    assert error.value.status_code == 404
+
+
+def test_completing_twice_is_rejected_and_records_one_sample(db, clinic, queue_state, monkeypatch):
+    monkeypatch.setattr("app.core.queue_engine.settings.SERVICE_TIME_MIN_SAMPLES", 1)
+    user = clinic["user"]
+    doctor_id = clinic["doctors"][0].doctor_id
+    check_in_patient(book(db, clinic).appointment_id, db=db, current_user=user)
+    called = call_next_patient(doctor_id, db=db, current_user=user)
+    called.called_time = datetime.utcnow() - timedelta(minutes=20)
+    db.commit()
+
+    completed = complete_queue_entry(called.queue_id, db=db, current_user=user)
+    completed_time = completed.completed_time
+    minutes = service_times.service_minutes(doctor_id, AppointmentType.CONSULTATION)
+
+    with pytest.raises(HTTPException) as error:
+        complete_queue_entry(called.queue_id, db=db, current_user=user)
+    assert error.value.status_code == 400
+
+    db.expire_all()
+    assert db.get(QueueEntry, called.queue_id).completed_time == completed_time
+    assert service_times.service_minutes(doctor_id, AppointmentType.CONSULTATION) == minutes
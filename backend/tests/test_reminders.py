@@ -0,0 +1,36 @@
+"""Due reminders are written once, and only for appointments booked before they were due."""
+from datetime import datetime, timedelta
+
+from app.models import Appointment, AppointmentStatus, AppointmentType, Notification
+from app.notifications.reminders import reminder_scheduler
+
+
+def book(db, clinic, starts_in: timedelta, booked_ago: timedelta, now: datetime):
+    appointment = Appointment(
+        patient_id=clinic["patient"].patient_id,
+        doctor_id=clinic["doctors"][0].doctor_id,
+        appointment_date=now + starts_in,
+        end_time=now + starts_in + timedelta(minutes=30),
+        appointment_type=AppointmentType.CONSULTATION,
+        status=AppointmentStatus.SCHEDULED,
+        created_by=clinic["user"].user_id,
+        created_at=now - booked_ago,
+    )
+    db.add(appointment)
+    db.commit()
+    return appointment
+
+
+def test_day_ahead_reminder_is_skipped_for_a_same_day_booking(db, clinic):
+    now = datetime.utcnow().replace(microsecond=0)
+    same_day = book(db, clinic, timedelta(hours=5), timedelta(minutes=1), now)
+    days_ahead = book(db, clinic, timedelta(hours=23), timedelta(days=3), now)
+
+    written = reminder_scheduler.fire(
+        [(same_day.appointment_id, "reminder_24h"), (days_ahead.appointment_id, "reminder_24h")], now
+    )
+
+    assert written == 1
+    notifications = db.query(Notification).filter(Notification.template_name == "reminder_24h").all()
+    assert [notification.appointment_id for notification in notifications] == [days_ahead.appointment_id]
+    assert "tomorrow" not in notifications[0].message
@@ -64,7 +64,7 @@ async function loadAppointments() {
     }
 
     try {
-        const response = await fetch(`${API_BASE_URL}/appointments/`, {
+        const response = await fetch(`${API_BASE_URL}/appointments/?expand=doctor`, {
             headers: {
                 'Authorization': `Bearer ${authToken}`,
             }
@@ -94,7 +94,7 @@ function displayAppointments(appointments) {
         <div class="appointment-card">
             <h4>Appointment #${apt.appointment_id}</h4>
             <p><strong>Date:</strong> ${formatDateTime(apt.appointment_date)}</p>
-            <p><strong>Doctor ID:</strong> ${apt.doctor_id}</p>
+            <p><strong>Doctor:</strong> ${apt.doctor ? apt.doctor.full_name : `#${apt.doctor_id}`}</p>
             <p><strong>Type:</strong> ${apt.appointment_type}</p>
             <p><strong>Status:</strong> <span class="status-badge status-${apt.status}">${apt.status}</span></p>
             ${apt.reason ? `<p><strong>Reason:</strong> ${apt.reason}</p>` : ''}
@@ -132,23 +132,40 @@ async function callNextPatient() {
     }
 }
 
-// Auto-refresh queue every 30 seconds
+// Live queue updates pushed by the server (Server-Sent Events).
+// Falls back to polling every 30 seconds where EventSource is unavailable.
+let queueEventSource = null;
 let queueRefreshInterval = null;
 
 function startQueueAutoRefresh() {
-    if (queueRefreshInterval) {
-        clearInterval(queueRefreshInterval);
+    stopQueueAutoRefresh();
+
+    const doctorId = document.getElementById('queueDoctorSelect').value;
+    if (!doctorId) {
+        return;
     }
-    
+
+    if (window.EventSource) {
+        queueEventSource = new EventSource(`${API_BASE_URL}/queue/stream/${doctorId}`);
+        queueEventSource.addEventListener('queue', (event) => {
+            const update = JSON.parse(event.data);
+            displayQueue(update.queue);
+        });
+        return;
+    }
+
     queueRefreshInterval = setInterval(() => {
-        const doctorId = document.getElementById('queueDoctorSelect').value;
-        if (doctorId) {
+        if (document.getElementById('queueDoctorSelect').value) {
             loadQueueStatus();
         }
     }, 30000); // 30 seconds
 }
 
 function stopQueueAutoRefresh() {
+    if (queueEventSource) {
+        queueEventSource.close();
+        queueEventSource = null;
+    }
     if (queueRefreshInterval) {
         clearInterval(queueRefreshInterval);
         queueRefreshInterval = null;
@@ -170,6 +187,16 @@ document.addEventListener('DOMContentLoaded', () => {
         });
         
         observer.observe(queueSection, { attributes: true, attributeFilter: ['class'] });
+
+        // Re-subscribe when a different doctor is selected
+        const doctorSelect = document.getElementById('queueDoctorSelect');
+        if (doctorSelect) {
+            doctorSelect.addEventListener('change', () => {
+                if (queueSection.classList.contains('active')) {
+                    startQueueAutoRefresh();
+                }
+            });
+        }
     }
 });
 